@@ -0,0 +1,63 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Time the start of fresh interpreters using the parser.
+
+Every step runs in a new interpreter, from importing the parser to parsing
+a first template of the normative types and of a profile, and the median
+of the runs is printed.
+
+    python benchmarks/bench_cold_start.py [runs]
+'''
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HELLO_WORLD = os.path.join(ROOT, 'toscaparser', 'tests', 'data',
+                           'tosca_helloworld.yaml')
+HELLO_WORLD_NFV = os.path.join(ROOT, 'toscaparser', 'extensions', 'nfv',
+                               'tests', 'data', 'tosca_helloworld_nfv.yaml')
+
+STEPS = [
+    ('python', 'pass'),
+    ('import', 'import toscaparser.tosca_template'),
+    ('extensions', 'from toscaparser.extensions import exttools; '
+                   'exttools.get_extensions()'),
+    ('parse', 'from toscaparser.tosca_template import ToscaTemplate; '
+              'ToscaTemplate(%r)' % HELLO_WORLD),
+    ('parse profile', 'from toscaparser.tosca_template import ToscaTemplate; '
+                      'ToscaTemplate(%r)' % HELLO_WORLD_NFV),
+]
+
+
+def run(code):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.time()
+    subprocess.check_call([sys.executable, '-c', code], env=env,
+                          stdout=open(os.devnull, 'w'))
+    return time.time() - start
+
+
+def main(args):
+    runs = int(args[0]) if args else 5
+    print('%-16s %10s' % ('step', 'seconds'))
+    for name, code in STEPS:
+        times = sorted(run(code) for _ in range(runs))
+        print('%-16s %10.3f' % (name, times[len(times) // 2]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,83 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Time the intrinsic functions of topologies of growing size.
+
+Every node template of the generated topologies has get_property and
+get_attribute references to other node templates, so the time spent in
+functions grows with the number of references times the cost of finding
+a node template by name. --linear looks the node templates up with a
+linear scan instead of the index of the topology template.
+
+    python benchmarks/bench_functions.py [--linear] [sizes...]
+'''
+
+import sys
+import time
+
+from toscaparser.topology_template import TopologyTemplate
+
+REFERENCES = 10
+
+NODE_TYPES = {
+    'bench.nodes.Node': {
+        'derived_from': 'tosca.nodes.Root',
+        'properties': dict(('ref%d' % i, {'type': 'string',
+                                          'required': False})
+                           for i in range(REFERENCES)),
+        'attributes': {'address': {'type': 'string'}},
+    },
+}
+
+
+def topology(size):
+    node_templates = {}
+    for n in range(size):
+        properties = {}
+        for i in range(REFERENCES):
+            target = 'node%d' % ((n * 7 + i * 13) % size)
+            if i % 2:
+                properties['ref%d' % i] = {
+                    'get_attribute': [target, 'address']}
+            else:
+                properties['ref%d' % i] = {
+                    'get_property': [target, 'ref%d' % (i + 1)]}
+        node_templates['node%d' % n] = {'type': 'bench.nodes.Node',
+                                        'properties': properties}
+    outputs = dict(('out%d' % n, {'value': {
+        'get_attribute': ['node%d' % n, 'address']}})
+        for n in range(0, size, 10))
+    return {'node_templates': node_templates, 'outputs': outputs}
+
+
+def linear_find(self, attr, name):
+    for entity in getattr(self, attr, None) or []:
+        if entity.name == name:
+            return entity
+
+
+def main(args):
+    if '--linear' in args:
+        args.remove('--linear')
+        TopologyTemplate._find = linear_find
+    sizes = [int(arg) for arg in args] or [250, 500, 1000, 2000]
+    print('%8s %12s %10s' % ('nodes', 'references', 'seconds'))
+    for size in sizes:
+        tpl = topology(size)
+        start = time.time()
+        TopologyTemplate(tpl, NODE_TYPES)
+        print('%8d %12d %10.3f' % (size, size * REFERENCES + size // 10,
+                                   time.time() - start))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Time the import of the parser modules by fresh interpreters.
+
+The median of the runs is printed for every module, and the optional
+subsystems it loads although they are only needed on first use. The exit
+status is 1 when any of them is loaded.
+
+    python benchmarks/bench_import_time.py [runs]
+'''
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'toscaparser.tosca_template',
+    'toscaparser.shell',
+]
+
+# loaded on first use only
+LAZY_MODULES = [
+    'dateutil',
+    'numpy',
+    'pbr',
+    'pyfancy',
+    'requests',
+    'toscaparser.prereq.csar',
+    'urllib.request',
+]
+if sys.version_info < (3, 7):
+    # without a module __getattr__ the version is read from pbr on import
+    LAZY_MODULES.remove('pbr')
+
+CODE = '''
+import json, sys, time
+start = time.time()
+import %s
+print(json.dumps([time.time() - start,
+                  [m for m in %r if m in sys.modules]]))
+'''
+
+
+def run(module):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output(
+        [sys.executable, '-c', CODE % (module, LAZY_MODULES)], env=env)
+    return json.loads(output.decode('utf-8'))
+
+
+def main(args):
+    runs = int(args[0]) if args else 5
+    status = 0
+    print('%-28s %10s  %s' % ('module', 'seconds', 'loaded'))
+    for module in MODULES:
+        results = [run(module) for _ in range(runs)]
+        times = sorted(elapsed for elapsed, _ in results)
+        loaded = sorted(set(m for _, mods in results for m in mods))
+        if loaded:
+            status = 1
+        print('%-28s %10.3f  %s' % (module, times[len(times) // 2],
+                                    ', '.join(loaded) or '-'))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
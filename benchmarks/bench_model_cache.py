@@ -0,0 +1,71 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Compare parsing templates with loading their snapshots.
+
+Every template is parsed and validated, then loaded from the snapshot
+stored in a temporary model cache.
+
+    python benchmarks/bench_model_cache.py [--repeat N] [templates...]
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from toscaparser.model_cache import ModelCache
+from toscaparser.tosca_template import ToscaTemplate
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'toscaparser', 'tests', 'data')
+
+TEMPLATES = [
+    os.path.join(DATA_DIR, 'CSAR', 'csar_elk.zip'),
+    os.path.join(DATA_DIR, 'tosca_elk.yaml'),
+    os.path.join(DATA_DIR, 'nfv', 'tosca_nfv_forwarding_paths.yaml'),
+]
+
+
+def best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main(args):
+    repeat = 10
+    if '--repeat' in args:
+        i = args.index('--repeat')
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache = ModelCache(cache_dir)
+        print('%-40s %10s %10s %8s' % ('template', 'parse', 'snapshot',
+                                       'speedup'))
+        for path in args or TEMPLATES:
+            parse = best(lambda: ToscaTemplate(path), repeat)
+            cache.load(path)
+            load = best(lambda: cache.load(path), repeat)
+            print('%-40s %10.4f %10.4f %7.1fx' % (
+                os.path.basename(path), parse, load, parse / load))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
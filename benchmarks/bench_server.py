@@ -0,0 +1,89 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Time the validation of templates by a server and by new interpreters.
+
+Every template is validated the given number of times by a fresh
+interpreter and by a validation server listening on a Unix socket, and
+the median latency of both is printed.
+
+    python benchmarks/bench_server.py [runs]
+'''
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from toscaparser import server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEMPLATES = [
+    os.path.join(ROOT, 'toscaparser', 'tests', 'data',
+                 'tosca_helloworld.yaml'),
+    os.path.join(ROOT, 'toscaparser', 'tests', 'data', 'tosca_elk.yaml'),
+    os.path.join(ROOT, 'toscaparser', 'extensions', 'nfv', 'tests', 'data',
+                 'tosca_helloworld_nfv.yaml'),
+]
+
+
+def median(times):
+    return sorted(times)[len(times) // 2]
+
+
+def run_process(path):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    code = ('from toscaparser.tosca_template import ToscaTemplate; '
+            'ToscaTemplate(%r)' % path)
+    start = time.time()
+    subprocess.check_call([sys.executable, '-c', code], env=env,
+                          stdout=open(os.devnull, 'w'))
+    return time.time() - start
+
+
+def run_client(client, path):
+    start = time.time()
+    client.validate(path)
+    return time.time() - start
+
+
+def main(args):
+    runs = int(args[0]) if args else 5
+    tmp_dir = tempfile.mkdtemp()
+    validation_server = server.ValidationServer(
+        os.path.join(tmp_dir, 'server.sock'))
+    validation_server.warm()
+    thread = threading.Thread(target=validation_server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    client = server.Client(validation_server.address)
+    try:
+        print('%-28s %10s %10s' % ('template', 'process', 'server'))
+        for path in TEMPLATES:
+            process = median([run_process(path) for _ in range(runs)])
+            client_times = [run_client(client, path) for _ in range(runs)]
+            print('%-28s %9.1fms %9.1fms' % (
+                os.path.basename(path), process * 1000,
+                median(client_times) * 1000))
+    finally:
+        client.close()
+        validation_server.shutdown()
+        validation_server.server_close()
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,58 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Time the validation of timestamp values.
+
+Every form of timestamp is validated the given number of times. --dateutil
+validates all of them with dateutil's parser instead of the precompiled
+pattern of the YAML timestamps.
+
+    python benchmarks/bench_timestamps.py [--dateutil] [count]
+'''
+
+import datetime
+import sys
+import time
+
+from toscaparser.common.exception import ExceptionCollector
+from toscaparser.utils import validateutils
+
+VALUES = [
+    ('canonical', '2001-12-15T02:59:43.1Z'),
+    ('iso8601', '2001-12-14t21:59:43.10-05:00'),
+    ('space separated', '2001-12-14 21:59:43.10 -5'),
+    ('no time zone', '2001-12-15 2:59:43.10'),
+    ('date', '2002-12-14'),
+    ('datetime', datetime.datetime(2001, 12, 15, 2, 59, 43, 100000)),
+    ('other form', 'Dec 14 2001 21:59:43'),
+]
+
+
+def main(args):
+    if '--dateutil' in args:
+        args.remove('--dateutil')
+        validateutils._is_timestamp = lambda value: False
+    count = int(args[0]) if args else 10000
+    ExceptionCollector.start()
+    print('%-16s %10s %12s' % ('form', 'seconds', 'per value'))
+    for name, value in VALUES:
+        start = time.time()
+        for _ in range(count):
+            validateutils.validate_timestamp(value)
+        elapsed = time.time() - start
+        print('%-16s %10.3f %10.2fus' % (name, elapsed,
+                                         elapsed / count * 1e6))
+    ExceptionCollector.stop()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
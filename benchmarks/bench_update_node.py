@@ -0,0 +1,74 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Time the validation of one changed node template of growing topologies.
+
+Every node template of the generated topologies is hosted on one of a few
+servers and reads a property of the next one. A property of a node
+template is changed and the template validated again, once by parsing it
+again and once with ToscaTemplate.update_node().
+
+    python benchmarks/bench_update_node.py [sizes...]
+'''
+
+import copy
+import sys
+import time
+
+from toscaparser.tosca_template import ToscaTemplate
+
+SERVERS = 10
+
+NODE_TYPES = {
+    'bench.nodes.Node': {
+        'derived_from': 'tosca.nodes.SoftwareComponent',
+        'properties': {'version': {'type': 'string'},
+                       'next': {'type': 'string', 'required': False}},
+    },
+}
+
+
+def template(size):
+    node_templates = {}
+    for n in range(SERVERS):
+        node_templates['server%d' % n] = {'type': 'tosca.nodes.Compute'}
+    for n in range(size):
+        node_templates['node%d' % n] = {
+            'type': 'bench.nodes.Node',
+            'properties': {
+                'version': '1.0',
+                'next': {'get_property': ['node%d' % ((n + 1) % size),
+                                          'version']}},
+            'requirements': [{'host': 'server%d' % (n % SERVERS)}]}
+    return {'tosca_definitions_version': 'tosca_simple_yaml_1_0',
+            'node_types': NODE_TYPES,
+            'topology_template': {'node_templates': node_templates}}
+
+
+def main(args):
+    sizes = [int(arg) for arg in args] or [100, 200, 400, 800]
+    print('%8s %10s %10s' % ('nodes', 'parse', 'update'))
+    for size in sizes:
+        tpl = template(size)
+        tosca = ToscaTemplate(yaml_dict_tpl=copy.deepcopy(tpl))
+        node_tpl = tpl['topology_template']['node_templates']['node0']
+        node_tpl['properties']['version'] = '2.0'
+        start = time.time()
+        ToscaTemplate(yaml_dict_tpl=copy.deepcopy(tpl))
+        parse = time.time() - start
+        start = time.time()
+        tosca.update_node('node0', copy.deepcopy(node_tpl))
+        print('%8d %10.3f %10.3f' % (size, parse, time.time() - start))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
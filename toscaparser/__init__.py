@@ -10,8 +10,24 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import pbr.version
+import sys
 
 
-__version__ = pbr.version.VersionInfo(
-    'tosca-parser').version_string()
+def _version():
+    import pbr.version
+
+    return pbr.version.VersionInfo('tosca-parser').version_string()
+
+
+if sys.version_info >= (3, 7):
+    # pbr reads the metadata of the installed distributions, which is the
+    # slowest part of importing the parser: only do it on first access
+    def __getattr__(name):
+        global __version__
+        if name == '__version__':
+            __version__ = _version()
+            return __version__
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name))
+else:
+    __version__ = _version()
@@ -0,0 +1,155 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Validate many templates and CSAR archives in a pool of processes.'''
+
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import time
+
+from toscaparser.common.exception import ExceptionCollector
+from toscaparser.common.exception import ValidationError
+from toscaparser.common.exception import ValidationTimeout
+from toscaparser.elements.entity_type import EntityType
+from toscaparser.tosca_template import ToscaTemplate
+
+TEMPLATE_EXTENSIONS = ('.yaml', '.yml', '.zip', '.csar')
+
+
+def find_templates(sources):
+    '''Return the templates of the given directories, globs and lists.
+
+    A directory stands for all the templates below it, a file that is not
+    a template for the list of templates it contains, one per line, and
+    anything else for a glob pattern. The templates of a directory or a
+    glob are sorted so that a batch always runs in the same order.
+    '''
+    if not isinstance(sources, (list, tuple)):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                paths.extend(os.path.join(root, name)
+                             for name in sorted(files)
+                             if name.lower().endswith(TEMPLATE_EXTENSIONS))
+        elif os.path.isfile(source) and \
+                not source.lower().endswith(TEMPLATE_EXTENSIONS):
+            with open(source) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        paths.append(line)
+        else:
+            paths.extend(sorted(glob.glob(source)) or [source])
+    return paths
+
+
+def validate_template(path, timeout=None):
+    '''Parse a template and return the result of its validation.
+
+    The result is a dict holding the path of the template, whether it is
+    valid, the errors found and the time the validation took. A timeout
+    only applies when called from the main thread of a process.
+    '''
+    return validate(lambda: ToscaTemplate(path), path, timeout)
+
+
+def validate(load, path=None, timeout=None):
+    '''Call load to parse a template and return the result as above.'''
+    start = time.time()
+    # the handler to restore, None when no alarm is set
+    alarm = _set_alarm(path, timeout) if timeout else None
+    try:
+        load()
+        errors = []
+    except ValidationError as e:
+        errors = ExceptionCollector.getExceptionsReport(False) or \
+            [ExceptionCollector.getExceptionReportEntry(e, False)]
+    except Exception as e:
+        errors = [ExceptionCollector.getExceptionReportEntry(e, False)]
+    finally:
+        if alarm is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, alarm)
+        ExceptionCollector.stop()
+    return {'path': path,
+            'valid': not errors,
+            'errors': errors,
+            'time': round(time.time() - start, 3)}
+
+
+def _set_alarm(path, timeout):
+    def handler(signum, frame):
+        raise ValidationTimeout(path=path, timeout=timeout)
+    try:
+        previous = signal.signal(signal.SIGALRM, handler)
+    except ValueError:
+        # not the main thread
+        return None
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    # SIG_DFL is 0, and None stands for a handler not set from Python
+    return signal.SIG_DFL if previous is None else previous
+
+
+def _init_worker():
+    # Load the normative definitions once per worker process
+    EntityType.TOSCA_DEF
+
+
+def _validate_in_worker(args):
+    return validate_template(*args)
+
+
+def validate_templates(paths, jobs=None, timeout=None):
+    '''Validate templates in a pool of jobs processes.
+
+    Yields the result of validate_template() for every template, in the
+    order of paths, as soon as it is available. A single job validates the
+    templates in the current process.
+    '''
+    paths = list(paths)
+    jobs = min(jobs or multiprocessing.cpu_count(), len(paths))
+    if jobs <= 1:
+        for path in paths:
+            yield validate_template(path, timeout)
+        return
+    pool = multiprocessing.Pool(jobs, _init_worker)
+    try:
+        for result in pool.imap(_validate_in_worker,
+                                [(path, timeout) for path in paths]):
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def run(sources, output, jobs=None, timeout=None):
+    '''Validate a batch of templates and write JSON lines to output.
+
+    Returns the number of invalid templates.
+    '''
+    failed = 0
+    for result in validate_templates(find_templates(sources), jobs,
+                                     timeout):
+        if not result['valid']:
+            failed += 1
+        output.write(json.dumps(result, sort_keys=True) + '\n')
+        output.flush()
+    return failed
@@ -13,9 +13,13 @@
 '''
 TOSCA exception classes
 '''
+import contextlib
+import linecache
 import logging
 import sys
-import traceback
+import threading
+
+import six
 
 from toscaparser.utils.gettextutils import _
 
@@ -110,6 +114,11 @@ class ValidationError(TOSCAException):
     msg_fmt = _('%(message)s')
 
 
+class ValidationTimeout(TOSCAException):
+    msg_fmt = _('Validation of "%(path)s" did not complete within '
+                '%(timeout)s seconds.')
+
+
 class UnknownInputError(TOSCAException):
     msg_fmt = _('Unknown input "%(input_name)s".')
 
@@ -171,37 +180,161 @@ class InvalidGroupTargetException(TOSCAException):
     msg_fmt = _('"%(message)s"')
 
 
+class CyclicDependencyError(TOSCAException):
+    msg_fmt = _('Node templates "%(nodes)s" require each other.')
+
+
+class TooManyErrors(TOSCAException):
+    msg_fmt = _('Validation stopped after %(max_errors)s errors.')
+
+
+class StackTrace(object):
+    '''Stack of the code that reported an exception.
+
+    Only the file, line number and function of every frame are captured,
+    the source lines are read when the trace is used. It is a sequence of
+    (file, line, function, source) tuples like traceback.extract_stack().
+    '''
+
+    def __init__(self, frame):
+        frames = []
+        while frame is not None:
+            frames.append((frame.f_code.co_filename, frame.f_lineno,
+                           frame.f_code.co_name))
+            frame = frame.f_back
+        frames.reverse()
+        self._frames = frames
+        self._entries = None
+
+    def _get_entries(self):
+        if self._entries is None:
+            entries = []
+            for filename, lineno, name in self._frames:
+                line = linecache.getline(filename, lineno).strip()
+                entries.append((filename, lineno, name, line or None))
+            self._entries = entries
+        return self._entries
+
+    def __iter__(self):
+        return iter(self._get_entries())
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, index):
+        return self._get_entries()[index]
+
+
+class _CollectorState(threading.local):
+    '''Exceptions collected by the parse running in the current thread.'''
+
+    def __init__(self):
+        self.exceptions = []
+        self.messages = set()
+        self.collecting = False
+        self.max_errors = None
+
+
+class _ExceptionCollectorMeta(type):
+    '''Route the class attributes of the collector to the thread state.'''
+
+    @property
+    def exceptions(cls):
+        return cls._state.exceptions
+
+    @exceptions.setter
+    def exceptions(cls, exceptions):
+        cls._state.exceptions = exceptions
+        cls._state.messages = set(str(ex) for ex in exceptions)
+
+    @property
+    def collecting(cls):
+        return cls._state.collecting
+
+    @collecting.setter
+    def collecting(cls, collecting):
+        cls._state.collecting = collecting
+
+
+@six.add_metaclass(_ExceptionCollectorMeta)
 class ExceptionCollector(object):
+    '''Collect the exceptions of a parse.
+
+    The collected exceptions and the collecting flag are kept per thread,
+    so templates can be parsed in several threads at the same time.
+    '''
 
-    exceptions = []
-    collecting = False
+    _state = _CollectorState()
 
     @staticmethod
     def clear():
         del ExceptionCollector.exceptions[:]
+        ExceptionCollector._state.messages.clear()
 
     @staticmethod
-    def start():
+    def start(max_errors=None):
+        '''Start collecting, at most max_errors exceptions if given.
+
+        Once max_errors exceptions are collected, appendException() raises
+        TooManyErrors to stop the parse.
+        '''
         ExceptionCollector.clear()
         ExceptionCollector.collecting = True
+        ExceptionCollector._state.max_errors = max_errors
 
     @staticmethod
     def stop():
         ExceptionCollector.collecting = False
 
+    @staticmethod
+    @contextlib.contextmanager
+    def section(exceptions):
+        '''Also collect the exceptions of the block into exceptions.
+
+        The exceptions of the block are collected apart from the ones
+        collected so far, then added to them, so that exceptions holds all
+        the exceptions of the block even when some were already collected.
+        '''
+        state = ExceptionCollector._state
+        if not state.collecting:
+            yield exceptions
+            return
+        collected = (state.exceptions, state.messages, state.max_errors)
+        state.exceptions = exceptions
+        state.messages = set(str(ex) for ex in exceptions)
+        if state.max_errors:
+            state.max_errors = max(state.max_errors - len(collected[0]), 1)
+        try:
+            yield exceptions
+        finally:
+            state.exceptions, state.messages, state.max_errors = collected
+            for exception in exceptions:
+                if str(exception) not in state.messages:
+                    state.exceptions.append(exception)
+                    state.messages.add(str(exception))
+
     @staticmethod
     def contains(exception):
-        for ex in ExceptionCollector.exceptions:
-            if str(ex) == str(exception):
-                return True
-        return False
+        state = ExceptionCollector._state
+        if len(state.messages) != len(state.exceptions):
+            # the list of exceptions was changed directly
+            state.messages = set(str(ex) for ex in state.exceptions)
+        return str(exception) in state.messages
 
     @staticmethod
     def appendException(exception):
-        if ExceptionCollector.collecting:
+        state = ExceptionCollector._state
+        if state.collecting:
+            if state.max_errors and \
+                    len(state.exceptions) >= state.max_errors:
+                raise TooManyErrors(max_errors=state.max_errors)
             if not ExceptionCollector.contains(exception):
-                exception.trace = traceback.extract_stack()[:-1]
-                ExceptionCollector.exceptions.append(exception)
+                exception.trace = StackTrace(sys._getframe(1))
+                state.exceptions.append(exception)
+                state.messages.add(str(exception))
+            if state.max_errors and \
+                    len(state.exceptions) >= state.max_errors:
+                raise TooManyErrors(max_errors=state.max_errors)
         else:
             raise exception
 
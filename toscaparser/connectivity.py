@@ -0,0 +1,142 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Connectivity of the connection points of NFV templates.
+
+A connection point (tosca.nodes.nfv.CP) is connected to the virtual links
+(tosca.nodes.nfv.VL) of its virtualLink requirements. Connection points
+reach each other through the virtual links they share, directly or through
+connection points on several virtual links. The connection points and
+virtual links are merged in a disjoint-set forest, so that building the
+model and answering a reachability query take almost linear and almost
+constant time.
+'''
+
+CP = 'tosca.nodes.nfv.CP'
+
+VIRTUAL_LINK = 'virtualLink'
+
+
+def _requirement_node(value):
+    if isinstance(value, dict):
+        return value.get('node')
+    return value
+
+
+class CPConnectivity(object):
+    '''Connectivity model of connection points and virtual links.'''
+
+    def __init__(self, nodetemplates=()):
+        self._parent = {}
+        self._size = {}
+        self._cps = {}
+        self._members = {}
+        for node in nodetemplates:
+            if node.type != CP:
+                continue
+            self.add_cp(node.name)
+            for req in node.requirements:
+                if isinstance(req, dict) and VIRTUAL_LINK in req:
+                    link = _requirement_node(req[VIRTUAL_LINK])
+                    if link:
+                        self.add_link(node.name, link)
+
+    def _add(self, name):
+        if name not in self._parent:
+            self._parent[name] = name
+            self._size[name] = 1
+
+    def _find(self, name):
+        parent = self._parent
+        while parent[name] != name:
+            # path halving
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    def _union(self, name1, name2):
+        root1 = self._find(name1)
+        root2 = self._find(name2)
+        if root1 == root2:
+            return
+        if self._size[root1] < self._size[root2]:
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._size[root1] += self._size[root2]
+
+    def add_cp(self, cp):
+        if cp not in self._cps:
+            self._add(cp)
+            self._cps[cp] = []
+
+    def add_link(self, cp, link):
+        '''Connect a connection point to a virtual link.'''
+        self.add_cp(cp)
+        if link in self._cps[cp]:
+            return
+        self._cps[cp].append(link)
+        self._members.setdefault(link, []).append(cp)
+        self._add(link)
+        self._union(cp, link)
+
+    @property
+    def cps(self):
+        return list(self._cps)
+
+    @property
+    def virtual_links(self):
+        return list(self._members)
+
+    def links(self, cp):
+        '''Return the virtual links of a connection point.'''
+        return list(self._cps.get(cp, ()))
+
+    def members(self, link):
+        '''Return the connection points of a virtual link.'''
+        return list(self._members.get(link, ()))
+
+    def connected(self, cp1, cp2):
+        '''Return whether two connection points share a virtual link.'''
+        links = self._cps.get(cp1)
+        if not links or cp2 not in self._cps:
+            return False
+        if len(links) == 1:
+            return links[0] in self._cps[cp2]
+        return not set(links).isdisjoint(self._cps[cp2])
+
+    def reachable(self, cp1, cp2):
+        '''Return whether a connection point reaches another one.
+
+        Connection points reach each other through a chain of virtual links
+        and of connection points connected to several virtual links.
+        '''
+        if cp1 not in self._cps or cp2 not in self._cps:
+            return False
+        if cp1 == cp2:
+            return True
+        return self._find(cp1) == self._find(cp2)
+
+    def components(self):
+        '''Return the groups of connection points reaching each other.'''
+        groups = {}
+        for cp in self._cps:
+            groups.setdefault(self._find(cp), []).append(cp)
+        return list(groups.values())
+
+    def export(self):
+        '''Return the connection points of every virtual link.
+
+        This sparse form of the model only holds the pairs of connection
+        point and virtual link, and can be serialized to JSON.
+        '''
+        return dict((link, sorted(cps))
+                    for link, cps in self._members.items())
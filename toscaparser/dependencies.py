@@ -0,0 +1,166 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Index of the entities of a topology template reading node templates.
+
+The index is built from the template data, so that the entities to build
+again after a node template changed are known without building any.
+'''
+
+import six
+
+from toscaparser import functions
+
+# Entities of a topology template reading node templates
+KINDS = (NODE, REQUIREMENT, GROUP, POLICY, OUTPUT) = \
+        ('node', 'requirement', 'group', 'policy', 'output')
+
+# Functions whose first argument is a node template
+NODE_FUNCTIONS = (functions.GET_PROPERTY, functions.GET_ATTRIBUTE,
+                  functions.GET_OPERATION_OUTPUT)
+
+# Node templates named by the functions relative to their context
+RELATIVE_NAMES = (functions.HOST, functions.SOURCE, functions.TARGET)
+
+
+def plain(value):
+    '''Return value with its functions back in their template form.
+
+    The processing of the functions replaces them by Function objects in
+    the template data. The arguments of the functions are always lists, so
+    that the same template data compare equal before and after.
+    '''
+    if isinstance(value, functions.Function):
+        return {value.name: plain(value.args)}
+    if isinstance(value, dict):
+        if len(value) == 1:
+            name, args = list(value.items())[0]
+            if name in functions.function_mappings and \
+                    not isinstance(args, list):
+                return {name: [plain(args)]}
+        return dict((key, plain(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    return value
+
+
+def function_reads(value, reads=None):
+    '''Return the names of the node templates read by the functions.'''
+    if reads is None:
+        reads = set()
+    if isinstance(value, functions.Function):
+        value = {value.name: value.args}
+    if isinstance(value, dict):
+        if len(value) == 1:
+            name, args = list(value.items())[0]
+            if name in NODE_FUNCTIONS and isinstance(args, list) and args \
+                    and isinstance(args[0], six.string_types):
+                reads.add(args[0])
+        for item in value.values():
+            function_reads(item, reads)
+    elif isinstance(value, list):
+        for item in value:
+            function_reads(item, reads)
+    return reads
+
+
+def requirement_targets(node_tpl):
+    '''Return the targets and relationships of the requirements.'''
+    targets = set()
+    relationships = set()
+    requirements = node_tpl.get('requirements') \
+        if isinstance(node_tpl, dict) else None
+    if not isinstance(requirements, list):
+        return targets, relationships
+    for requirement in requirements:
+        if not isinstance(requirement, dict):
+            continue
+        for value in requirement.values():
+            if isinstance(value, dict):
+                value, relationship = value.get('node'), \
+                    value.get('relationship')
+                if isinstance(relationship, six.string_types):
+                    relationships.add(relationship)
+            if isinstance(value, six.string_types):
+                targets.add(value)
+    return targets, relationships
+
+
+class Dependencies(object):
+    '''Entities of a topology template and the node templates they read.
+
+    A node template reads the node templates of its functions, those of
+    the relationship templates of its requirements and, when its functions
+    name them relative to their context, the node templates it requires,
+    directly or not. Its requirements read their targets. Groups read
+    their members, policies their targets and outputs the node templates
+    of their functions.
+    '''
+
+    def __init__(self, topology_tpl):
+        topology_tpl = topology_tpl or {}
+        self.reads = dict((kind, {}) for kind in KINDS)
+        node_tpls = topology_tpl.get('node_templates') or {}
+        rel_tpls = topology_tpl.get('relationship_templates') or {}
+        requires = {}
+        for name, node_tpl in node_tpls.items():
+            targets, relationships = requirement_targets(node_tpl)
+            requires[name] = targets
+            reads = function_reads(node_tpl)
+            for relationship in relationships:
+                function_reads(rel_tpls.get(relationship), reads)
+            self.reads[REQUIREMENT][name] = targets
+            self.reads[NODE][name] = reads
+        for name, reads in self.reads[NODE].items():
+            if reads.intersection(RELATIVE_NAMES):
+                reads.update(self._required(name, requires))
+            reads.discard(name)
+        for name, group_tpl in self._section(topology_tpl, 'groups'):
+            members = group_tpl.get('members')
+            self.reads[GROUP][name] = set(
+                member for member in members or ()
+                if isinstance(member, six.string_types)) \
+                if isinstance(members, list) else set()
+        for policies in topology_tpl.get('policies') or ():
+            for name, policy_tpl in self._section(policies):
+                targets = policy_tpl.get('targets')
+                self.reads[POLICY][name] = set(
+                    target for target in targets
+                    if isinstance(target, six.string_types)) \
+                    if isinstance(targets, list) else set()
+        for name, output_tpl in self._section(topology_tpl, 'outputs'):
+            self.reads[OUTPUT][name] = function_reads(output_tpl)
+
+    @staticmethod
+    def _section(tpl, section=None):
+        entities = tpl.get(section) if section else tpl
+        if not isinstance(entities, dict):
+            return []
+        return [(name, entity_tpl) for name, entity_tpl in entities.items()
+                if isinstance(entity_tpl, dict)]
+
+    @staticmethod
+    def _required(name, requires):
+        required = set()
+        pending = [name]
+        while pending:
+            for target in requires.get(pending.pop(), ()):
+                if target not in required:
+                    required.add(target)
+                    pending.append(target)
+        return required
+
+    def readers(self, kind, names):
+        '''Return the names of the entities of kind reading names.'''
+        names = set(names)
+        return set(name for name, reads in self.reads[kind].items()
+                   if not reads.isdisjoint(names))
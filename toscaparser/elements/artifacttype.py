@@ -40,9 +40,12 @@ class ArtifactTypeDef(StatefulEntityType):
         '''Return a artifact entity from which this entity is derived.'''
         if not hasattr(self, 'defs'):
             return None
-        partifact_entity = self.derived_from(self.defs)
-        if partifact_entity:
-            return ArtifactTypeDef(partifact_entity, self.custom_def)
+        if not hasattr(self, '_parent_type'):
+            partifact_entity = self.derived_from(self.defs)
+            self._parent_type = ArtifactTypeDef(partifact_entity,
+                                                self.custom_def) \
+                if partifact_entity else None
+        return self._parent_type
 
     def get_artifact(self, name):
         '''Return the definition of an artifact field by name.'''
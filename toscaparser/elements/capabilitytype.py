@@ -27,7 +27,9 @@ class CapabilityTypeDef(StatefulEntityType):
         self.custom_def = custom_def
         if self.PROPERTIES in self.defs:
             self.properties = self.defs[self.PROPERTIES]
-        self.parent_capabilities = self._get_parent_capabilities(custom_def)
+        self.parent_capabilities = self._get_resolved(
+            'parents', None,
+            lambda: self._get_parent_capabilities(custom_def))
 
     def get_properties_def_objects(self):
         '''Return a list of property definition objects.'''
@@ -77,10 +79,12 @@ class CapabilityTypeDef(StatefulEntityType):
         '''Return a capability this capability is derived from.'''
         if not hasattr(self, 'defs'):
             return None
-        pnode = self.derived_from(self.defs)
-        if pnode:
-            return CapabilityTypeDef(self.name, pnode,
-                                     self.nodetype, self.custom_def)
+        if not hasattr(self, '_parent_type'):
+            pnode = self.derived_from(self.defs)
+            self._parent_type = CapabilityTypeDef(
+                self.name, pnode, self.nodetype, self.custom_def) \
+                if pnode else None
+        return self._parent_type
 
     def inherits_from(self, type_names):
         '''Check this capability is in type_names
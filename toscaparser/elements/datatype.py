@@ -26,10 +26,11 @@ class DataType(StatefulEntityType):
     @property
     def parent_type(self):
         '''Return a datatype this datatype is derived from.'''
-        ptype = self.derived_from(self.defs)
-        if ptype:
-            return DataType(ptype, self.custom_def)
-        return None
+        if not hasattr(self, '_parent_type'):
+            ptype = self.derived_from(self.defs)
+            self._parent_type = DataType(ptype, self.custom_def) \
+                if ptype else None
+        return self._parent_type
 
     @property
     def value_type(self):
@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Precompiled snapshot of the TOSCA type definition files.
+
+Parsing TOSCA_definition_1_0.yaml and the extension definition files with
+PyYAML is the most expensive part of starting the parser. build() flattens
+the type sections of all these files and stores them with pickle, next to
+the SHA-256 of each YAML source. load_definitions() returns the snapshot
+entry of a file when the hash of its YAML source still matches and parses
+the YAML file otherwise.
+
+The snapshot is built with:
+
+    python -m toscaparser.elements.definitions_snapshot
+'''
+
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+from six.moves import cPickle as pickle
+
+import toscaparser.utils.yamlparser
+
+log = logging.getLogger('tosca')
+
+FORMAT_VERSION = 1
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pickles are not portable between major versions of Python
+SNAPSHOT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'TOSCA_definitions_py%d.pickle' % sys.version_info[0])
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def flatten(tpl, sections):
+    '''Return a map of all the types defined in the given sections.'''
+    defs = {}
+    for section in sections:
+        if tpl and section in tpl.keys():
+            value = tpl[section]
+            for key in value.keys():
+                defs[key] = value[key]
+    return defs
+
+
+def source_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _entry_name(path):
+    return os.path.relpath(os.path.abspath(path), PACKAGE_DIR)
+
+
+def _read_snapshot(snapshot_file):
+    try:
+        with open(snapshot_file, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (IOError, OSError):
+        return {}
+    except Exception as e:
+        log.warning('Ignoring unreadable definitions snapshot "%s": %s'
+                    % (snapshot_file, e))
+        return {}
+    if not isinstance(snapshot, dict) or \
+            snapshot.get('format') != FORMAT_VERSION:
+        log.warning('Ignoring definitions snapshot "%s" with an unknown '
+                    'format.' % snapshot_file)
+        return {}
+    return snapshot.get('entries', {})
+
+
+def _get_snapshot(snapshot_file):
+    with _lock:
+        if snapshot_file not in _snapshots:
+            _snapshots[snapshot_file] = _read_snapshot(snapshot_file)
+        return _snapshots[snapshot_file]
+
+
+def load_definitions(path, sections, snapshot_file=None):
+    '''Return the flattened type definitions of a YAML definition file.
+
+    The definitions are read from the snapshot if it holds an entry built
+    from the current content of the file, otherwise they are parsed from
+    the YAML file. Every call returns a new copy of the definitions.
+    '''
+    entries = _get_snapshot(snapshot_file or SNAPSHOT_FILE)
+    entry = entries.get(_entry_name(path))
+    if entry:
+        sha256, sections_snapshot, data = entry
+        if sha256 == source_hash(path) and \
+                sections_snapshot == list(sections):
+            return pickle.loads(data)
+        log.info('Definitions snapshot of "%s" is stale.' % path)
+    return flatten(toscaparser.utils.yamlparser.load_yaml(path), sections)
+
+
+def definition_files():
+    '''Return the normative and the extension definition files.'''
+    from toscaparser.elements.entity_type import EntityType
+    from toscaparser.extensions.exttools import ExtTools
+
+    files = [EntityType.TOSCA_DEF_FILE]
+    for info in ExtTools().EXTENSION_INFO.values():
+        files.append(info['defs_file'])
+    return files
+
+
+def build(snapshot_file=None, files=None):
+    '''Build the snapshot of the given definition files.'''
+    from toscaparser.elements.entity_type import EntityType
+
+    snapshot_file = snapshot_file or SNAPSHOT_FILE
+    sections = list(EntityType.TOSCA_DEF_SECTIONS)
+    entries = {}
+    for path in files or definition_files():
+        defs = flatten(toscaparser.utils.yamlparser.load_yaml(path),
+                       sections)
+        entries[_entry_name(path)] = (
+            source_hash(path), sections,
+            pickle.dumps(defs, pickle.HIGHEST_PROTOCOL))
+    snapshot = {'format': FORMAT_VERSION, 'entries': entries}
+
+    # write to a temporary file first so that a reader never sees a
+    # partially written snapshot
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(snapshot_file)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+        os.chmod(tmp_path, 0o644)
+        os.rename(tmp_path, snapshot_file)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    with _lock:
+        _snapshots.pop(snapshot_file, None)
+    return snapshot_file
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    snapshot_file = build(args[0] if args else None)
+    print('Wrote definitions snapshot "%s".' % snapshot_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,17 +10,96 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 import logging
 import os
+import threading
+import warnings
 from toscaparser.common.exception import ExceptionCollector
 from toscaparser.common.exception import ValidationError
-from toscaparser.extensions.exttools import ExtTools
+from toscaparser.elements import type_registry
 import toscaparser.utils.yamlparser
 
 log = logging.getLogger('tosca')
 
 
+class ResolvedDefinitionsCache(object):
+    '''Cache of type sections merged with the sections of the parent types.
+
+    Resolving a section walks the whole derived_from chain, so the result is
+    kept per type registry, type class, type name and section. Entries are
+    grouped in a namespace per custom_def dictionary since the same type name
+    can resolve differently against another set of custom definitions. The
+    namespace keeps a reference to its custom_def so that the identity used
+    as key can not be reused by another dictionary while the namespace is
+    alive.
+    '''
+
+    MAX_NAMESPACES = 32
+
+    def __init__(self):
+        self._namespaces = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def namespace(self, custom_def):
+        key = id(custom_def)
+        with self._lock:
+            entry = self._namespaces.pop(key, None)
+            if entry is None or entry[0] is not custom_def:
+                entry = (custom_def, {})
+            self._namespaces[key] = entry
+            while len(self._namespaces) > self.MAX_NAMESPACES:
+                self._namespaces.popitem(last=False)
+        return entry[1]
+
+    def get(self, custom_def, key, resolve):
+        namespace = self.namespace(custom_def)
+        if key in namespace:
+            self.hits += 1
+        else:
+            self.misses += 1
+            namespace[key] = resolve()
+        return namespace[key]
+
+    def clear(self):
+        with self._lock:
+            self._namespaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class LazyDefinitions(object):
+    '''Class attribute loaded on first access instead of at import time.'''
+
+    def __init__(self, load, *args):
+        self.load = load
+        self.args = args
+        self.value = None
+        self._lock = threading.Lock()
+
+    def __get__(self, obj, objtype=None):
+        if self.value is None:
+            with self._lock:
+                if self.value is None:
+                    self.value = self.load(*self.args)
+        return self.value
+
+
+class RegistryDefinitions(object):
+    '''Class attribute returning the type definitions of an entity.
+
+    The definitions are those of the type registry of the custom
+    definitions of the entity, see type_registry.
+    '''
+
+    def __get__(self, obj, objtype=None):
+        custom_def = getattr(obj, 'custom_def', None)
+        return type_registry.registry_of(custom_def).definitions
+
+
 class EntityType(object):
     '''Base class for TOSCA elements.'''
 
@@ -41,15 +120,12 @@ class EntityType(object):
 
     loader = toscaparser.utils.yamlparser.load_yaml
 
-    TOSCA_DEF_LOAD_AS_IS = loader(TOSCA_DEF_FILE)
+    TOSCA_DEF_LOAD_AS_IS = LazyDefinitions(loader, TOSCA_DEF_FILE)
 
     # Map of definition with pre-loaded values of TOSCA_DEF_FILE_SECTIONS
-    TOSCA_DEF = {}
-    for section in TOSCA_DEF_SECTIONS:
-        if section in TOSCA_DEF_LOAD_AS_IS.keys():
-            value = TOSCA_DEF_LOAD_AS_IS[section]
-            for key in value.keys():
-                TOSCA_DEF[key] = value[key]
+    # and of the profile of the template, read from the definitions
+    # snapshot when it is up to date
+    TOSCA_DEF = RegistryDefinitions()
 
     RELATIONSHIP_TYPE = (DEPENDSON, HOSTEDON, CONNECTSTO, ATTACHESTO,
                          LINKSTO, BINDSTO) = \
@@ -73,6 +149,9 @@ class EntityType(object):
     DATATYPE_NETWORK_PREFIX = DATATYPE_PREFIX + 'network.'
     TOSCA = 'tosca'
 
+    # Sections already merged along the derived_from chain
+    resolved_defs = ResolvedDefinitionsCache()
+
     def derived_from(self, defs):
         '''Return a type this type is derived from.'''
         return self.entity_value(defs, 'derived_from')
@@ -107,34 +186,57 @@ class EntityType(object):
             # item definitions
             value = copy.copy(defs[ndtype])
         if parent:
-            p = self
-            if p:
-                while p:
-                    if p.defs and ndtype in p.defs:
-                        # get the parent value
-                        parent_value = p.defs[ndtype]
-                        if value:
-                            if isinstance(value, dict):
-                                for k, v in parent_value.items():
-                                    if k not in value.keys():
-                                        value[k] = v
-                            if isinstance(value, list):
-                                for p_value in parent_value:
-                                    if p_value not in value:
-                                        value.append(p_value)
-                        else:
-                            value = copy.copy(parent_value)
-                    p = p.parent_type
+            inherited = self._get_resolved(
+                'value', ndtype, lambda: self._resolve_value(ndtype))
+            if inherited is not None:
+                value = self._merge_value(value, inherited)
         return value
 
-    def get_definition(self, ndtype):
+    def _resolve_value(self, ndtype):
         value = None
+        p = self
+        while p:
+            if p.defs and ndtype in p.defs:
+                # get the parent value
+                value = self._merge_value(value, p.defs[ndtype])
+            p = p.parent_type
+        return value
+
+    @staticmethod
+    def _merge_value(value, parent_value):
+        if value:
+            if isinstance(value, dict):
+                for k, v in parent_value.items():
+                    if k not in value.keys():
+                        value[k] = v
+            if isinstance(value, list):
+                for p_value in parent_value:
+                    if p_value not in value:
+                        value.append(p_value)
+        else:
+            value = copy.copy(parent_value)
+        return value
+
+    def _get_resolved(self, kind, ndtype, resolve):
+        if not getattr(self, 'defs', None):
+            return resolve()
+        custom_def = getattr(self, 'custom_def', None)
+        key = (type_registry.registry_of(custom_def).version,
+               self.__class__, self.type, kind, ndtype)
+        return self.resolved_defs.get(custom_def, key, resolve)
+
+    def get_definition(self, ndtype):
         if not hasattr(self, 'defs'):
             defs = None
             ExceptionCollector.appendException(
                 ValidationError(message="defs is " + str(defs)))
-        else:
-            defs = self.defs
+            return self._resolve_definition(defs, ndtype)
+        return self._get_resolved(
+            'definition', ndtype,
+            lambda: self._resolve_definition(self.defs, ndtype))
+
+    def _resolve_definition(self, defs, ndtype):
+        value = None
         if defs is not None and ndtype in defs:
             value = defs[ndtype]
         p = self.parent_type
@@ -151,14 +253,13 @@ class EntityType(object):
 
 
 def update_definitions(version):
-    exttools = ExtTools()
-    extension_defs_file = exttools.get_defs_file(version)
-    loader = toscaparser.utils.yamlparser.load_yaml
-    nfv_def_file = loader(extension_defs_file)
-    nfv_def = {}
-    for section in EntityType.TOSCA_DEF_SECTIONS:
-        if section in nfv_def_file.keys():
-            value = nfv_def_file[section]
-            for key in value.keys():
-                nfv_def[key] = value[key]
-    EntityType.TOSCA_DEF.update(nfv_def)
+    '''Return the type registry of a version.
+
+    Deprecated: the definitions of the extensions are no longer merged into
+    EntityType.TOSCA_DEF but kept in a registry per version, see
+    type_registry.get_registry().
+    '''
+    warnings.warn('update_definitions() is deprecated, use '
+                  'type_registry.get_registry() instead.',
+                  DeprecationWarning, stacklevel=2)
+    return type_registry.get_registry(version)
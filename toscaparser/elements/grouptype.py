@@ -56,9 +56,11 @@ class GroupType(StatefulEntityType):
         '''Return a group statefulentity of this entity is derived from.'''
         if not hasattr(self, 'defs'):
             return None
-        pgroup_entity = self.derived_from(self.defs)
-        if pgroup_entity:
-            return GroupType(pgroup_entity, self.custom_def)
+        if not hasattr(self, '_parent_type'):
+            pgroup_entity = self.derived_from(self.defs)
+            self._parent_type = GroupType(pgroup_entity, self.custom_def) \
+                if pgroup_entity else None
+        return self._parent_type
 
     @property
     def description(self):
@@ -37,9 +37,11 @@ class NodeType(StatefulEntityType):
         '''Return a node this node is derived from.'''
         if not hasattr(self, 'defs'):
             return None
-        pnode = self.derived_from(self.defs)
-        if pnode:
-            return NodeType(pnode, self.custom_def)
+        if not hasattr(self, '_parent_type'):
+            pnode = self.derived_from(self.defs)
+            self._parent_type = NodeType(pnode, self.custom_def) \
+                if pnode else None
+        return self._parent_type
 
     @property
     def relationship(self):
@@ -140,6 +142,10 @@ class NodeType(StatefulEntityType):
 
     def get_capabilities_objects(self):
         '''Return a list of capability objects.'''
+        return list(self._get_resolved('objects', self.CAPABILITIES,
+                                       self._create_capabilities_objects))
+
+    def _create_capabilities_objects(self):
         typecapabilities = []
         caps = self.get_value(self.CAPABILITIES, None, True)
         if caps:
@@ -40,7 +40,8 @@ class PolicyType(StatefulEntityType):
         self.properties = None
         if self.PROPERTIES in self.defs:
             self.properties = self.defs[self.PROPERTIES]
-        self.parent_policies = self._get_parent_policies()
+        self.parent_policies = self._get_resolved('parents', None,
+                                                  self._get_parent_policies)
 
         self.policy_version = None
         if self.VERSION in self.defs:
@@ -73,9 +74,11 @@ class PolicyType(StatefulEntityType):
         '''Return a policy statefulentity of this node is derived from.'''
         if not hasattr(self, 'defs'):
             return None
-        ppolicy_entity = self.derived_from(self.defs)
-        if ppolicy_entity:
-            return PolicyType(ppolicy_entity, self.custom_def)
+        if not hasattr(self, '_parent_type'):
+            ppolicy_entity = self.derived_from(self.defs)
+            self._parent_type = PolicyType(ppolicy_entity, self.custom_def) \
+                if ppolicy_entity else None
+        return self._parent_type
 
     def get_policy(self, name):
         '''Return the definition of a policy field by name.'''
@@ -33,9 +33,11 @@ class RelationshipType(StatefulEntityType):
     @property
     def parent_type(self):
         '''Return a relationship this reletionship is derived from.'''
-        prel = self.derived_from(self.defs)
-        if prel:
-            return RelationshipType(prel, self.custom_def)
+        if not hasattr(self, '_parent_type'):
+            prel = self.derived_from(self.defs)
+            self._parent_type = RelationshipType(prel, self.custom_def) \
+                if prel else None
+        return self._parent_type
 
     @property
     def valid_target_types(self):
@@ -31,6 +31,8 @@ class StatefulEntityType(EntityType):
                                                     'remove_target']
 
     def __init__(self, entitytype, prefix, custom_def=None):
+        # the custom definitions carry the type registry of the template
+        self.custom_def = custom_def
         entire_entitytype = entitytype
         if UnsupportedType.validate_type(entire_entitytype):
             self.defs = None
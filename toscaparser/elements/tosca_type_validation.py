@@ -13,6 +13,7 @@
 from toscaparser.common.exception import ExceptionCollector
 from toscaparser.common.exception import InvalidTemplateVersion
 from toscaparser.common.exception import UnknownFieldError
+from toscaparser.elements.entity_type import LazyDefinitions
 from toscaparser.extensions.exttools import ExtTools
 
 
@@ -30,9 +31,9 @@ class TypeValidation(object):
          'relationship_types', 'capability_types',
          'interface_types', 'policy_types', 'topology_template',
          'metadata')
-    VALID_TEMPLATE_VERSIONS = ['tosca_simple_yaml_1_0']
     exttools = ExtTools()
-    VALID_TEMPLATE_VERSIONS.extend(exttools.get_versions())
+    VALID_TEMPLATE_VERSIONS = LazyDefinitions(
+        lambda: ['tosca_simple_yaml_1_0'] + ExtTools().get_versions())
 
     def __init__(self, custom_types, import_def):
         self.import_def = import_def
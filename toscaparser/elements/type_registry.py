@@ -0,0 +1,117 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Type definitions of every TOSCA definitions version.
+
+The normative types of tosca_simple_yaml_1_0 are extended with the types
+of a profile, such as NFV or MEC, for the versions of the extensions. A
+TypeRegistry is built once per version and never changes, so that the
+templates of all the profiles can be parsed by the same process, even
+concurrently.
+
+The registry of a template is carried by its CustomDefinitions down to
+every entity type built from them. The entity types built without these
+custom definitions use the registry in use by the thread, which is the
+one of the template being parsed or the normative one.
+'''
+
+import contextlib
+import threading
+
+from toscaparser.elements.definitions_snapshot import load_definitions
+from toscaparser.extensions import exttools
+from toscaparser.utils.gettextutils import _
+
+DEFAULT_VERSION = 'tosca_simple_yaml_1_0'
+
+_registries = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class TypeDefinitions(dict):
+    '''Read-only map of the type definitions of a registry.'''
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_('Type definitions are read-only.'))
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+class TypeRegistry(object):
+    '''Type definitions of a TOSCA definitions version.'''
+
+    def __init__(self, version, definitions):
+        self.version = version
+        self.definitions = TypeDefinitions(definitions)
+
+    def __reduce__(self):
+        # pickled templates refer to the registry of the process
+        return (get_registry, (self.version,))
+
+    def __repr__(self):
+        return 'TypeRegistry(%r)' % self.version
+
+
+def _build(version):
+    from toscaparser.elements.entity_type import EntityType
+
+    defs = load_definitions(EntityType.TOSCA_DEF_FILE,
+                            EntityType.TOSCA_DEF_SECTIONS)
+    if version != DEFAULT_VERSION:
+        defs.update(load_definitions(
+            exttools.get_extensions()[version]['defs_file'],
+            EntityType.TOSCA_DEF_SECTIONS))
+    return TypeRegistry(version, defs)
+
+
+def get_registry(version=None):
+    '''Return the registry of a version, built on first use.
+
+    Versions without an extension get the normative registry.
+    '''
+    if version not in exttools.get_extensions():
+        version = DEFAULT_VERSION
+    registry = _registries.get(version)
+    if registry is None:
+        with _lock:
+            registry = _registries.get(version)
+            if registry is None:
+                registry = _registries[version] = _build(version)
+    return registry
+
+
+def current():
+    '''Return the registry in use by the thread.'''
+    registries = getattr(_local, 'registries', None)
+    if registries:
+        return registries[-1]
+    return get_registry()
+
+
+@contextlib.contextmanager
+def use(registry):
+    '''Use a registry in the thread for the duration of the block.'''
+    registries = getattr(_local, 'registries', None)
+    if registries is None:
+        registries = _local.registries = []
+    registries.append(registry)
+    try:
+        yield registry
+    finally:
+        registries.pop()
+
+
+def registry_of(custom_def):
+    '''Return the registry of the entities built from custom_def.'''
+    return getattr(custom_def, 'type_registry', None) or current()
@@ -11,10 +11,28 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+"""Discovery of the profile extensions.
+
+An extension is a module defining the VERSION of its profile, its
+DEFS_FILE, relative to the module, and optionally its SECTIONS. The
+extensions shipped with the parser are the packages of this directory,
+the other ones are registered by their distributions under the
+"toscaparser.extensions" entry point group:
+
+    [entry_points]
+    toscaparser.extensions =
+        my_profile_1_0 = my_package.my_profile_1_0
+
+They are discovered once per process. Their definition files are only
+loaded by the type registry of their version, see
+toscaparser.elements.type_registry.
+"""
+
 import collections
 import importlib
 import logging
 import os
+import threading
 
 from toscaparser.common.exception import ToscaExtAttributeError
 from toscaparser.common.exception import ToscaExtImportError
@@ -23,52 +41,112 @@ log = logging.getLogger("tosca.model")
 
 REQUIRED_ATTRIBUTES = ['VERSION', 'DEFS_FILE']
 
+ENTRY_POINT_GROUP = 'toscaparser.extensions'
+
+_extensions = None
+_lock = threading.Lock()
+
+
+def _entry_points(group):
+    try:
+        from importlib import metadata
+    except ImportError:
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            metadata = None
+    if metadata is not None:
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, 'select'):
+            return list(entry_points.select(group=group))
+        return list(entry_points.get(group, ()))
+    try:
+        import pkg_resources
+    except ImportError:
+        return []
+    return list(pkg_resources.iter_entry_points(group))
+
+
+def _builtin_modules():
+    # the modules of the extension packages of this directory
+    abs_path = os.path.dirname(os.path.abspath(__file__))
+    extdirs = sorted(e for e in os.listdir(abs_path) if
+                     not e.startswith(('tests', '__')) and
+                     os.path.isdir(os.path.join(abs_path, e)))
+    for e in extdirs:
+        extpath = os.path.join(abs_path, e)
+        ext_files = sorted(f for f in os.listdir(extpath)
+                           if f.endswith('.py') and
+                           not f.startswith('__init__'))
+        for f in ext_files:
+            ext_name = 'toscaparser.extensions.%s.%s' % (e, f[:-3])
+            try:
+                yield ext_name, importlib.import_module(ext_name)
+            except ImportError:
+                raise ToscaExtImportError(ext_name=ext_name)
+
+
+def _entry_point_modules():
+    for entry_point in _entry_points(ENTRY_POINT_GROUP):
+        try:
+            yield entry_point.name, entry_point.load()
+        except ImportError:
+            raise ToscaExtImportError(ext_name=entry_point.name)
+
+
+def _extension_info(ext_name, extinfo):
+    try:
+        version = getattr(extinfo, 'VERSION')
+        defs_file = getattr(extinfo, 'DEFS_FILE')
+    except AttributeError:
+        attrs = ', '.join(REQUIRED_ATTRIBUTES)
+        raise ToscaExtAttributeError(ext_name=ext_name, attrs=attrs)
+    module_file = getattr(extinfo, '__file__', None)
+    if module_file:
+        defs_file = os.path.join(
+            os.path.dirname(os.path.abspath(module_file)), defs_file)
+    # Sections is an optional attribute
+    sections = getattr(extinfo, 'SECTIONS', ())
+    return version, {'sections': sections, 'defs_file': defs_file}
+
+
+def _discover():
+    extensions = collections.OrderedDict()
+    for modules in (_builtin_modules(), _entry_point_modules()):
+        for ext_name, extinfo in modules:
+            version, info = _extension_info(ext_name, extinfo)
+            if version in extensions:
+                # the package itself is also registered once installed
+                if extensions[version]['defs_file'] != info['defs_file']:
+                    log.warning('Ignoring extension "%s": version "%s" is '
+                                'already provided.' % (ext_name, version))
+                continue
+            log.info('Found extension "%s" for "%s".' % (ext_name, version))
+            extensions[version] = info
+    return extensions
+
+
+def get_extensions():
+    """Return the info of every extension by version."""
+    global _extensions
+    if _extensions is None:
+        with _lock:
+            if _extensions is None:
+                _extensions = _discover()
+    return _extensions
+
+
+def reset():
+    """Forget the extensions discovered, for them to be found again."""
+    global _extensions
+    with _lock:
+        _extensions = None
+
 
 class ExtTools(object):
-    def __init__(self):
-        self.EXTENSION_INFO = self._load_extensions()
-
-    def _load_extensions(self):
-        '''Dynamically load all the extensions .'''
-        extensions = collections.OrderedDict()
-
-        # Use the absolute path of the class path
-        abs_path = os.path.dirname(os.path.abspath(__file__))
-
-        extdirs = [e for e in os.listdir(abs_path) if
-                   not e.startswith('tests') and
-                   os.path.isdir(os.path.join(abs_path, e))]
-
-        for e in extdirs:
-            log.info(e)
-            extpath = abs_path + '/' + e
-            # Grab all the extension files in the given path
-            ext_files = [f for f in os.listdir(extpath) if f.endswith('.py')
-                         and not f.startswith('__init__')]
-
-            # For each module, pick out the target translation class
-            for f in ext_files:
-                log.info(f)
-                ext_name = 'toscaparser/extensions/' + e + '/' + f.strip('.py')
-                ext_name = ext_name.replace('/', '.')
-                try:
-                    extinfo = importlib.import_module(ext_name)
-                    version = getattr(extinfo, 'VERSION')
-                    defs_file = extpath + '/' + getattr(extinfo, 'DEFS_FILE')
-
-                    # Sections is an optional attribute
-                    sections = getattr(extinfo, 'SECTIONS', ())
-
-                    extensions[version] = {'sections': sections,
-                                           'defs_file': defs_file}
-                except ImportError:
-                    raise ToscaExtImportError(ext_name=ext_name)
-                except AttributeError:
-                    attrs = ', '.join(REQUIRED_ATTRIBUTES)
-                    raise ToscaExtAttributeError(ext_name=ext_name,
-                                                 attrs=attrs)
-
-        return extensions
+    @property
+    def EXTENSION_INFO(self):
+        return get_extensions()
 
     def get_versions(self):
         return sorted(self.EXTENSION_INFO.keys())
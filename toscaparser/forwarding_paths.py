@@ -0,0 +1,110 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Analysis of the forwarding paths of NFV templates.
+
+A forwarding path (tosca.nodes.nfv.FP) lists its hops as forwarder
+requirements, from the connection point (tosca.nodes.nfv.CP) named by the
+capability to the one named by the relationship. The hops of a path are
+kept as adjacency lists, so that finding its loops and the hops between
+connection points of different virtual links is linear in the number of
+hops.
+'''
+
+from collections import deque
+
+from toscaparser.utils import graphutils
+
+FP = 'tosca.nodes.nfv.FP'
+
+FORWARDER = 'forwarder'
+
+
+class ForwardingPath(object):
+    '''Hops of a forwarding path between connection points.'''
+
+    def __init__(self, name, hops):
+        self.name = name
+        self.hops = hops
+        self.cps = []
+        self._targets = {}
+        for from_cp, to_cp in hops:
+            for cp in (from_cp, to_cp):
+                if cp not in self._targets:
+                    self._targets[cp] = []
+                    self.cps.append(cp)
+            if to_cp not in self._targets[from_cp]:
+                self._targets[from_cp].append(to_cp)
+
+    @classmethod
+    def from_template(cls, node):
+        hops = []
+        for req in node.requirements:
+            forwarder = req.get(FORWARDER) if isinstance(req, dict) else None
+            if isinstance(forwarder, dict):
+                hops.append((forwarder.get('capability'),
+                             forwarder.get('relationship')))
+        return cls(node.name, hops)
+
+    def loops(self):
+        '''Return the groups of connection points the path loops through.
+
+        Every loop lists its connection points in the order of the path.
+        '''
+        position = dict((cp, i) for i, cp in enumerate(self.cps))
+        return [sorted(loop, key=position.get)
+                for loop in graphutils.cycles(self.cps, self._targets)]
+
+    def loop_length(self, loop):
+        '''Return the number of hops of the shortest cycle of a loop.
+
+        The loop is one of the groups returned by loops(), whose
+        connection points may lie on several cycles. The shortest one is
+        found by a breadth-first search from every connection point,
+        unless the group is a single cycle.
+        '''
+        members = set(loop)
+        hops = sum(1 for cp in loop for to_cp in self._targets[cp]
+                   if to_cp in members)
+        if hops == len(loop):
+            return len(loop)
+        shortest = len(loop)
+        for start in loop:
+            depth = {start: 0}
+            queue = deque([start])
+            while queue:
+                cp = queue.popleft()
+                if depth[cp] + 1 >= shortest:
+                    break
+                if start in self._targets[cp]:
+                    shortest = depth[cp] + 1
+                    break
+                for to_cp in self._targets[cp]:
+                    if to_cp in members and to_cp not in depth:
+                        depth[to_cp] = depth[cp] + 1
+                        queue.append(to_cp)
+        return shortest
+
+    def broken_hops(self, connectivity):
+        '''Return the hops between CPs not on the same virtual link.
+
+        The connectivity is the CPConnectivity of the template.
+        '''
+        return [(from_cp, to_cp) for from_cp, to_cp in self.hops
+                if from_cp == to_cp or
+                not connectivity.connected(from_cp, to_cp)]
+
+
+def forwarding_paths(nodetemplates):
+    '''Return the forwarding paths of the node templates.'''
+    return [ForwardingPath.from_template(node) for node in nodetemplates
+            if node.type == FP]
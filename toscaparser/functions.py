@@ -89,8 +89,7 @@ class GetInput(Function):
                 ValueError(_(
                     'Expected one argument for function "get_input" but '
                     'received "%s".') % self.args))
-        inputs = [input.name for input in self.tosca_tpl.inputs]
-        if self.args[0] not in inputs:
+        if _find_by_name(self.tosca_tpl, 'inputs', self.args[0]) is None:
             ExceptionCollector.appendException(
                 UnknownInputError(input_name=self.args[0]))
 
@@ -101,8 +100,7 @@ class GetInput(Function):
                 self.tosca_tpl.tpl['inputs'][self.input_name]['type'],
                 self.tosca_tpl.parsed_params[self.input_name])
 
-        input = [input_def for input_def in self.tosca_tpl.inputs
-                 if self.input_name == input_def.name][0]
+        input = _find_by_name(self.tosca_tpl, 'inputs', self.input_name)
         return input.default
 
     @property
@@ -283,9 +281,9 @@ class GetAttribute(Function):
             if node_template_name == SELF and \
             not isinstance(self.context, list) \
             else node_template_name
-        for node_template in self.tosca_tpl.nodetemplates:
-            if node_template.name == name:
-                return node_template
+        node_template = _find_by_name(self.tosca_tpl, 'nodetemplates', name)
+        if node_template is not None:
+            return node_template
         ExceptionCollector.appendException(
             KeyError(_(
                 'Node template "{0}" was not found.'
@@ -511,9 +509,10 @@ class GetProperty(Function):
             return self.context.source
         if not hasattr(self.tosca_tpl, 'nodetemplates'):
             return
-        for node_template in self.tosca_tpl.nodetemplates:
-            if node_template.name == node_template_name:
-                return node_template
+        node_template = _find_by_name(self.tosca_tpl, 'nodetemplates',
+                                      node_template_name)
+        if node_template is not None:
+            return node_template
         ExceptionCollector.appendException(
             KeyError(_(
                 'Node template "{0}" was not found.'
@@ -718,9 +717,9 @@ class GetOperationOutput(Function):
             if node_template_name == SELF and \
             not isinstance(self.context, list) \
             else node_template_name
-        for node_template in self.tosca_tpl.nodetemplates:
-            if node_template.name == name:
-                return node_template
+        node_template = _find_by_name(self.tosca_tpl, 'nodetemplates', name)
+        if node_template is not None:
+            return node_template
         ExceptionCollector.appendException(
             KeyError(_(
                 'Node template "{0}" was not found.'
@@ -814,6 +813,23 @@ function_mappings = {
 }
 
 
+def _find_by_name(tosca_tpl, attr, name):
+    """Return the input or node template of tosca_tpl with the given name.
+
+    A TopologyTemplate looks the name up in its index, other templates are
+    searched linearly.
+    """
+    find = getattr(tosca_tpl, _FINDERS[attr], None)
+    if find is not None:
+        return find(name)
+    for entity in getattr(tosca_tpl, attr):
+        if entity.name == name:
+            return entity
+
+
+_FINDERS = {'inputs': 'get_input', 'nodetemplates': 'get_node_template'}
+
+
 def is_function(function):
     """Returns True if the provided function is a Tosca intrinsic function.
 
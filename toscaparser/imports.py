@@ -13,6 +13,8 @@
 import logging
 import os
 
+import six
+
 from toscaparser.common.exception import ExceptionCollector
 from toscaparser.common.exception import InvalidPropertyValueError
 from toscaparser.common.exception import MissingRequiredFieldError
@@ -21,12 +23,36 @@ from toscaparser.common.exception import ValidationError
 from toscaparser.elements.tosca_type_validation import TypeValidation
 from toscaparser.utils.gettextutils import _
 import toscaparser.utils.urlutils
+from toscaparser.utils import zipfs
 import toscaparser.utils.yamlparser
 
 YAML_LOADER = toscaparser.utils.yamlparser.load_yaml
 log = logging.getLogger("tosca")
 
 
+class CustomDefinitions(dict):
+    '''Read-only map of the custom type definitions of a template.
+
+    It is built once from the imports of the template and shared by all
+    the entities of a parse. The resolved type hierarchies are cached per
+    map, so it cannot be changed after it has been built. It also carries
+    the type registry of the version of the template.
+    '''
+
+    def __init__(self, defs=(), type_registry=None):
+        super(CustomDefinitions, self).__init__(defs)
+        self.type_registry = type_registry
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_('Custom type definitions are read-only.'))
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self), self.type_registry))
+
+
 class ImportsLoader(object):
 
     IMPORTS_SECTION = (FILE, REPOSITORY, NAMESPACE_URI, NAMESPACE_PREFIX) = \
@@ -37,7 +63,12 @@ class ImportsLoader(object):
                  tpl=None):
         self.importslist = importslist
         self.custom_defs = {}
+        self.section_defs = {}
         self.nested_tosca_tpls = []
+        self.load_count = 0
+        # path and a_file of every template loaded
+        self.sources = []
+        self.fetched = {}
         if not path and not tpl:
             msg = _('Input tosca template is not provided.')
             log.warning(msg)
@@ -54,8 +85,15 @@ class ImportsLoader(object):
                 self.type_definition_list.append(type_definition_list)
         self._validate_and_load_imports()
 
-    def get_custom_defs(self):
-        return self.custom_defs
+    def get_custom_defs(self, type_definitions=None):
+        if type_definitions is None:
+            return self.custom_defs
+        if not isinstance(type_definitions, list):
+            type_definitions = [type_definitions]
+        custom_defs = {}
+        for type_def in type_definitions:
+            custom_defs.update(self.section_defs.get(type_def, {}))
+        return custom_defs
 
     def get_nested_tosca_tpls(self):
         return self.nested_tosca_tpls
@@ -70,6 +108,11 @@ class ImportsLoader(object):
             ExceptionCollector.appendException(ValidationError(message=msg))
             return
 
+        # Fetch the imports served over the network at the same time, they
+        # are then validated and merged one by one in their original order
+        self.fetched = toscaparser.utils.yamlparser.fetch_yaml_urls(
+            self._get_import_urls())
+
         for import_def in self.importslist:
             if isinstance(import_def, dict):
                 for import_name, import_uri in import_def.items():
@@ -118,15 +161,68 @@ class ImportsLoader(object):
                                                        "." + type_def_key)
                             prefix_custom_types[namespace_prefix_to_key] = \
                                 outer_custom_types[type_def_key]
-                        self.custom_defs.update(prefix_custom_types)
-                    else:
-                        self.custom_defs.update(outer_custom_types)
+                        outer_custom_types = prefix_custom_types
+                    self.custom_defs.update(outer_custom_types)
+                    self.section_defs.setdefault(type_def, {}).update(
+                        outer_custom_types)
 
     def _update_nested_tosca_tpls(self, full_file_name, custom_tpl):
         if full_file_name and custom_tpl:
             topo_tpl = {full_file_name: custom_tpl}
             self.nested_tosca_tpls.append(topo_tpl)
 
+    def _get_import_urls(self):
+        """Return the URLs of the imports that are fetched over the network.
+
+        This only looks up the URL of the valid imports, the errors are
+        reported when the imports are loaded.
+        """
+        urls = []
+        for import_def in self.importslist:
+            if isinstance(import_def, dict):
+                import_uri_defs = import_def.values()
+            else:
+                import_uri_defs = [import_def]
+            for import_uri_def in import_uri_defs:
+                url = self._get_import_url(import_uri_def)
+                if url:
+                    urls.append(url)
+        return urls
+
+    def _get_import_url(self, import_uri_def):
+        repository = None
+        if isinstance(import_uri_def, dict):
+            file_name = import_uri_def.get(self.FILE)
+            repository = import_uri_def.get(self.REPOSITORY)
+        else:
+            file_name = import_uri_def
+        if not isinstance(file_name, six.string_types):
+            return
+        url_utils = toscaparser.utils.urlutils.UrlUtils
+        if url_utils.validate_url(file_name):
+            url = file_name
+        elif not repository:
+            if not self.path or not url_utils.validate_url(self.path) or \
+                    os.path.isabs(file_name):
+                return
+            url = url_utils.join_url(self.path, file_name)
+        else:
+            repo_def = self.repositories.get(repository)
+            if not isinstance(repo_def, dict) or \
+                    not isinstance(repo_def.get('url'), six.string_types):
+                return
+            url = repo_def['url'].strip().rstrip("//") + "/" + file_name
+        if url_utils.validate_url(url):
+            return url
+
+    def _load_template(self, path, a_file):
+        self.load_count += 1
+        self.sources.append((path, a_file))
+        if not a_file and path in self.fetched:
+            return toscaparser.utils.yamlparser.load_fetched_yaml(
+                path, self.fetched.pop(path))
+        return YAML_LOADER(path, a_file)
+
     def _validate_import_keys(self, import_name, import_uri_def):
         if self.FILE not in import_uri_def.keys():
             log.warning(_('Missing keyname "file" in import "%(name)s".')
@@ -190,7 +286,7 @@ class ImportsLoader(object):
             return None, None
 
         if toscaparser.utils.urlutils.UrlUtils.validate_url(file_name):
-            return file_name, YAML_LOADER(file_name, False)
+            return file_name, self._load_template(file_name, False)
         elif not repository:
             import_template = None
             if self.path:
@@ -208,16 +304,16 @@ class ImportsLoader(object):
                     a_file = False
                 else:
                     a_file = True
-                    main_a_file = os.path.isfile(self.path)
+                    main_a_file = zipfs.isfile(self.path)
 
                     if main_a_file:
-                        if os.path.isfile(file_name):
+                        if zipfs.isfile(file_name):
                             import_template = file_name
                         else:
                             full_path = os.path.join(
                                 os.path.dirname(os.path.abspath(self.path)),
                                 file_name)
-                            if os.path.isfile(full_path):
+                            if zipfs.isfile(full_path):
                                 import_template = full_path
                             else:
                                 file_path = file_name.rpartition("/")
@@ -227,7 +323,7 @@ class ImportsLoader(object):
                                         file_path[0]):
                                         import_template = dir_path + "/" +\
                                             file_path[2]
-                                        if not os.path.isfile(import_template):
+                                        if not zipfs.isfile(import_template):
                                             msg = (_('"%(import_template)s" is'
                                                      'not a valid file')
                                                    % {'import_template':
@@ -236,7 +332,7 @@ class ImportsLoader(object):
                                             ExceptionCollector.appendException
                                             (ValueError(msg))
             else:  # template is pre-parsed
-                if os.path.isabs(file_name) and os.path.isfile(file_name):
+                if os.path.isabs(file_name) and zipfs.isfile(file_name):
                     a_file = True
                     import_template = file_name
                 else:
@@ -254,7 +350,8 @@ class ImportsLoader(object):
                     ImportError(_('Import "%s" is not valid.') %
                                 import_uri_def))
                 return None, None
-            return import_template, YAML_LOADER(import_template, a_file)
+            return import_template, self._load_template(
+                import_template, a_file)
 
         if short_import_notation:
             log.error(_('Import "%(name)s" is not valid.') % import_uri_def)
@@ -281,7 +378,7 @@ class ImportsLoader(object):
                 return None, None
 
         if toscaparser.utils.urlutils.UrlUtils.validate_url(full_url):
-            return full_url, YAML_LOADER(full_url, False)
+            return full_url, self._load_template(full_url, False)
         else:
             msg = (_('repository url "%(n_uri)s" is not valid in import '
                      'definition "%(tpl)s".')
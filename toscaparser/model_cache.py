@@ -0,0 +1,252 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Snapshots of validated templates.
+
+Loading a pickle of a validated ToscaTemplate is an order of magnitude
+faster than parsing and validating its template again. ModelCache.load()
+stores a snapshot of every template it validates, keyed by the SHA-256 of
+the input file, its directory and the parsed_params, and returns the
+snapshot when the same input is loaded again. A snapshot also records the
+SHA-256 of every local file the template imports, directly or through
+other imports, and is only used while all of them are unchanged. The
+members of a CSAR are covered by the SHA-256 of the archive. Templates
+read from URLs or importing URLs are validated every time.
+
+Snapshots are pickles: they are kept in a per-user cache directory and
+only loaded while the directory and the snapshot are owned by the current
+user and not writable by others.
+'''
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import zlib
+
+from six.moves import cPickle as pickle
+
+import toscaparser
+from toscaparser.prereq.extraction_cache import archive_sha256
+from toscaparser.tosca_template import ToscaTemplate
+from toscaparser.utils import userdirs
+
+log = logging.getLogger('tosca')
+
+FORMAT_VERSION = 5
+
+CACHE_DIR = userdirs.cache_dir('models')
+
+MAX_ENTRIES = 256
+
+SUFFIX = '.snapshot'
+
+_cache = None
+_lock = threading.Lock()
+
+
+def _params_repr(parsed_params):
+    return json.dumps(parsed_params or {}, sort_keys=True, default=repr)
+
+
+class ModelCache(object):
+    '''Bounded cache of validated templates.'''
+
+    def __init__(self, cache_dir=None, max_entries=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.max_entries = MAX_ENTRIES if max_entries is None \
+            else max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, path, parsed_params=None, sha256=None):
+        '''Return the key of the snapshot of a template file.'''
+        key = hashlib.sha256()
+        for part in (FORMAT_VERSION, sys.version_info[0],
+                     toscaparser.__version__,
+                     sha256 or archive_sha256(path),
+                     os.path.dirname(os.path.abspath(path)),
+                     _params_repr(parsed_params)):
+            key.update(('%s\0' % part).encode('utf-8'))
+        return key.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + SUFFIX)
+
+    def load(self, path, parsed_params=None):
+        '''Return the ToscaTemplate of a template file or CSAR.
+
+        The template is validated unless a snapshot of it is still valid,
+        and a ValidationError is raised as by ToscaTemplate.
+        '''
+        try:
+            sha256 = archive_sha256(path)
+        except (IOError, OSError):
+            # reported by ToscaTemplate
+            return ToscaTemplate(path, parsed_params)
+        snapshot_file = self.path(self.key(path, parsed_params, sha256))
+        tpl = self._read(snapshot_file, path)
+        if tpl is not None:
+            self.hits += 1
+            return tpl
+        self.misses += 1
+        tpl = ToscaTemplate(path, parsed_params)
+        deps = self._dependencies(tpl, sha256)
+        if deps is None:
+            log.info('Not caching "%s", which imports URLs.' % path)
+        else:
+            try:
+                self._write(snapshot_file, tpl, deps)
+            except (IOError, OSError) as e:
+                log.warning('Could not write the snapshot of "%s": %s'
+                            % (path, e))
+        return tpl
+
+    def _dependencies(self, tpl, sha256):
+        # the input file and the local files it imports outside of a CSAR
+        input_path = os.path.abspath(tpl.input_path)
+        deps = [(input_path, sha256)]
+        seen = set([input_path])
+        for path, a_file in tpl.import_sources:
+            if not a_file:
+                return None
+            path = os.path.abspath(path)
+            if path in seen or path.startswith(input_path + os.sep):
+                continue
+            seen.add(path)
+            deps.append((path, archive_sha256(path)))
+        return deps
+
+    def _read(self, snapshot_file, path):
+        try:
+            userdirs.check_private(self.cache_dir)
+            with open(snapshot_file, 'rb') as f:
+                userdirs.check_private(snapshot_file, os.fstat(f.fileno()))
+                snapshot = pickle.load(f)
+        except (IOError, OSError) as e:
+            if e.errno == errno.EPERM:
+                log.warning('Ignoring snapshot "%s": %s'
+                            % (snapshot_file, e.strerror))
+            return None
+        except Exception as e:
+            log.warning('Ignoring unreadable snapshot "%s": %s'
+                        % (snapshot_file, e))
+            return None
+        if not isinstance(snapshot, dict) or \
+                snapshot.get('format') != FORMAT_VERSION:
+            return None
+        for dep, sha256 in snapshot['deps'][1:]:
+            try:
+                if archive_sha256(dep) == sha256:
+                    continue
+            except (IOError, OSError):
+                pass
+            log.info('Snapshot of "%s" is stale: "%s" changed.'
+                     % (path, dep))
+            return None
+        tpl = pickle.loads(zlib.decompress(snapshot['template']))
+        self._touch(snapshot_file)
+        self._relocate(tpl, path)
+        return tpl
+
+    def _relocate(self, tpl, path):
+        # the same content may be loaded from another file name
+        if tpl.input_path == path:
+            return
+        if tpl.template_path == tpl.input_path:
+            tpl.template_path = path
+        else:
+            old_root = os.path.abspath(tpl.input_path)
+            if tpl.template_path.startswith(old_root + os.sep):
+                tpl.template_path = (os.path.abspath(path) +
+                                     tpl.template_path[len(old_root):])
+        tpl.input_path = path
+        if tpl.csar is not None:
+            tpl.csar.path = tpl.csar.csar = path
+
+    def _write(self, snapshot_file, tpl, deps):
+        userdirs.private_dir(self.cache_dir)
+        snapshot = {
+            'format': FORMAT_VERSION,
+            'deps': deps,
+            'template': zlib.compress(
+                pickle.dumps(tpl, pickle.HIGHEST_PROTOCOL))}
+        # write to a temporary file first so that a reader never sees a
+        # partially written snapshot
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, snapshot_file)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        self.evict(keep=snapshot_file)
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def entries(self):
+        '''Return the paths of the snapshots, least recently used first.'''
+        entries = []
+        for name in self._listdir():
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+        return [path for _, path in sorted(entries)]
+
+    def _listdir(self):
+        try:
+            return [name for name in os.listdir(self.cache_dir)
+                    if name.endswith(SUFFIX)]
+        except OSError:
+            return []
+
+    def evict(self, keep=None):
+        '''Remove the least recently used snapshots above max_entries.'''
+        entries = self.entries()
+        excess = len(entries) - self.max_entries
+        for path in entries:
+            if excess <= 0:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            excess -= 1
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in self._listdir():
+            self._remove(os.path.join(self.cache_dir, name))
+
+
+def get_cache():
+    '''Return the model cache shared by all the templates.'''
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = ModelCache()
+        return _cache
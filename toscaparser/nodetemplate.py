@@ -36,8 +36,13 @@ log = logging.getLogger('tosca')
 
 class NodeTemplate(EntityTemplate):
     '''Node template from a Tosca profile.'''
+
+    # Number of node templates constructed by this process
+    created = 0
+
     def __init__(self, name, node_templates, custom_def=None,
                  available_rel_tpls=None, available_rel_types=None):
+        NodeTemplate.created += 1
         super(NodeTemplate, self).__init__(name, node_templates[name],
                                            'node_type',
                                            custom_def)
@@ -50,6 +55,7 @@ class NodeTemplate(EntityTemplate):
         self.available_rel_types = available_rel_types
         self._relationships = {}
         self.sub_mapping_tosca_template = None
+        self.topology_template = None
 
     @property
     def relationships(self):
@@ -94,7 +100,7 @@ class NodeTemplate(EntityTemplate):
                              % {'node': node, 'name': self.name}))
                 return
 
-            related_tpl = NodeTemplate(node, self.templates, self.custom_def)
+            related_tpl = self._get_node_template(node)
             relationship = value.get('relationship') \
                 if isinstance(value, dict) else None
             # check if it's type has relationship defined
@@ -181,9 +187,22 @@ class NodeTemplate(EntityTemplate):
             for relation, node in self.type_definition.relationship.items():
                 for tpl in self.templates:
                     if tpl == node.type:
-                        self.related[NodeTemplate(tpl)] = relation
+                        self.related[self._get_node_template(tpl)] = relation
         return self.related.keys()
 
+    def _get_node_template(self, name):
+        """Return the node template of the topology with the given name.
+
+        The node templates of the topology template are shared by all the
+        relationships, a new node template is only created when the node
+        is not part of the topology (yet).
+        """
+        if self.topology_template is not None:
+            node_tpl = self.topology_template.get_node_template(name)
+            if node_tpl is not None:
+                return node_tpl
+        return NodeTemplate(name, self.templates, self.custom_def)
+
     def validate(self, tosca_tpl=None):
         self._validate_capabilities()
         self._validate_requirements()
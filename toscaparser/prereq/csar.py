@@ -11,10 +11,10 @@
 #    under the License.
 
 import os.path
-import requests
-import shutil
 import six
+from six.moves import urllib
 import tempfile
+import uuid
 import yaml
 import zipfile
 
@@ -22,24 +22,31 @@ from toscaparser.common.exception import ExceptionCollector
 from toscaparser.common.exception import URLException
 from toscaparser.common.exception import ValidationError
 from toscaparser.imports import ImportsLoader
+from toscaparser.prereq import extraction_cache
 from toscaparser.utils.gettextutils import _
+from toscaparser.utils import urlfile
 from toscaparser.utils.urlutils import UrlUtils
-
-try:  # Python 2.x
-    from BytesIO import BytesIO
-except ImportError:  # Python 3.x
-    from io import BytesIO
+from toscaparser.utils.yamlparser import report_url_error
+from toscaparser.utils.yamlparser import yaml_loader
+from toscaparser.utils import zipfs
 
 
 class CSAR(object):
 
-    def __init__(self, csar_file, a_file=True):
+    def __init__(self, csar_file, a_file=True, max_memory=None):
         self.path = csar_file
         self.a_file = a_file
+        # bytes of a downloaded CSAR kept in memory, see urlfile
+        self.max_memory = max_memory
+        self.sha256 = None
         self.is_validated = False
         self.error_caught = False
         self.csar = None
         self.temp_dir = None
+        self.zfile = None
+        self.fs = None
+        self._mounts = 0
+        self._decompressed = False
 
     def validate(self):
         """Validate the provided CSAR file."""
@@ -61,8 +68,12 @@ class CSAR(object):
                     ValidationError(message=missing_err_msg))
                 return False
             else:
-                response = requests.get(self.path)
-                self.csar = BytesIO(response.content)
+                try:
+                    self.csar, self.sha256 = urlfile.open_url(
+                        self.path, self.max_memory)
+                except urllib.error.URLError as e:
+                    report_url_error(self.path, e)
+                    return False
 
         # validate that it is a valid zip file
         if not zipfile.is_zipfile(self.csar):
@@ -73,6 +84,7 @@ class CSAR(object):
 
         # validate that it contains the metadata file in the correct location
         self.zfile = zipfile.ZipFile(self.csar, 'r')
+        self.fs = zipfs.ZipFileSystem(self.zfile, self._get_root())
         filelist = self.zfile.namelist()
         if 'TOSCA-Metadata/TOSCA.meta' not in filelist:
             err_msg = (_('"%s" is not a valid CSAR as it does not contain the '
@@ -88,7 +100,7 @@ class CSAR(object):
                                   'the CSAR "%s" does not contain valid YAML '
                                   'content.') % self.path)
         try:
-            meta = yaml.load(data)
+            meta = yaml.load(data, Loader=yaml_loader)
             if type(meta) is dict:
                 self.metadata = meta
             else:
@@ -147,6 +159,7 @@ class CSAR(object):
 
     def get_main_template(self):
         entry_def = self._get_metadata('Entry-Definitions')
+        self._reopen()
         if entry_def in self.zfile.namelist():
             return entry_def
 
@@ -159,7 +172,7 @@ class CSAR(object):
                   'contain valid TOSCA YAML content.') %
                 {'template': main_template, 'csar': self.path})
             try:
-                tosca_yaml = yaml.load(data)
+                tosca_yaml = yaml.load(data, Loader=yaml_loader)
                 if type(tosca_yaml) is not dict:
                     ExceptionCollector.appendException(
                         ValidationError(message=invalid_tosca_yaml_err_msg))
@@ -168,6 +181,22 @@ class CSAR(object):
                 ExceptionCollector.appendException(
                     ValidationError(message=invalid_tosca_yaml_err_msg))
 
+    def get_main_template_path(self):
+        """Return the path of the main template in the mounted CSAR."""
+        main_template = self.get_main_template()
+        if main_template:
+            return self.fs.path(main_template)
+
+    def get_main_template_file(self):
+        """Return the path of the main template in temp_dir.
+
+        The whole CSAR is decompressed the first time, see decompress().
+        """
+        main_template = self._get_metadata('Entry-Definitions')
+        if not self._decompressed:
+            self.decompress()
+        return os.path.join(self.temp_dir, *main_template.split('/'))
+
     def get_description(self):
         desc = self._get_metadata('Description')
         if desc is not None:
@@ -177,23 +206,132 @@ class CSAR(object):
             self.get_main_template_yaml().get('description')
         return self.metadata['Description']
 
+    def get_sha256(self):
+        """Return the SHA-256 of the archive."""
+        if self.sha256 is None:
+            self._open()
+            self.sha256 = extraction_cache.archive_sha256(self.csar)
+        return self.sha256
+
     def decompress(self):
+        """Extract the whole CSAR to a new temp_dir.
+
+        The CSAR is extracted once to the shared extraction cache for all
+        the CSARs with the same content, temp_dir is made of read-only
+        links to it or copies. The caller removes temp_dir when done.
+        """
         if not self.is_validated:
             self.validate()
-        self.temp_dir = tempfile.NamedTemporaryFile().name
-        with zipfile.ZipFile(self.csar, "r") as zf:
-            zf.extractall(self.temp_dir)
+        self._open()
+        self.temp_dir = extraction_cache.get_cache().checkout(
+            self.csar, self.get_sha256())
+        self._decompressed = True
+
+    def extract(self, member):
+        """Extract a single member and return its path on disk.
+
+        member is the path of the member in the archive, such as
+        "Scripts/install.sh". The zip file is opened again when it was
+        closed, see close().
+        """
+        if not self.is_validated:
+            self.validate()
+        if self._decompressed:
+            path = os.path.join(self.temp_dir, *member.split('/'))
+            if not os.path.isfile(path):
+                raise IOError(2, os.strerror(2), path)
+            return path
+        self._reopen()
+        if self.temp_dir is None:
+            self.temp_dir = tempfile.mkdtemp()
+        return self.fs.extract(member, self.temp_dir)
+
+    def _open(self):
+        if self.csar is not None:
+            return
+        if self.a_file or not self.is_validated:
+            raise IOError(_('The CSAR "%s" is closed.') % self.path)
+        # a closed download is downloaded again
+        csar, sha256 = urlfile.open_url(self.path, self.max_memory)
+        if self.sha256 and sha256 and sha256 != self.sha256:
+            csar.close()
+            raise IOError(_('The CSAR "%s" has changed.') % self.path)
+        self.csar = csar
+
+    def _reopen(self):
+        if self.zfile is not None:
+            return
+        self._open()
+        self.zfile = zipfile.ZipFile(self.csar, 'r')
+        self.fs = zipfs.ZipFileSystem(self.zfile, self._get_root())
+
+    def _get_root(self):
+        if self.a_file:
+            return os.path.abspath(self.path)
+        # a directory that does not exist on disk for the members of a
+        # downloaded CSAR
+        return os.path.join(tempfile.gettempdir(),
+                            'csar-' + uuid.uuid4().hex,
+                            os.path.basename(self.path.rstrip('/')))
+
+    def mount(self):
+        """Make the members readable at their path below the CSAR path.
+
+        The templates of the CSAR are parsed from the zip file while it is
+        mounted, nothing is extracted. Every mount() is undone by a call to
+        unmount().
+        """
+        if not self.is_validated:
+            self.validate()
+        if self.fs is None:
+            return
+        if not self._mounts:
+            zipfs.mount(self.fs)
+        self._mounts += 1
+
+    def unmount(self):
+        if self._mounts:
+            self._mounts -= 1
+            if not self._mounts:
+                zipfs.unmount(self.fs)
+
+    def close(self):
+        """Unmount the CSAR and close the zip file.
+
+        A downloaded CSAR is discarded. The members can still be extracted,
+        after downloading it again.
+        """
+        if self._mounts:
+            self._mounts = 1
+            self.unmount()
+        if self.zfile is not None:
+            self.zfile.close()
+            self.zfile = None
+            self.fs = None
+        if self.csar is not None and not self.a_file:
+            self.csar.close()
+            self.csar = None
+
+    def __getstate__(self):
+        # the zip file of a local CSAR is opened again on demand
+        state = self.__dict__.copy()
+        state.update(zfile=None, fs=None, _mounts=0)
+        if not self.a_file:
+            state['csar'] = None
+        if not self._decompressed:
+            state['temp_dir'] = None
+        return state
 
     def _validate_external_references(self):
-        """Extracts files referenced in the main template
+        """Verify the files referenced in the main template
 
         These references are currently supported:
         * imports
         * interface implementations
         * artifacts
         """
+        self.mount()
         try:
-            self.decompress()
             main_tpl_file = self.get_main_template()
             if not main_tpl_file:
                 return
@@ -201,80 +339,82 @@ class CSAR(object):
 
             if 'imports' in main_tpl:
                 ImportsLoader(main_tpl['imports'],
-                              os.path.join(self.temp_dir, main_tpl_file))
-
-            if 'topology_template' in main_tpl:
-                topology_template = main_tpl['topology_template']
-
-                if 'node_templates' in topology_template:
-                    node_templates = topology_template['node_templates']
-
-                    for node_template_key in node_templates:
-                        node_template = node_templates[node_template_key]
-                        if 'artifacts' in node_template:
-                            artifacts = node_template['artifacts']
-                            for artifact_key in artifacts:
-                                artifact = artifacts[artifact_key]
-                                if isinstance(artifact, six.string_types):
-                                    self._validate_external_reference(
-                                        main_tpl_file,
-                                        artifact)
-                                elif isinstance(artifact, dict):
-                                    if 'file' in artifact:
-                                        self._validate_external_reference(
-                                            main_tpl_file,
-                                            artifact['file'])
-                                else:
-                                    ExceptionCollector.appendException(
-                                        ValueError(_('Unexpected artifact '
-                                                     'definition for "%s".')
-                                                   % artifact_key))
-                                    self.error_caught = True
-                        if 'interfaces' in node_template:
-                            interfaces = node_template['interfaces']
-                            for interface_key in interfaces:
-                                interface = interfaces[interface_key]
-                                for opertation_key in interface:
-                                    operation = interface[opertation_key]
-                                    if isinstance(operation, six.string_types):
-                                        self._validate_external_reference(
-                                            main_tpl_file,
-                                            operation,
-                                            False)
-                                    elif isinstance(operation, dict):
-                                        if 'implementation' in operation:
-                                            self._validate_external_reference(
-                                                main_tpl_file,
-                                                operation['implementation'])
+                              self.fs.path(main_tpl_file))
+
+            references = self._get_external_references(main_tpl)
+            # the URLs are checked at the same time, the references are then
+            # verified in their order in the template
+            accessible = UrlUtils.urls_accessible(
+                [ref[0] for ref in references
+                 if isinstance(ref, tuple) and UrlUtils.validate_url(ref[0])])
+            verified = set()
+            for ref in references:
+                if not isinstance(ref, tuple):
+                    ExceptionCollector.appendException(ref)
+                    self.error_caught = True
+                elif ref not in verified:
+                    verified.add(ref)
+                    self._validate_external_reference(
+                        main_tpl_file, ref[0], ref[1], accessible)
         finally:
-            if self.temp_dir:
-                shutil.rmtree(self.temp_dir)
+            self.unmount()
+
+    def _get_external_references(self, main_tpl):
+        """Return the external references of the main template.
+
+        Every reference is a (resource_file, raise_exc) tuple, the invalid
+        artifact definitions are listed as the error to report.
+        """
+        references = []
+        topology_template = main_tpl.get('topology_template') or {}
+        node_templates = topology_template.get('node_templates') or {}
+        for node_template in node_templates.values():
+            if not isinstance(node_template, dict):
+                continue
+            artifacts = node_template.get('artifacts') or {}
+            for artifact_key, artifact in artifacts.items():
+                if isinstance(artifact, six.string_types):
+                    references.append((artifact, True))
+                elif isinstance(artifact, dict):
+                    if 'file' in artifact:
+                        references.append((artifact['file'], True))
+                else:
+                    references.append(
+                        ValueError(_('Unexpected artifact definition for '
+                                     '"%s".') % artifact_key))
+            interfaces = node_template.get('interfaces') or {}
+            for interface in interfaces.values():
+                if not isinstance(interface, dict):
+                    continue
+                for operation in interface.values():
+                    if isinstance(operation, six.string_types):
+                        references.append((operation, False))
+                    elif isinstance(operation, dict):
+                        if 'implementation' in operation:
+                            references.append(
+                                (operation['implementation'], True))
+        return references
 
     def _validate_external_reference(self, tpl_file, resource_file,
-                                     raise_exc=True):
+                                     raise_exc=True, accessible=None):
         """Verify that the external resource exists
 
         If resource_file is a URL verify that the URL is valid.
-        If resource_file is a relative path verify that the path is valid
-        considering base folder (self.temp_dir) and tpl_file.
+        If resource_file is a relative path verify that the archive has a
+        member at that path relative to tpl_file.
         Note that in a CSAR resource_file cannot be an absolute path.
         """
         if UrlUtils.validate_url(resource_file):
             msg = (_('The resource at "%s" cannot be accessed.') %
                    resource_file)
-            try:
-                if UrlUtils.url_accessible(resource_file):
-                    return
-                else:
-                    ExceptionCollector.appendException(
-                        URLException(what=msg))
-                    self.error_caught = True
-            except Exception:
-                ExceptionCollector.appendException(
-                    URLException(what=msg))
-                self.error_caught = True
+            if accessible is None:
+                accessible = UrlUtils.urls_accessible([resource_file])
+            if accessible.get(resource_file):
+                return
+            ExceptionCollector.appendException(URLException(what=msg))
+            self.error_caught = True
 
-        if os.path.isfile(os.path.join(self.temp_dir,
+        if self.fs.isfile(os.path.join(self.fs.root,
                                        os.path.dirname(tpl_file),
                                        resource_file)):
             return
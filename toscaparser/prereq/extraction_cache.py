@@ -0,0 +1,319 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Cache of the extracted content of CSARs.
+
+Every CSAR is extracted once to a directory named after the SHA-256 of the
+archive, so the same package is only extracted again once it has been
+evicted. An archive is extracted to a temporary directory that is renamed
+to its final name when complete: readers never see a partial extraction
+and processes extracting the same archive at the same time keep the
+first complete copy. The size of every directory is recorded next to it
+when it is extracted. The least recently used directories are removed once
+the cache holds more than max_bytes, as well as the temporary directories
+left behind by interrupted extractions. A directory used in the last
+GRACE_SECONDS is not removed, so that the processes which just found it
+can finish copying it.
+
+The extracted directories are shared and their files are read-only: they
+are only read by the cache, and handed out as copies with checkout(). They
+are trusted as the content of their archives, so the cache is kept in a
+per-user directory and is only used while it and its entries are owned by
+the current user and not writable by others.
+'''
+
+import errno
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+
+from toscaparser.utils import userdirs
+
+log = logging.getLogger('tosca')
+
+CACHE_DIR = userdirs.cache_dir('csars')
+
+MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Seconds after which a temporary directory is considered abandoned
+STALE_SECONDS = 3600
+
+# Seconds after its last use during which an archive is not evicted
+GRACE_SECONDS = 60
+
+TMP_PREFIX = '.tmp-'
+TRASH_PREFIX = '.trash-'
+SIZE_SUFFIX = '.size'
+
+_cache = None
+_lock = threading.Lock()
+
+
+def archive_sha256(archive):
+    '''Return the SHA-256 of an archive given by path or file object.'''
+    sha256 = hashlib.sha256()
+    if hasattr(archive, 'read'):
+        archive.seek(0)
+        f = archive
+    else:
+        f = open(archive, 'rb')
+    try:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    finally:
+        if f is archive:
+            archive.seek(0)
+        else:
+            f.close()
+    return sha256.hexdigest()
+
+
+def _dir_size(path):
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def _delete(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _raise(error):
+    raise error
+
+
+def _read_only(path):
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in filenames:
+            file_path = os.path.join(dirpath, name)
+            mode = stat.S_IMODE(os.lstat(file_path).st_mode)
+            os.chmod(file_path, mode & ~(stat.S_IWUSR | stat.S_IWGRP |
+                                         stat.S_IWOTH))
+
+
+def _link_tree(source, target):
+    # the files are copied when they cannot be linked, e.g. to another
+    # file system
+    for dirpath, dirnames, filenames in os.walk(source, onerror=_raise):
+        dest_dir = os.path.join(target, os.path.relpath(dirpath, source))
+        if not os.path.isdir(dest_dir):
+            os.makedirs(dest_dir)
+        for name in filenames:
+            src = os.path.join(dirpath, name)
+            dest = os.path.join(dest_dir, name)
+            try:
+                os.link(src, dest)
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    raise
+                shutil.copyfile(src, dest)
+
+
+class ExtractionCache(object):
+    '''Size-bounded LRU cache of extracted CSARs.'''
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, sha256):
+        return os.path.join(self.cache_dir, sha256)
+
+    def extract(self, archive, sha256=None):
+        '''Return the directory the archive is extracted to.
+
+        The archive is a path or a file object, sha256 its SHA-256 when
+        it is already known. An OSError is raised when the cache directory
+        or the directory of the archive is not private to the current
+        user.
+        '''
+        sha256 = sha256 or archive_sha256(archive)
+        target = self.path(sha256)
+        userdirs.private_dir(self.cache_dir)
+        if os.path.isdir(target):
+            userdirs.check_private(target)
+            self.hits += 1
+            self._touch(target)
+            return target
+        self.misses += 1
+        tmp_dir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=self.cache_dir)
+        try:
+            with zipfile.ZipFile(archive, 'r') as zf:
+                zf.extractall(tmp_dir)
+                size = sum(info.file_size for info in zf.infolist())
+            _read_only(tmp_dir)
+            self._write_size(sha256, size)
+            try:
+                os.rename(tmp_dir, target)
+            except OSError:
+                # another process completed the same extraction first
+                if not os.path.isdir(target):
+                    raise
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict(keep=target)
+        return target
+
+    def checkout(self, archive, sha256=None):
+        '''Return a new directory with the content of the archive.
+
+        The directory belongs to the caller, who removes it when done. Its
+        files are read-only hard links to the cache when it is on the same
+        file system and copies otherwise: they are replaced, never written
+        to.
+        '''
+        sha256 = sha256 or archive_sha256(archive)
+        for attempt in range(2):
+            source = self.extract(archive, sha256)
+            target = tempfile.mkdtemp()
+            try:
+                _link_tree(source, target)
+                return target
+            except OSError as e:
+                shutil.rmtree(target, ignore_errors=True)
+                # extracted again when it was evicted in the meantime
+                if e.errno != errno.ENOENT or attempt:
+                    raise
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def entries(self):
+        '''Return the (sha256, size, last use) of every cached archive.'''
+        entries = []
+        for name in self._listdir():
+            path = self.path(name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            size = self._read_size(name)
+            if size is None:
+                # extracted by an older version
+                size = _dir_size(path)
+                try:
+                    self._write_size(name, size)
+                except OSError:
+                    pass
+            entries.append((name, size, mtime))
+        return entries
+
+    def _read_size(self, sha256):
+        try:
+            with open(self.path(sha256) + SIZE_SUFFIX) as f:
+                return int(f.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write_size(self, sha256, size):
+        fd, tmp_path = tempfile.mkstemp(prefix=TMP_PREFIX, dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(str(size))
+            os.rename(tmp_path, self.path(sha256) + SIZE_SUFFIX)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+
+    def _listdir(self):
+        try:
+            return os.listdir(self.cache_dir)
+        except OSError:
+            return []
+
+    def remove(self, sha256):
+        self._remove(self.path(sha256))
+
+    def _remove(self, path):
+        # rename first so that the directory disappears at once
+        trash = os.path.join(self.cache_dir,
+                             TRASH_PREFIX + uuid.uuid4().hex)
+        try:
+            os.rename(path, trash)
+        except OSError:
+            return
+        try:
+            os.remove(path + SIZE_SUFFIX)
+        except OSError:
+            pass
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def evict(self, keep=None):
+        '''Remove the least recently used archives above max_bytes.'''
+        now = time.time()
+        for name in self._listdir():
+            if name.startswith((TMP_PREFIX, TRASH_PREFIX)):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stale = now - os.stat(path).st_mtime > STALE_SECONDS
+                except OSError:
+                    continue
+                if stale:
+                    _delete(path)
+            elif name.endswith(SIZE_SUFFIX) and not os.path.isdir(
+                    self.path(name[:-len(SIZE_SUFFIX)])):
+                _delete(os.path.join(self.cache_dir, name))
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        for sha256, entry_size, last_use in entries:
+            if size <= self.max_bytes or now - last_use < GRACE_SECONDS:
+                # the following entries were used more recently
+                break
+            if self.path(sha256) == keep:
+                continue
+            log.info('Evicting extracted CSAR "%s".' % sha256)
+            self._remove(self.path(sha256))
+            size -= entry_size
+
+    def clear(self):
+        for name in self._listdir():
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or name.endswith(SIZE_SUFFIX):
+                _delete(path)
+            else:
+                self._remove(path)
+
+
+def get_cache():
+    '''Return the extraction cache shared by all the CSARs.'''
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
@@ -0,0 +1,451 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Validation server keeping the parser warm between templates.
+
+A ValidationServer listens on a Unix socket or a local TCP port and
+validates the templates of its clients in the same process, so that the
+interpreter, the type registries and the cache of the parsed imports are
+only loaded once. A request is a JSON object POSTed to /validate holding
+one of:
+
+- path: the path or URL of a template or CSAR, as seen by the server
+- template: the YAML text of a template
+- csar: the base64 encoded bytes of a CSAR archive
+
+and optionally the parsed_params of the template. The response is the
+result of batch.validate(). GET /status returns the statistics of the
+caches of the server.
+
+Anyone able to connect to the server can have it read the files of the
+user running it: the Unix socket is only accessible to this user and TCP
+addresses default to the loopback interface. The default socket is in a
+directory private to the user, and the server and its clients only use
+the Unix sockets owned by the user. Web pages can reach TCP servers too,
+so requests over TCP must carry the token of the user, read from a file
+private to the user, and a local Host header. The requests must be
+application/json, which browsers do not send without asking the server
+first.
+'''
+
+import base64
+import binascii
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+import tempfile
+import threading
+
+from six.moves import BaseHTTPServer
+from six.moves import http_client
+from six.moves import socketserver
+
+from toscaparser import batch
+from toscaparser.elements import type_registry
+from toscaparser.extensions import exttools
+from toscaparser.tosca_template import ToscaTemplate
+from toscaparser.utils.gettextutils import _
+from toscaparser.utils import userdirs
+from toscaparser.utils import yamlparser
+
+log = logging.getLogger('tosca')
+
+DEFAULT_HOST = '127.0.0.1'
+
+# Largest request accepted, in bytes
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+# Seconds a client waits for the result of a validation
+CLIENT_TIMEOUT = 300
+
+# Header of the token of the requests over TCP
+TOKEN_HEADER = 'X-Tosca-Parser-Token'
+
+# Host headers accepted over TCP, besides the address of the server
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+def default_address():
+    '''Return the Unix socket of the server of the current user.'''
+    return os.path.join(userdirs.runtime_dir(), 'server.sock')
+
+
+def _check_socket(path):
+    # a socket of another user, which may impersonate the server
+    try:
+        userdirs.check_private(path)
+    except OSError as e:
+        raise socket.error(e.errno, e.strerror)
+
+
+def token_file():
+    '''Return the file of the token of the TCP servers of the user.'''
+    return os.path.join(userdirs.runtime_dir(), 'token')
+
+
+def get_token(create=False):
+    '''Return the token of the TCP servers of the current user.
+
+    The token is created when needed if create. An IOError or OSError is
+    raised when it does not exist or is not private to the user.
+    '''
+    path = token_file()
+    if create and not os.path.exists(path):
+        userdirs.private_dir(os.path.dirname(path))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(binascii.hexlify(os.urandom(32)).decode('ascii'))
+            # keep the token of a server started at the same time
+            os.link(tmp_path, path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        finally:
+            os.remove(tmp_path)
+    with open(path) as f:
+        userdirs.check_private(path, os.fstat(f.fileno()))
+        return f.read().strip()
+
+
+def parse_address(address):
+    '''Return the socket family and address of a server.
+
+    An address is "host:port", a port on the loopback interface or the
+    path of a Unix socket.
+    '''
+    address = str(address)
+    host, _sep, port = address.rpartition(':')
+    if port.isdigit() and os.sep not in address:
+        return socket.AF_INET, (host or DEFAULT_HOST, int(port))
+    return socket.AF_UNIX, address
+
+
+def validate_request(request, model_cache=None):
+    '''Validate the template of a request and return the result.
+
+    The templates read from a path are loaded through model_cache when
+    given. A ValueError is raised for a malformed request.
+    '''
+    if not isinstance(request, dict):
+        raise ValueError(_('The request is not a JSON object.'))
+    parsed_params = request.get('parsed_params')
+    if parsed_params is not None and not isinstance(parsed_params, dict):
+        raise ValueError(_('"parsed_params" is not a JSON object.'))
+    if request.get('path'):
+        path = request['path']
+        if model_cache is not None and os.path.isfile(path):
+            return batch.validate(
+                lambda: model_cache.load(path, parsed_params), path)
+        return batch.validate(
+            lambda: ToscaTemplate(path, parsed_params,
+                                  not _is_url(path)), path)
+    if request.get('template'):
+        def load():
+            return ToscaTemplate(
+                parsed_params=parsed_params,
+                yaml_dict_tpl=yamlparser.simple_parse(request['template']))
+        return batch.validate(load)
+    if request.get('csar'):
+        try:
+            data = base64.b64decode(request['csar'].encode('ascii'))
+        except Exception:
+            raise ValueError(_('"csar" is not base64 encoded.'))
+        fd, path = tempfile.mkstemp(suffix='.csar')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            result = batch.validate(
+                lambda: ToscaTemplate(path, parsed_params), path)
+        finally:
+            os.remove(path)
+        result['path'] = None
+        return result
+    raise ValueError(_('The request has no "path", "template" or "csar".'))
+
+
+def _is_url(path):
+    from toscaparser.utils.urlutils import UrlUtils
+
+    return not os.path.exists(path) and UrlUtils.validate_url(path)
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    # keep the connections of the clients open between requests
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == '/status':
+            self._reply(200, self.server.status())
+        else:
+            self._reply(404, {'error': _('Not found.')})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != '/validate':
+            self._reply(404, {'error': _('Not found.')})
+            return
+        content_type = self.headers.get('Content-Type') or ''
+        if content_type.split(';')[0].strip().lower() != \
+                'application/json':
+            self.close_connection = True
+            self._reply(415, {'error': _('The request is not '
+                                         'application/json.')})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_SIZE:
+            self.close_connection = True
+            self._reply(413, {'error': _('The request is too large.')})
+            return
+        try:
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            result = self.server.validate(request)
+        except ValueError as e:
+            self._reply(400, {'error': str(e)})
+        else:
+            self._reply(200, result)
+
+    def _authorized(self):
+        if self.server.token is None:
+            return True
+        host = (self.headers.get('Host') or '').strip().lower()
+        if host.startswith('['):
+            host = host[1:].partition(']')[0]
+        else:
+            host = host.partition(':')[0]
+        if host not in LOCAL_HOSTS and host != self.server.server_address[0]:
+            error = _('The Host "%s" is not accepted.') % host
+        elif self.headers.get(TOKEN_HEADER) != self.server.token:
+            error = _('The token of the request is not valid.')
+        else:
+            return True
+        self.close_connection = True
+        self._reply(403, {'error': error})
+        return False
+
+    def _reply(self, code, body):
+        data = json.dumps(body, sort_keys=True).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # the clients of a Unix socket have no address
+        log.debug('tosca-parser server: ' + format % args)
+
+
+class ValidationServer(socketserver.ThreadingMixIn,
+                       BaseHTTPServer.HTTPServer):
+    '''Server validating templates in threads of the current process.'''
+
+    daemon_threads = True
+
+    def __init__(self, address=None, model_cache=None):
+        address = address or default_address()
+        if address == default_address():
+            try:
+                userdirs.private_dir(os.path.dirname(address))
+            except OSError as e:
+                raise socket.error(e.errno, e.strerror)
+        self.address_family, address = parse_address(address)
+        self.model_cache = model_cache
+        self.requests = 0
+        self._lock = threading.Lock()
+        # the Unix socket is only accessible to the user
+        self.token = None
+        if self.address_family == socket.AF_UNIX:
+            _remove_stale_socket(address)
+        else:
+            self.token = get_token(create=True)
+        BaseHTTPServer.HTTPServer.__init__(self, address, _Handler)
+
+    def server_bind(self):
+        if self.address_family != socket.AF_UNIX:
+            BaseHTTPServer.HTTPServer.server_bind(self)
+            return
+        old_umask = os.umask(0o077)
+        try:
+            socketserver.TCPServer.server_bind(self)
+        finally:
+            os.umask(old_umask)
+        self.server_name = self.server_address
+        self.server_port = None
+
+    def server_close(self):
+        BaseHTTPServer.HTTPServer.server_close(self)
+        if self.address_family == socket.AF_UNIX:
+            try:
+                os.remove(self.server_address)
+            except OSError:
+                pass
+
+    @property
+    def address(self):
+        '''The address of the server in the form taken by the clients.'''
+        if self.address_family == socket.AF_UNIX:
+            return self.server_address
+        return '%s:%d' % self.server_address[:2]
+
+    def warm(self):
+        '''Build the type registries of all the definitions versions.'''
+        type_registry.get_registry()
+        for version in exttools.get_extensions():
+            type_registry.get_registry(version)
+
+    def validate(self, request):
+        with self._lock:
+            self.requests += 1
+        return validate_request(request, self.model_cache)
+
+    def status(self):
+        status = {'requests': self.requests,
+                  'registries': sorted(type_registry._registries),
+                  'yaml_cache': yamlparser.YAML_CACHE.stats()}
+        if self.model_cache is not None:
+            status['model_cache'] = {'hits': self.model_cache.hits,
+                                     'misses': self.model_cache.misses}
+        return status
+
+
+def _remove_stale_socket(path):
+    # the socket of a server which did not exit cleanly
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except OSError:
+        return
+    _check_socket(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        os.remove(path)
+    else:
+        raise socket.error(_('A server is already listening on "%s".')
+                           % path)
+    finally:
+        sock.close()
+
+
+def serve(address=None, model_cache=None):
+    '''Run a validation server until interrupted.'''
+    server = ValidationServer(address, model_cache)
+    try:
+        server.warm()
+        log.info('tosca-parser server listening on %s' % server.address)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class _UnixConnection(http_client.HTTPConnection):
+
+    def __init__(self, path, timeout):
+        http_client.HTTPConnection.__init__(self, 'localhost',
+                                            timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        _check_socket(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class Client(object):
+    '''Client of a validation server.
+
+    The connection to the server is kept open between the requests. A
+    socket.error is raised when the server cannot be reached or its Unix
+    socket is not owned by the current user, and a ValueError when it
+    rejects a request. The requests to a TCP server carry the token of
+    the user, or token when given.
+    '''
+
+    def __init__(self, address=None, timeout=CLIENT_TIMEOUT, token=None):
+        self.family, self.server_address = parse_address(
+            address or default_address())
+        self.timeout = timeout
+        self.token = token
+        self._connection = None
+
+    def validate(self, path=None, template=None, csar=None,
+                 parsed_params=None):
+        '''Validate a template and return the result of batch.validate().
+
+        The template is given by the path of a template or CSAR readable
+        by the server, its YAML text or the bytes of a CSAR.
+        '''
+        request = {}
+        if path is not None:
+            request['path'] = path
+        if template is not None:
+            request['template'] = template
+        if csar is not None:
+            request['csar'] = base64.b64encode(csar).decode('ascii')
+        if parsed_params is not None:
+            request['parsed_params'] = parsed_params
+        return self._request('POST', '/validate', request)
+
+    def status(self):
+        return self._request('GET', '/status')
+
+    def _connect(self):
+        if self.family == socket.AF_UNIX:
+            return _UnixConnection(self.server_address, self.timeout)
+        return http_client.HTTPConnection(*self.server_address,
+                                          timeout=self.timeout)
+
+    def _request(self, method, url, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'}
+        if self.family != socket.AF_UNIX:
+            if self.token is None:
+                try:
+                    self.token = get_token()
+                except (IOError, OSError):
+                    # rejected by the server
+                    self.token = ''
+            headers[TOKEN_HEADER] = self.token
+        for attempt in (1, 2):
+            reused = self._connection is not None
+            if not reused:
+                self._connection = self._connect()
+            try:
+                self._connection.request(method, url, data, headers)
+                response = self._connection.getresponse()
+                result = json.loads(response.read().decode('utf-8'))
+                break
+            except (socket.error, http_client.HTTPException):
+                self.close()
+                # the server may have closed an idle connection
+                if not reused or attempt == 2:
+                    raise
+        if response.status != 200:
+            raise ValueError(result.get('error'))
+        return result
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -12,15 +12,18 @@
 
 
 import argparse
+import json
 import os
+import socket
 import sys
 
 from toscaparser.tosca_template import ToscaTemplate
 from toscaparser.common.exception import TOSCAException
 from toscaparser.utils.gettextutils import _
+from toscaparser.connectivity import CPConnectivity
+from toscaparser import forwarding_paths
+import toscaparser.batch
 import toscaparser.utils.urlutils
-import numpy as np
-from pyfancy import *
 
 """
 CLI entry point to show how TOSCA Parser can be used programmatically
@@ -33,6 +36,9 @@ It can be used as,
 #tosca-parser --template-file=<path to the YAML template>
 #tosca-parser --template-file=<path to the CSAR zip file>
 #tosca-parser --template-file=<URL to the template or CSAR>
+#tosca-parser --batch <directory, glob or list of templates> [--jobs=<N>]
+#tosca-parser serve [<socket path or [host:]port>] [--model-cache]
+#tosca-parser --server[=<address>] --template-file=<path to the template>
 
 e.g.
 #tosca-parser
@@ -42,6 +48,13 @@ e.g.
 """
 
 
+def pyfancy(*args):
+    # only the analysis of forwarding paths needs pyfancy
+    from pyfancy import pyfancy
+
+    return pyfancy(*args)
+
+
 class ParserShell(object):
 
     def get_parser(self, argv):
@@ -51,22 +64,103 @@ class ParserShell(object):
                             help=_('show tool version.'))
         parser.add_argument('-x', '--verbose',
                             action='store_true',
-                            help=_('display each FP matrix'))
+                            help=_('display the hops of each forwarding '
+                                   'path.'))
         parser.add_argument('-d', '--diff',
                             action='store_true',
-                            help=_('display each matrix'))
+                            help=_('display the broken hops of each '
+                                   'forwarding path.'))
         parser.add_argument('-c', '--template-file',
                             metavar='<filename>',
                             help=_('YAML template or CSAR file to parse.'))
+        parser.add_argument('--batch',
+                            metavar='<dir|glob|list-file>',
+                            nargs='+',
+                            help=_('validate all the templates and CSAR '
+                                   'files of directories, glob patterns or '
+                                   'list files and print the results as '
+                                   'JSON lines.'))
+        parser.add_argument('-j', '--jobs',
+                            metavar='<number>',
+                            type=int,
+                            help=_('number of processes validating a batch, '
+                                   'defaults to the number of CPUs.'))
+        parser.add_argument('--timeout',
+                            metavar='<seconds>',
+                            type=float,
+                            help=_('maximum time to validate each template '
+                                   'of a batch.'))
+        parser.add_argument('--server',
+                            metavar='<address>',
+                            nargs='?',
+                            const='',
+                            help=_('validate the template with the server '
+                                   'started by "tosca-parser serve" at the '
+                                   'given socket path or [host:]port, by '
+                                   'default the socket of the user, and '
+                                   'print the result as a JSON line.'))
 
         return parser
+
+    def get_serve_parser(self):
+        parser = argparse.ArgumentParser(
+            prog="tosca-parser serve",
+            description=_('validate the templates sent by the clients of a '
+                          'Unix socket or a local TCP port.'))
+        parser.add_argument('address',
+                            metavar='<address>',
+                            nargs='?',
+                            help=_('path of the Unix socket or [host:]port '
+                                   'to listen on, by default the socket of '
+                                   'the user.'))
+        parser.add_argument('--model-cache',
+                            action='store_true',
+                            help=_('reuse the snapshots of the templates '
+                                   'validated before.'))
+        return parser
+
+    def serve(self, argv):
+        import toscaparser.server
+
+        args = self.get_serve_parser().parse_args(argv)
+        model_cache = None
+        if args.model_cache:
+            from toscaparser import model_cache as cache
+
+            model_cache = cache.get_cache()
+        toscaparser.server.serve(args.address, model_cache)
+
+    def validate_remote(self, address, path):
+        import toscaparser.server
+
+        if os.path.exists(path):
+            # the server may run in another working directory
+            path = os.path.abspath(path)
+        client = toscaparser.server.Client(address)
+        try:
+            result = client.validate(path)
+        except socket.error as e:
+            print(_('Could not reach the tosca-parser server: %s') % e)
+            exit(1)
+        finally:
+            client.close()
+        print(json.dumps(result, sort_keys=True))
+        exit(0 if result['valid'] else 1)
+
     def main(self, argv):
+        if argv[:1] == ['serve']:
+            self.serve(argv[1:])
+            return
         parser = self.get_parser(argv)
         (args, extra_args) = parser.parse_known_args(argv)
         path = args.template_file
         if (args.version):
             print("v1.0.0")
             exit(0)
+        if args.batch:
+            failed = toscaparser.batch.run(args.batch, sys.stdout,
+                                           args.jobs, args.timeout)
+            exit(1 if failed else 0)
         if (not args.template_file):
             if (os.path.isfile('./tosca-conf.yml')):
                 path = './tosca-conf.yml'
@@ -79,6 +173,8 @@ class ParserShell(object):
                 print("  to display default help use `--help`")
                 print("")
                 exit(1)
+        if args.server is not None:
+            self.validate_remote(args.server or None, path)
         if os.path.isfile(path):
             try:
                 self.parse(path, args)
@@ -93,163 +189,66 @@ class ParserShell(object):
             raise ValueError(_('"%(path)s" is not a valid file.')
                             % {'path': path})
 
-    def connectivityGraph(self, tosca):
-        if not hasattr(tosca, 'nodetemplates'):
-            return
-        nodetemplates = tosca.nodetemplates
-        _cps = filter(lambda x: x.type == "tosca.nodes.nfv.CP", nodetemplates)
-        _cps = map(lambda x: {
-            "name": x.name,
-            "requirements": x.requirements,
-            "link": filter(lambda y: y.has_key('virtualLink'), x.requirements)
-            }, _cps)
-        _cps = map(lambda x: {
-            "name": x['name'],
-            "requirements": x['requirements'],
-            "link": x['link'][0]['virtualLink'] if (len(x['link']) > 0) else ""
-            }, _cps)
-        _cpsd = {}
-        for cp in _cps:
-            _cpsd[cp['name']] = cp
-        connectivity = []
-        cpsItems = sorted(_cpsd.items(), key=lambda x: x[0])
-        total_cps = len(cpsItems)
-        for cp in cpsItems:
-            connectivity.append([0] * total_cps)
-        for r in range(0, total_cps):
-            for c in range(0, total_cps):
-                if r == c:
-                    connectivity[r][c] = 0
-                else:
-                    cpfrom = cpsItems[r][0]
-                    cpto = cpsItems[c][0]
-                    if _cpsd[cpfrom]['link'] == _cpsd[cpto]['link']:
-                        # print cpfrom, '->', cpto, '(', r, ',', c,')'
-                        connectivity[r][c] = 1
-        return { "cpsItems": cpsItems, "connectivity": connectivity }
-
-    def printMatrix(self, cpsItems, matrix):
-        print '\t--- ', ' '.join(map(lambda x: x[0], cpsItems))
-        for x in range(0, len(cpsItems)):
-            _matrix = matrix[x].tolist()[0] if hasattr(matrix[x], 'tolist') else matrix[x]
-            print '\t', cpsItems[x][0] + "  ", " | ".join(map(lambda y: str(y), _matrix))
+    def printConnectivity(self, connectivity):
+        for link, cps in sorted(connectivity.export().items()):
+            print('\t' + link + ': ' + ', '.join(cps))
 
-    def func_chains(self, tosca, cpsItems):
-        forwarding_paths = filter(lambda x: x.type == "tosca.nodes.nfv.FP", tosca.nodetemplates)
-        forwarding_paths = map(lambda x: {
-            "relations": map(lambda y: y["forwarder"], x.requirements),
-            "name": x.name
-        }, forwarding_paths)
-        
-        matrixList = []
-        for fp in forwarding_paths:
-            matrix = []
-            total_cps = len(cpsItems)
-            for cp in cpsItems:
-                matrix.append([0] * total_cps)
-            cps_in_FP = {}
-            for forwarder in fp["relations"]:
-                fromCP = forwarder["capability"]
-                toCP = forwarder['relationship']
-                cps_in_FP[fromCP] = 1
-                cps_in_FP[toCP] = 1
-                # print fromCP, "->", toCP
-                names = map(lambda x: x[0], cpsItems)
-                fromIndex = names.index(fromCP)
-                toIndex = names.index(toCP)
-                matrix[fromIndex][toIndex] = 1
-            matrixList.append({
-                "name": fp["name"],
-                "matrix": matrix,
-                "total_cps": len(cps_in_FP.items()),
-                "cps": cps_in_FP.items()
-            })
-        return matrixList
+    def printHops(self, hops):
+        for from_cp, to_cp in hops:
+            print('\t' + from_cp + ' -> ' + to_cp)
 
-    def hasLoop(self, matrix):
-        return len(filter(lambda x: x is not 0, matrix.diagonal().tolist()[0])) > 0
-
-    def getPosOfNegative(self, cpsItems, matrix):
-        _matrix = matrix.tolist()
-        names = map(lambda x: x[0], cpsItems)
-        str = "  |> Found connexion problem"
-        for x in range(0, len(_matrix)):
-            for y in range(0, len(_matrix)):
-                if _matrix[x][y] == -1:
-                    str += "\n    • " + names[x] + " -x-> " + names[y]
-        return str
-
-    def nodesInvolved(self, cpsItems, matrix):
-        _matrix = matrix.tolist()
-        _names = []
-        names = map(lambda x: x[0], cpsItems)
-        for x in range(0, len(_matrix)):
-            if _matrix[x][x] is not 0:
-                _names.append(names[x])
-        return _names
-
-
-    def findLoop(self, connectivity, cpsItems, obj, args):
-        matrix = obj['matrix']
-        total_cps = obj['total_cps']
-        name = obj['name']
-        m = np.matrix(matrix)
-        n = total_cps
+    def findLoop(self, connectivity, fp, args):
+        name = fp.name
         if args.verbose or args.diff:
-            pyfancy("\n   -->  ").underlined(name +":").output()
-            self.printMatrix(cpsItems, m)
-        difference = np.matrix(connectivity) - m
+            pyfancy("\n   -->  ").underlined(name + ":").output()
+            self.printHops(fp.hops)
         bugs = []
+        broken_hops = fp.broken_hops(connectivity)
         if args.diff:
-            if difference.min() == -1:
+            if broken_hops:
                 pyfancy().yellow("\n\tConnexion problem detected").output()
             else:
                 pyfancy().dim("diff->").output()
-            self.printMatrix(cpsItems, difference)
-        if difference.min() == -1:
-            bugs.append(self.getPosOfNegative(cpsItems, difference))
-        for x in range(1, n + 1):
-            matrixToPower = m**x
-            if (self.hasLoop(matrixToPower)):
-                cpsInvolved = ", ".join(self.nodesInvolved(cpsItems, matrixToPower))
-                bugs.append("  |> Found loop!\n    • Length: " + str(x) + "\n    •    CPs: " + cpsInvolved)
-                if args.verbose:
-                    pyfancy().yellow("\n\tLoop detected in the matrix below: ^("+str(x)+")").output()
-                    self.printMatrix(cpsItems, matrixToPower)
-                break
+            self.printHops(broken_hops)
+        if broken_hops:
+            bugs.append("  |> Found connexion problem" + "".join(
+                "\n    • " + from_cp + " -x-> " + to_cp
+                for from_cp, to_cp in broken_hops))
+        for loop in fp.loops():
+            bugs.append("  |> Found loop!\n    • Length: " +
+                        str(fp.loop_length(loop)) + "\n    •    CPs: " +
+                        ", ".join(loop))
+            if args.verbose:
+                pyfancy().yellow("\n\tLoop detected: " +
+                                 ", ".join(loop)).output()
         if not args.verbose and not args.diff:
-            if len(bugs) is not 0:
+            if bugs:
                 pyfancy().underlined("⚠️  " + name).output()
                 for bug in bugs:
-                    print bug
+                    print(bug)
             else:
                 pyfancy("✅  " + name).output()
-        # print ""
 
     def parse(self, path, args, a_file=True):
-        # print("")
-        output = None
         tosca = None
         try:
             tosca = ToscaTemplate(path, None, a_file)
-        except:
+        except Exception:
             print("⚠️ tosca-parser: Could not parse the given file.")
             if args.verbose:
                 print("Unexpected error: " + str(sys.exc_info()[1]) + "\n")
             exit(1)
 
-        result = self.connectivityGraph(tosca)
-        cpsItems = result['cpsItems']
-        connectivity = result['connectivity']
+        nodetemplates = getattr(tosca, 'nodetemplates', [])
+        connectivity = CPConnectivity(nodetemplates)
         if args.verbose or args.diff:
-            print "\nconnectivity:\n"
-            self.printMatrix(cpsItems, connectivity)
+            print("\nconnectivity:\n")
+            self.printConnectivity(connectivity)
 
         if args.verbose or args.diff:
-            print "\nNFS:"
-        matrixList = self.func_chains(tosca, result['cpsItems'])
-        map(lambda x: self.findLoop(connectivity, cpsItems, x, args), matrixList)
-        # print("")
+            print("\nNFS:")
+        for fp in forwarding_paths.forwarding_paths(nodetemplates):
+            self.findLoop(connectivity, fp, args)
 
 
 def main(args=None):
@@ -13,9 +13,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import hashlib
 import os
+import threading
+import time
 
 import fixtures
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
 import testscenarios
 import testtools
 
@@ -63,3 +68,116 @@ class TestCase(testscenarios.TestWithScenarios, testtools.TestCase):
             os.path.dirname(os.path.abspath(__file__)),
             'data',
             filename))
+
+
+class HTTPServerFixture(fixtures.Fixture):
+    """Local HTTP server serving in memory files.
+
+    Responses carry an ETag and honour If-None-Match, Range and If-Range
+    headers.
+    Every request is recorded in `requests` as (method, path, headers).
+    Responses are sent after `delay` seconds, `max_active` is the largest
+    number of requests that were handled at the same time. HEAD requests
+    are answered with `head_status` unless `allow_head`.
+    """
+
+    def __init__(self, files=None, delay=0, allow_head=True,
+                 head_status=405):
+        super(HTTPServerFixture, self).__init__()
+        self.files = dict(files or {})
+        self.delay = delay
+        self.allow_head = allow_head
+        self.head_status = head_status
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _setUp(self):
+        fixture = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._respond(False)
+
+            def do_GET(self):
+                self._respond(True)
+
+            def _respond(self, send_body):
+                fixture.requests.append((self.command, self.path,
+                                         dict(self.headers.items())))
+                with fixture._lock:
+                    fixture.active += 1
+                    fixture.max_active = max(fixture.max_active,
+                                             fixture.active)
+                try:
+                    time.sleep(fixture.delay)
+                    self._send(send_body)
+                finally:
+                    with fixture._lock:
+                        fixture.active -= 1
+
+            def _send(self, send_body):
+                data = fixture.files.get(self.path.split('?')[0])
+                if self.command == 'HEAD' and not fixture.allow_head:
+                    self.send_response(fixture.head_status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if data is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.sha1(data).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                status = 200
+                byte_range = self.headers.get('Range')
+                if self.headers.get('If-Range') not in (None, etag):
+                    byte_range = None
+                if byte_range and byte_range.startswith('bytes='):
+                    first, last = byte_range[len('bytes='):].split('-')
+                    if first:
+                        first = int(first)
+                        last = min(int(last), len(data) - 1) if last \
+                            else len(data) - 1
+                    else:
+                        first = max(len(data) - int(last), 0)
+                        last = len(data) - 1
+                    status = 206
+                    content_range = 'bytes %d-%d/%d' % (first, last,
+                                                        len(data))
+                    data = data[first:last + 1]
+                self.send_response(status)
+                self.send_header('ETag', etag)
+                self.send_header('Accept-Ranges', 'bytes')
+                if status == 206:
+                    self.send_header('Content-Range', content_range)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(data)
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def requested(self, path, method='GET'):
+        return [r for r in self.requests if r[0] == method and r[1] == path]
@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import signal
+import time
+
+import fixtures
+import six
+
+from toscaparser import batch
+from toscaparser.tests.base import TestCase
+
+
+class BatchTest(TestCase):
+
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'data')
+    valid_tpl = os.path.join(data_dir, 'tosca_helloworld.yaml')
+    invalid_tpl = os.path.join(data_dir,
+                               'test_multiple_validation_errors.yaml')
+    csar = os.path.join(data_dir, 'CSAR/csar_hello_world.zip')
+
+    def test_find_templates(self):
+        temp_dir = self.useFixture(fixtures.TempDir()).path
+        for name in ('b.yaml', 'a.yml', 'notes.txt', 'sub/c.csar'):
+            path = os.path.join(temp_dir, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            open(path, 'w').close()
+        list_file = os.path.join(temp_dir, 'notes.txt')
+        with open(list_file, 'w') as f:
+            f.write('# templates\n%s\n\n%s\n' % (self.csar, self.valid_tpl))
+
+        self.assertEqual(
+            [os.path.join(temp_dir, name)
+             for name in ('a.yml', 'b.yaml', 'sub/c.csar')],
+            batch.find_templates(temp_dir))
+        self.assertEqual([os.path.join(temp_dir, 'b.yaml')],
+                         batch.find_templates(os.path.join(temp_dir,
+                                                           'b*')))
+        self.assertEqual([self.csar, self.valid_tpl],
+                         batch.find_templates([list_file]))
+
+    def test_validate_templates(self):
+        paths = [self.invalid_tpl, self.valid_tpl,
+                 os.path.join(self.data_dir, 'tosca_elk.yaml'),
+                 self.invalid_tpl]
+        results = list(batch.validate_templates(paths, jobs=2))
+        self.assertEqual(paths, [result['path'] for result in results])
+        self.assertEqual([False, True, True, False],
+                         [result['valid'] for result in results])
+        self.assertEqual([], results[1]['errors'])
+        self.assertIn('ImportError: Import "custom_types/not_there.yaml" '
+                      'is not valid.', results[0]['errors'])
+        self.assertEqual(sorted(results[0]['errors']),
+                         sorted(results[3]['errors']))
+
+    def test_validate_template_timeout(self):
+        def slow_template(path):
+            time.sleep(5)
+        self.useFixture(fixtures.MonkeyPatch(
+            'toscaparser.batch.ToscaTemplate', slow_template))
+        start = time.time()
+        result = batch.validate_template(self.valid_tpl, timeout=0.1)
+        self.assertTrue(time.time() - start < 5)
+        self.assertFalse(result['valid'])
+        self.assertEqual(['ValidationTimeout: Validation of "%s" did not '
+                          'complete within 0.1 seconds.' % self.valid_tpl],
+                         result['errors'])
+
+    def test_timeout_cancelled(self):
+        handler = signal.getsignal(signal.SIGALRM)
+        result = batch.validate_template(self.valid_tpl, timeout=0.5)
+        self.assertTrue(result['valid'])
+        self.assertEqual((0.0, 0.0), signal.getitimer(signal.ITIMER_REAL))
+        self.assertEqual(handler, signal.getsignal(signal.SIGALRM))
+        # no timeout once the validation completed
+        time.sleep(0.7)
+
+    def test_run(self):
+        output = six.StringIO()
+        failed = batch.run([self.valid_tpl, self.invalid_tpl], output,
+                           jobs=1)
+        self.assertEqual(1, failed)
+        results = [json.loads(line)
+                   for line in output.getvalue().splitlines()]
+        self.assertEqual([self.valid_tpl, self.invalid_tpl],
+                         [result['path'] for result in results])
+        self.assertEqual([True, False],
+                         [result['valid'] for result in results])
@@ -0,0 +1,59 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+from toscaparser.connectivity import CPConnectivity
+from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
+
+
+class CPConnectivityTest(TestCase):
+
+    tosca_tpl = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "data/nfv/tosca_nfv_forwarding_paths.yaml")
+
+    def test_template_connectivity(self):
+        connectivity = CPConnectivity(
+            ToscaTemplate(self.tosca_tpl).nodetemplates)
+        self.assertEqual(['CP11', 'CP12', 'CP21', 'CP22'],
+                         sorted(connectivity.cps))
+        self.assertEqual({'VL1': ['CP11', 'CP21'], 'VL2': ['CP12', 'CP22']},
+                         connectivity.export())
+        self.assertEqual(['VL1'], connectivity.links('CP11'))
+        self.assertEqual(['CP12', 'CP22'],
+                         sorted(connectivity.members('VL2')))
+        self.assertTrue(connectivity.connected('CP11', 'CP21'))
+        self.assertFalse(connectivity.connected('CP11', 'CP22'))
+        self.assertFalse(connectivity.reachable('CP11', 'CP22'))
+        self.assertEqual([['CP11', 'CP21'], ['CP12', 'CP22']],
+                         sorted(sorted(component) for component in
+                                connectivity.components()))
+
+    def test_reachable_through_cps(self):
+        connectivity = CPConnectivity()
+        connectivity.add_link('a', 'vl1')
+        connectivity.add_link('b', 'vl1')
+        connectivity.add_link('b', 'vl2')
+        connectivity.add_link('c', 'vl2')
+        connectivity.add_cp('d')
+        self.assertFalse(connectivity.connected('a', 'c'))
+        self.assertTrue(connectivity.reachable('a', 'c'))
+        self.assertTrue(connectivity.connected('b', 'c'))
+        self.assertFalse(connectivity.reachable('a', 'd'))
+        self.assertFalse(connectivity.connected('d', 'd'))
+        self.assertTrue(connectivity.reachable('d', 'd'))
+        self.assertFalse(connectivity.reachable('a', 'unknown'))
+        self.assertEqual([['a', 'b', 'c'], ['d']],
+                         sorted(sorted(component) for component in
+                                connectivity.components()))
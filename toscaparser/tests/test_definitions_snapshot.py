@@ -0,0 +1,105 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import fixtures
+
+from toscaparser.elements import definitions_snapshot
+from toscaparser.elements.entity_type import EntityType
+from toscaparser.tests.base import TestCase
+import toscaparser.utils.yamlparser
+
+
+class DefinitionsSnapshotTest(TestCase):
+
+    definitions = '''
+tosca_definitions_version: tosca_simple_yaml_1_0
+node_types:
+  example.nodes.Server:
+    derived_from: tosca.nodes.Compute
+data_types:
+  example.datatypes.Port:
+    derived_from: tosca.datatypes.Root
+'''
+
+    def setUp(self):
+        super(DefinitionsSnapshotTest, self).setUp()
+        temp_dir = self.useFixture(fixtures.TempDir()).path
+        self.defs_file = os.path.join(temp_dir, 'definitions.yaml')
+        self.snapshot_file = os.path.join(temp_dir, 'definitions.pickle')
+        self._write_definitions(self.definitions)
+        self.yaml_loads = []
+        load_yaml = toscaparser.utils.yamlparser.load_yaml
+
+        def counting_load_yaml(path, a_file=True):
+            self.yaml_loads.append(path)
+            return load_yaml(path, a_file)
+        self.useFixture(fixtures.MonkeyPatch(
+            'toscaparser.utils.yamlparser.load_yaml', counting_load_yaml))
+
+    def _write_definitions(self, content):
+        with open(self.defs_file, 'w') as f:
+            f.write(content)
+
+    def _load(self):
+        return definitions_snapshot.load_definitions(
+            self.defs_file, EntityType.TOSCA_DEF_SECTIONS, self.snapshot_file)
+
+    def test_load_without_snapshot(self):
+        defs = self._load()
+        self.assertEqual(['example.datatypes.Port', 'example.nodes.Server'],
+                         sorted(defs.keys()))
+        self.assertEqual([self.defs_file], self.yaml_loads)
+
+    def test_load_from_snapshot(self):
+        definitions_snapshot.build(self.snapshot_file, [self.defs_file])
+        del self.yaml_loads[:]
+        defs = self._load()
+        self.assertEqual('tosca.nodes.Compute',
+                         defs['example.nodes.Server']['derived_from'])
+        self.assertEqual([], self.yaml_loads)
+
+        # every load returns its own copy of the definitions
+        defs['example.nodes.Server']['derived_from'] = 'tosca.nodes.Root'
+        self.assertEqual('tosca.nodes.Compute',
+                         self._load()['example.nodes.Server']['derived_from'])
+
+    def test_stale_snapshot_falls_back_to_yaml(self):
+        definitions_snapshot.build(self.snapshot_file, [self.defs_file])
+        self._write_definitions(self.definitions.replace(
+            'tosca.nodes.Compute', 'tosca.nodes.Root'))
+        del self.yaml_loads[:]
+        defs = self._load()
+        self.assertEqual('tosca.nodes.Root',
+                         defs['example.nodes.Server']['derived_from'])
+        self.assertEqual([self.defs_file], self.yaml_loads)
+
+    def test_invalid_snapshot_falls_back_to_yaml(self):
+        with open(self.snapshot_file, 'wb') as f:
+            f.write(b'not a snapshot')
+        defs = self._load()
+        self.assertIn('example.nodes.Server', defs)
+        self.assertEqual([self.defs_file], self.yaml_loads)
+
+    def test_normative_definitions_snapshot(self):
+        definitions_snapshot.build(self.snapshot_file,
+                                   [EntityType.TOSCA_DEF_FILE])
+        defs = definitions_snapshot.load_definitions(
+            EntityType.TOSCA_DEF_FILE, EntityType.TOSCA_DEF_SECTIONS,
+            self.snapshot_file)
+        self.assertEqual(
+            definitions_snapshot.flatten(
+                toscaparser.utils.yamlparser.load_yaml(
+                    EntityType.TOSCA_DEF_FILE),
+                EntityType.TOSCA_DEF_SECTIONS),
+            defs)
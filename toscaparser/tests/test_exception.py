@@ -10,8 +10,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import threading
+
 from toscaparser.common import exception
 from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
 from toscaparser.utils.gettextutils import _
 
 
@@ -40,3 +44,108 @@ class ExceptionTest(TestCase):
     def _formate_exception(self):
         exception.UnknownFieldError.set_fatal_format_exception(True)
         raise exception.UnknownFieldError(what='Template')
+
+    def test_collector_dedupe(self):
+        exception.ExceptionCollector.start()
+        self.addCleanup(exception.ExceptionCollector.stop)
+        for i in range(3):
+            exception.ExceptionCollector.appendException(ValueError('one'))
+            exception.ExceptionCollector.appendException(
+                ValueError('error %d' % i))
+        self.assertEqual(['one', 'error 0', 'error 1', 'error 2'],
+                         [str(e) for e in
+                          exception.ExceptionCollector.getExceptions()])
+        self.assertTrue(exception.ExceptionCollector.contains(
+            TypeError('one')))
+        exception.ExceptionCollector.exceptions.pop(0)
+        self.assertFalse(exception.ExceptionCollector.contains(
+            ValueError('one')))
+
+    def test_collector_trace(self):
+        exception.ExceptionCollector.start()
+        self.addCleanup(exception.ExceptionCollector.stop)
+        exception.ExceptionCollector.appendException(ValueError('error'))
+        trace = exception.ExceptionCollector.getExceptions()[0].trace
+        filename, line, method, call = trace[-1]
+        self.assertEqual('test_collector_trace', method)
+        self.assertEqual("exception.ExceptionCollector.appendException("
+                         "ValueError('error'))", call)
+        self.assertEqual(len(trace), len(list(trace)))
+        report = exception.ExceptionCollector.getExceptionsReport()[0]
+        self.assertIn('in test_collector_trace', report)
+
+    def test_max_errors(self):
+        exception.ExceptionCollector.start(max_errors=2)
+        self.addCleanup(exception.ExceptionCollector.stop)
+        exception.ExceptionCollector.appendException(ValueError('one'))
+        err = self.assertRaises(
+            exception.TooManyErrors,
+            exception.ExceptionCollector.appendException,
+            ValueError('two'))
+        self.assertEqual(_('Validation stopped after 2 errors.'), str(err))
+        self.assertRaises(exception.TooManyErrors,
+                          exception.ExceptionCollector.appendException,
+                          ValueError('three'))
+        self.assertEqual(2, len(exception.ExceptionCollector.exceptions))
+
+    def test_template_max_errors(self):
+        tosca_tpl = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            'data/test_multiple_validation_errors.yaml')
+        err = self.assertRaises(exception.ValidationError, ToscaTemplate,
+                                tosca_tpl, max_errors=2)
+        self.assertIn(_('TooManyErrors: Validation stopped after 2 '
+                        'errors.'), str(err))
+        self.assertEqual(3, len(exception.ExceptionCollector.exceptions))
+
+    def test_collector_per_thread(self):
+        exception.ExceptionCollector.start()
+        self.addCleanup(exception.ExceptionCollector.stop)
+        exception.ExceptionCollector.appendException(
+            ValueError('main thread'))
+        errors = []
+
+        def collect():
+            self.assertFalse(exception.ExceptionCollector.collecting)
+            exception.ExceptionCollector.start()
+            exception.ExceptionCollector.appendException(
+                ValueError('other thread'))
+            errors.extend(exception.ExceptionCollector.getExceptions())
+            exception.ExceptionCollector.stop()
+        thread = threading.Thread(target=collect)
+        thread.start()
+        thread.join()
+        self.assertEqual(['other thread'], [str(e) for e in errors])
+        self.assertTrue(exception.ExceptionCollector.collecting)
+        self.assertEqual(['main thread'],
+                         [str(e) for e in
+                          exception.ExceptionCollector.exceptions])
+
+    def test_concurrent_parses(self):
+        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'data')
+        valid_tpl = os.path.join(data_dir, 'tosca_elk.yaml')
+        invalid_tpl = os.path.join(data_dir,
+                                   'test_multiple_validation_errors.yaml')
+        results = {}
+
+        def parse(index, path):
+            try:
+                ToscaTemplate(path)
+            except exception.ValidationError:
+                pass
+            results[index] = sorted(
+                exception.ExceptionCollector.getExceptionsReport(False))
+        threads = [threading.Thread(target=parse, args=(
+            i, invalid_tpl if i % 2 else valid_tpl)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertRaises(exception.ValidationError, ToscaTemplate,
+                          invalid_tpl)
+        expected = sorted(
+            exception.ExceptionCollector.getExceptionsReport(False))
+        self.assertTrue(expected)
+        for i in range(8):
+            self.assertEqual(expected if i % 2 else [], results[i])
@@ -0,0 +1,188 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from multiprocessing.pool import ThreadPool
+import os
+import shutil
+import stat
+import time
+
+import fixtures
+
+from toscaparser.prereq.csar import CSAR
+from toscaparser.prereq import extraction_cache
+from toscaparser.prereq.extraction_cache import ExtractionCache
+from toscaparser.tests.base import TestCase
+
+
+class ExtractionCacheTest(TestCase):
+
+    csar_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'data', 'CSAR')
+    hello_world = os.path.join(csar_dir, 'csar_hello_world.zip')
+    elk = os.path.join(csar_dir, 'csar_elk.zip')
+    wordpress = os.path.join(csar_dir, 'csar_wordpress.zip')
+
+    def setUp(self):
+        super(ExtractionCacheTest, self).setUp()
+        self.cache_dir = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'csars')
+
+    def test_extract_once(self):
+        cache = ExtractionCache(self.cache_dir)
+        path = cache.extract(self.hello_world)
+        self.assertEqual(
+            cache.path(extraction_cache.archive_sha256(self.hello_world)),
+            path)
+        self.assertTrue(os.path.isfile(
+            os.path.join(path, 'TOSCA-Metadata', 'TOSCA.meta')))
+        with open(self.hello_world, 'rb') as f:
+            self.assertEqual(path, cache.extract(f))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        name = os.path.basename(path)
+        self.assertEqual([name, name + extraction_cache.SIZE_SUFFIX],
+                         sorted(os.listdir(self.cache_dir)))
+
+    def test_concurrent_extractions(self):
+        # every extraction uses its own cache, as separate processes do
+        def extract(i):
+            return ExtractionCache(self.cache_dir).extract(self.elk)
+        pool = ThreadPool(4)
+        try:
+            paths = pool.map(extract, range(8))
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(1, len(set(paths)))
+        name = os.path.basename(paths[0])
+        self.assertEqual([name, name + extraction_cache.SIZE_SUFFIX],
+                         sorted(os.listdir(self.cache_dir)))
+
+    def test_lru_eviction(self):
+        cache = ExtractionCache(self.cache_dir)
+        hello_world = cache.extract(self.hello_world)
+        elk = cache.extract(self.elk)
+        past = time.time() - extraction_cache.GRACE_SECONDS - 60
+        os.utime(hello_world, (past, past))
+        os.utime(elk, (past + 1, past + 1))
+        cache.extract(self.hello_world)
+
+        # room for the last archive and the most recently used one
+        sizes = dict((entry[0], entry[1]) for entry in cache.entries())
+        cache.max_bytes = sum(sizes.values())
+        wordpress = cache.extract(self.wordpress)
+        self.assertEqual(sorted([hello_world, wordpress]),
+                         sorted(cache.path(entry[0])
+                                for entry in cache.entries()))
+        self.assertLessEqual(sum(entry[1] for entry in cache.entries()),
+                             cache.max_bytes)
+
+    def test_recently_used_not_evicted(self):
+        # the archives may still be read by other processes
+        cache = ExtractionCache(self.cache_dir, max_bytes=0)
+        hello_world = cache.extract(self.hello_world)
+        elk = cache.extract(self.elk)
+        self.assertTrue(os.path.isdir(hello_world))
+        past = time.time() - extraction_cache.GRACE_SECONDS - 1
+        os.utime(hello_world, (past, past))
+        cache.evict()
+        self.assertEqual([elk], [cache.path(entry[0])
+                                 for entry in cache.entries()])
+
+    def test_not_private(self):
+        cache = ExtractionCache(self.cache_dir)
+        path = cache.extract(self.hello_world)
+        os.chmod(path, 0o777)
+        self.assertRaises(OSError, cache.extract, self.hello_world)
+        os.chmod(path, 0o700)
+        uid = os.getuid()
+        self.patch(os, 'getuid', lambda: uid + 1)
+        # the cache directory of another user
+        self.assertRaises(OSError, cache.extract, self.hello_world)
+        self.assertEqual(0, cache.hits)
+
+    def test_stale_temporary_directories_removed(self):
+        cache = ExtractionCache(self.cache_dir)
+        cache.extract(self.hello_world)
+        stale = os.path.join(self.cache_dir,
+                             extraction_cache.TMP_PREFIX + 'stale')
+        active = os.path.join(self.cache_dir,
+                              extraction_cache.TMP_PREFIX + 'active')
+        os.mkdir(stale)
+        os.mkdir(active)
+        past = time.time() - extraction_cache.STALE_SECONDS - 1
+        os.utime(stale, (past, past))
+        cache.evict()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(active))
+
+        cache.clear()
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_csar_decompress(self):
+        self.patch(extraction_cache, '_cache',
+                   ExtractionCache(self.cache_dir))
+        csar = CSAR(self.elk)
+        csar.decompress()
+        self.addCleanup(shutil.rmtree, csar.temp_dir, True)
+        script = csar.extract('Scripts/kibana/start.sh')
+        self.assertEqual(os.path.join(csar.temp_dir, 'Scripts', 'kibana',
+                                      'start.sh'), script)
+        cached = os.path.join(
+            extraction_cache.get_cache().path(csar.get_sha256()),
+            'Scripts', 'kibana', 'start.sh')
+        self.assertEqual(0, os.stat(cached).st_mode & stat.S_IWUSR)
+        with open(script, 'rb') as f, open(cached, 'rb') as c:
+            self.assertEqual(c.read(), f.read())
+
+        # every CSAR has its own directory
+        other = CSAR(self.elk)
+        other.decompress()
+        self.addCleanup(shutil.rmtree, other.temp_dir, True)
+        self.assertNotEqual(csar.temp_dir, other.temp_dir)
+        self.assertEqual(1, extraction_cache.get_cache().hits)
+        shutil.rmtree(csar.temp_dir)
+        self.assertTrue(os.path.isfile(cached))
+        self.assertTrue(os.path.isfile(other.extract(
+            'Scripts/kibana/start.sh')))
+
+    def test_checkout_of_evicted_archive(self):
+        cache = ExtractionCache(self.cache_dir)
+        path = cache.extract(self.hello_world)
+        extract = cache.extract
+
+        def evicted(archive, sha256=None):
+            # another process evicts the archive once extracted
+            cache.extract = extract
+            cache.remove(os.path.basename(path))
+            return path
+        cache.extract = evicted
+        target = cache.checkout(self.hello_world)
+        self.addCleanup(shutil.rmtree, target)
+        self.assertTrue(os.path.isfile(
+            os.path.join(target, 'TOSCA-Metadata', 'TOSCA.meta')))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+    def test_sizes_recorded(self):
+        cache = ExtractionCache(self.cache_dir)
+        path = cache.extract(self.hello_world)
+        size = extraction_cache._dir_size(path)
+        self.patch(extraction_cache, '_dir_size', lambda path: 1 / 0)
+        self.assertEqual([(os.path.basename(path), size)],
+                         [entry[:2] for entry in cache.entries()])
+        # an archive extracted by an older version is measured once
+        os.remove(path + extraction_cache.SIZE_SUFFIX)
+        self.patch(extraction_cache, '_dir_size', lambda path: size)
+        self.assertEqual(size, cache.entries()[0][1])
+        self.assertEqual(size, cache._read_size(os.path.basename(path)))
+        cache.clear()
+        self.assertEqual([], os.listdir(self.cache_dir))
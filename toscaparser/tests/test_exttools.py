@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import types
+
+import fixtures
+
+from toscaparser.common.exception import ToscaExtAttributeError
+from toscaparser.elements import definitions_snapshot
+from toscaparser.elements import type_registry
+from toscaparser.extensions import exttools
+from toscaparser.extensions.exttools import ExtTools
+from toscaparser.tests.base import TestCase
+
+NFV_VERSION = 'tosca_simple_profile_for_nfv_1_0_0'
+MEC_VERSION = 'tosca_simple_profile_for_mec_1_0_0'
+PLUGIN_VERSION = 'tosca_simple_profile_for_tests_1_0'
+
+PLUGIN_DEFS = '''
+node_types:
+  tosca.nodes.tests.Plugin:
+    derived_from: tosca.nodes.Root
+'''
+
+
+class FakeEntryPoint(object):
+
+    def __init__(self, name, module):
+        self.name = name
+        self.module = module
+
+    def load(self):
+        return self.module
+
+
+class ExtToolsTest(TestCase):
+
+    def setUp(self):
+        super(ExtToolsTest, self).setUp()
+        exttools.reset()
+        self.addCleanup(exttools.reset)
+        self.tmp_dir = self.useFixture(fixtures.TempDir()).path
+
+    def _plugin(self, version=PLUGIN_VERSION, **attrs):
+        module = types.ModuleType('tests_profile')
+        module.__file__ = os.path.join(self.tmp_dir, 'tests_profile.py')
+        module.VERSION = version
+        module.DEFS_FILE = 'tests_definitions.yaml'
+        with open(os.path.join(self.tmp_dir, module.DEFS_FILE), 'w') as f:
+            f.write(PLUGIN_DEFS)
+        for name, value in attrs.items():
+            setattr(module, name, value)
+        return module
+
+    def _register(self, *modules):
+        entry_points = [FakeEntryPoint(module.__name__, module)
+                        for module in modules]
+        self.patch(exttools, '_entry_points', lambda group: entry_points)
+
+    def test_builtin_extensions(self):
+        self.assertEqual([MEC_VERSION, NFV_VERSION], ExtTools().get_versions())
+        defs_file = ExtTools().get_defs_file(NFV_VERSION)
+        self.assertEqual('TOSCA_nfv_definition_1_0_0.yaml',
+                         os.path.basename(defs_file))
+        self.assertTrue(os.path.isfile(defs_file))
+        self.assertEqual('metadata', ExtTools().get_sections()[NFV_VERSION])
+
+    def test_discovered_once(self):
+        calls = []
+
+        def discover():
+            calls.append(1)
+            return {}
+        self.patch(exttools, '_discover', discover)
+        for _ in range(3):
+            ExtTools().get_versions()
+        self.assertEqual(1, len(calls))
+
+    def test_definitions_not_loaded(self):
+        def load(*args):
+            self.fail('Definitions loaded by the discovery.')
+        self.patch(definitions_snapshot, 'load_definitions', load)
+        self.patch(type_registry, 'load_definitions', load)
+        self.assertIn(NFV_VERSION, exttools.get_extensions())
+
+    def test_entry_point_extension(self):
+        self._register(self._plugin())
+        info = exttools.get_extensions()[PLUGIN_VERSION]
+        self.assertEqual(os.path.join(self.tmp_dir, 'tests_definitions.yaml'),
+                         info['defs_file'])
+        self.assertEqual((), info['sections'])
+        self.addCleanup(type_registry._registries.pop, PLUGIN_VERSION, None)
+        registry = type_registry.get_registry(PLUGIN_VERSION)
+        self.assertIn('tosca.nodes.tests.Plugin', registry.definitions)
+        self.assertIn('tosca.nodes.Compute', registry.definitions)
+
+    def test_builtin_version_not_replaced(self):
+        self._register(self._plugin(NFV_VERSION))
+        self.assertEqual('TOSCA_nfv_definition_1_0_0.yaml', os.path.basename(
+            exttools.get_extensions()[NFV_VERSION]['defs_file']))
+
+    def test_missing_attribute(self):
+        module = self._plugin()
+        del module.DEFS_FILE
+        self._register(module)
+        self.assertRaises(ToscaExtAttributeError, exttools.get_extensions)
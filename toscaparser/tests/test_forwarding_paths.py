@@ -0,0 +1,81 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+from toscaparser.connectivity import CPConnectivity
+from toscaparser import forwarding_paths
+from toscaparser.forwarding_paths import ForwardingPath
+from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
+
+
+class ForwardingPathsTest(TestCase):
+
+    tosca_tpl = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "data/nfv/tosca_nfv_forwarding_paths.yaml")
+
+    def test_forwarding_paths(self):
+        nodetemplates = ToscaTemplate(self.tosca_tpl).nodetemplates
+        connectivity = CPConnectivity(nodetemplates)
+
+        paths = dict((fp.name, fp) for fp in
+                     forwarding_paths.forwarding_paths(nodetemplates))
+        self.assertEqual(['Forwarding_path1', 'Forwarding_path2'],
+                         sorted(paths))
+
+        fp1 = paths['Forwarding_path1']
+        self.assertEqual([('CP11', 'CP21'), ('CP21', 'CP22')], fp1.hops)
+        self.assertEqual([], fp1.loops())
+        self.assertEqual([('CP21', 'CP22')], fp1.broken_hops(connectivity))
+
+        fp2 = paths['Forwarding_path2']
+        self.assertEqual([['CP12', 'CP22', 'CP11']], fp2.loops())
+        self.assertEqual([('CP22', 'CP11'), ('CP11', 'CP12')],
+                         fp2.broken_hops(connectivity))
+
+    def test_loops(self):
+        fp = ForwardingPath('fp', [('a', 'b'), ('b', 'c'), ('c', 'b'),
+                                   ('c', 'd'), ('d', 'd'), ('d', 'e')])
+        self.assertEqual(['a', 'b', 'c', 'd', 'e'], fp.cps)
+        self.assertEqual([['d'], ['b', 'c']], fp.loops())
+        self.assertEqual([1, 2], [fp.loop_length(loop) for loop in fp.loops()])
+        connectivity = CPConnectivity()
+        connectivity.add_link('a', 'vl1')
+        for cp in 'bcde':
+            connectivity.add_link(cp, 'vl2')
+        self.assertEqual([('a', 'b'), ('d', 'd')],
+                         fp.broken_hops(connectivity))
+
+    def test_loop_length(self):
+        # the shortest cycle of a group of CPs looping through two cycles
+        fp = ForwardingPath('fp', [('x', 'y'), ('y', 'x'), ('y', 'z'),
+                                   ('z', 'w'), ('w', 'y')])
+        self.assertEqual([['x', 'y', 'z', 'w']], fp.loops())
+        self.assertEqual(2, fp.loop_length(fp.loops()[0]))
+        fp = ForwardingPath('fp', [('a', 'b'), ('b', 'c'), ('c', 'a'),
+                                   ('c', 'd'), ('d', 'e'), ('e', 'f'),
+                                   ('f', 'a')])
+        self.assertEqual(3, fp.loop_length(fp.loops()[0]))
+
+    def test_long_path(self):
+        # a path through thousands of CPs, looping back to its start
+        cps = ['CP%d' % i for i in range(5000)]
+        hops = list(zip(cps, cps[1:] + cps[:1]))
+        fp = ForwardingPath('fp', hops)
+        self.assertEqual([cps], fp.loops())
+        self.assertEqual(5000, fp.loop_length(cps))
+        connectivity = CPConnectivity()
+        for cp in cps:
+            connectivity.add_link(cp, 'VL1')
+        self.assertEqual([], fp.broken_hops(connectivity))
@@ -0,0 +1,200 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+
+import fixtures
+
+from toscaparser.common.exception import ValidationError
+from toscaparser.elements import type_registry
+from toscaparser.functions import GetAttribute
+from toscaparser import model_cache
+from toscaparser.model_cache import ModelCache
+from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
+
+MAIN_TEMPLATE = '''
+tosca_definitions_version: tosca_simple_yaml_1_0
+
+imports:
+  - types.yaml
+
+topology_template:
+  inputs:
+    port:
+      type: integer
+      default: 8080
+  node_templates:
+    server:
+      type: tosca.nodes.Compute
+    app:
+      type: example.App
+      properties:
+        port: { get_input: port }
+      requirements:
+        - host: server
+  outputs:
+    server_address:
+      value: { get_attribute: [server, private_address] }
+'''
+
+TYPES_TEMPLATE = '''
+tosca_definitions_version: tosca_simple_yaml_1_0
+
+node_types:
+  example.App:
+    derived_from: tosca.nodes.SoftwareComponent
+    description: %s
+    properties:
+      port:
+        type: integer
+'''
+
+
+class ModelCacheTest(TestCase):
+
+    csar_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'data', 'CSAR')
+
+    def setUp(self):
+        super(ModelCacheTest, self).setUp()
+        tmp_dir = self.useFixture(fixtures.TempDir()).path
+        self.cache = ModelCache(os.path.join(tmp_dir, 'models'))
+        self.tpl_dir = os.path.join(tmp_dir, 'templates')
+        os.mkdir(self.tpl_dir)
+        self.main = os.path.join(self.tpl_dir, 'main.yaml')
+        self._write('main.yaml', MAIN_TEMPLATE)
+        self._write('types.yaml', TYPES_TEMPLATE % 'An application.')
+
+    def _write(self, name, content):
+        with open(os.path.join(self.tpl_dir, name), 'w') as f:
+            f.write(content)
+
+    def _port(self, tpl):
+        app = [n for n in tpl.nodetemplates if n.name == 'app'][0]
+        return app.get_property_value('port').result()
+
+    def _no_parse(self, *args, **kwargs):
+        self.fail('The template was parsed again.')
+
+    def test_snapshot_reloaded(self):
+        tpl = self.cache.load(self.main, {'port': 9000})
+        self.patch(model_cache, 'ToscaTemplate', self._no_parse)
+        cached = self.cache.load(self.main, {'port': 9000})
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+        self.assertIsNot(tpl, cached)
+        self.assertEqual([n.name for n in tpl.nodetemplates],
+                         [n.name for n in cached.nodetemplates])
+        self.assertEqual(['server_address'],
+                         [o.name for o in cached.outputs])
+        self.assertIsInstance(cached.outputs[0].value, GetAttribute)
+        self.assertEqual(9000, self._port(cached))
+        self.assertEqual(
+            ['server'], [n.name for n in cached.graph.requirements('app')])
+        self.assertEqual(self.main, cached.input_path)
+
+    def test_parsed_params_in_key(self):
+        self.cache.load(self.main, {'port': 9000})
+        tpl = self.cache.load(self.main, {'port': 9001})
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+        self.assertEqual(9001, self._port(tpl))
+        self.assertEqual(2, len(self.cache.entries()))
+
+    def test_import_change_invalidates(self):
+        self.cache.load(self.main)
+        self._write('types.yaml', TYPES_TEMPLATE % 'Another application.')
+        tpl = self.cache.load(self.main)
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+        app = [n for n in tpl.nodetemplates if n.name == 'app'][0]
+        self.assertEqual('Another application.',
+                         app.type_definition.get_value('description'))
+        self.cache.load(self.main)
+        self.assertEqual((1, 2), (self.cache.hits, self.cache.misses))
+
+    def test_same_content_other_file(self):
+        self.cache.load(self.main)
+        copy = os.path.join(self.tpl_dir, 'copy.yaml')
+        shutil.copy(self.main, copy)
+        self.patch(model_cache, 'ToscaTemplate', self._no_parse)
+        tpl = self.cache.load(copy)
+        self.assertEqual((copy, copy), (tpl.input_path, tpl.path))
+
+    def test_csar_snapshot(self):
+        path = os.path.join(self.csar_dir, 'csar_elk.zip')
+        tpl = self.cache.load(path)
+        cached = self.cache.load(path)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+        self.assertEqual(tpl.template_path, cached.template_path)
+        self.assertTrue(os.path.isfile(
+            cached.csar.extract('Definitions/tosca_elk.yaml')))
+        self.addCleanup(shutil.rmtree, cached.csar.temp_dir)
+        cached.csar.close()
+        self.assertEqual(sorted(n.name for n in tpl.nodetemplates),
+                         sorted(n.name for n in cached.nodetemplates))
+        # the imports are members of the archive
+        self.assertEqual(
+            [os.path.abspath(path)],
+            [dep for dep, _ in self.cache._dependencies(tpl, 'sha256')])
+
+    def test_profile_snapshot(self):
+        path = os.path.join(os.path.dirname(self.csar_dir), 'nfv',
+                            'tosca_nfv_forwarding_paths.yaml')
+        self.cache.load(path)
+        tpl = self.cache.load(path)
+        self.assertEqual(1, self.cache.hits)
+        self.assertIs(
+            type_registry.get_registry('tosca_simple_profile_for_nfv_1_0_0'),
+            tpl.type_registry)
+        self.assertIs(tpl.type_registry, tpl.custom_defs.type_registry)
+
+    def test_invalid_template_not_cached(self):
+        self._write('main.yaml', MAIN_TEMPLATE.replace('example.App',
+                                                       'example.Unknown'))
+        self.assertRaises(ValidationError, self.cache.load, self.main)
+        self.assertEqual([], self.cache.entries())
+
+    def test_evict(self):
+        cache = ModelCache(self.cache.cache_dir, max_entries=2)
+        for port in range(3):
+            cache.load(self.main, {'port': port})
+        self.assertEqual(2, len(cache.entries()))
+        cache.clear()
+        self.assertEqual([], cache.entries())
+
+    def test_import_sources(self):
+        tpl = ToscaTemplate(self.main)
+        self.assertEqual([(os.path.join(self.tpl_dir, 'types.yaml'), True)],
+                         [(os.path.abspath(path), a_file)
+                          for path, a_file in tpl.import_sources])
+
+    def test_snapshot_not_private(self):
+        self.cache.load(self.main)
+        snapshot_file = self.cache.entries()[0]
+        os.chmod(snapshot_file, 0o666)
+        self.cache.load(self.main)
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+
+    def test_snapshot_of_other_user(self):
+        self.cache.load(self.main)
+        uid = os.getuid()
+        self.patch(os, 'getuid', lambda: uid + 1)
+        self.assertRaises(OSError, self.cache._write, 'snapshot', None, [])
+        self.cache.load(self.main)
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+
+    def test_cache_dir_not_private(self):
+        self.cache.load(self.main)
+        os.chmod(self.cache.cache_dir, 0o777)
+        self.cache.load(self.main)
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+        self.assertEqual(0o777, os.stat(self.cache.cache_dir).st_mode & 0o777)
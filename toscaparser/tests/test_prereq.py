@@ -10,15 +10,25 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import io
 import os
 import shutil
 import zipfile
 
+import fixtures
+
 from toscaparser.common.exception import URLException
 from toscaparser.common.exception import ValidationError
 from toscaparser.prereq.csar import CSAR
+from toscaparser.tests.base import HTTPServerFixture
 from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
 import toscaparser.utils
+from toscaparser.utils import urlfile
+from toscaparser.utils import urlutils
+from toscaparser.utils.urlutils import UrlUtils
+from toscaparser.utils import zipfs
 from toscaparser.utils.gettextutils import _
 
 
@@ -228,3 +238,233 @@ class CSARPrereqTest(TestCase):
         self.assertTrue(csar.validate())
         self.assertTrue(csar.temp_dir is None or
                         not os.path.exists(csar.temp_dir))
+
+    def test_parse_without_extraction(self):
+        def fail(*args, **kwargs):
+            self.fail('The CSAR was extracted.')
+        self.useFixture(fixtures.MonkeyPatch(
+            'zipfile.ZipFile.extractall', fail))
+        self.useFixture(fixtures.MonkeyPatch(
+            'zipfile.ZipFile.extract', fail))
+        path = os.path.join(self.base_path, "data/CSAR/csar_elk.zip")
+        csar = CSAR(path)
+        self.assertTrue(csar.validate())
+        self.assertIsNone(csar.temp_dir)
+
+        tosca = ToscaTemplate(path, parsed_params={"my_cpus": 4})
+        self.assertEqual(os.path.join(path, 'Definitions', 'tosca_elk.yaml'),
+                         tosca.template_path)
+        self.assertIn('tosca.nodes.SoftwareComponent.Logstash',
+                      tosca.custom_defs)
+        # the members are only readable while the CSAR is parsed
+        self.assertFalse(zipfs.isfile(tosca.template_path))
+
+    def test_extract_member(self):
+        path = os.path.join(self.base_path, "data/CSAR/csar_elk.zip")
+        csar = CSAR(path)
+        script = csar.extract('Scripts/kibana/start.sh')
+        self.addCleanup(shutil.rmtree, csar.temp_dir)
+        self.assertEqual(os.path.join(csar.temp_dir, 'Scripts', 'kibana',
+                                      'start.sh'), script)
+        with open(script, 'rb') as f:
+            self.assertEqual(zipfile.ZipFile(path).read(
+                'Scripts/kibana/start.sh'), f.read())
+        self.assertEqual(['Scripts'], os.listdir(csar.temp_dir))
+        csar.close()
+
+    def test_read_artifact_after_parse(self):
+        path = os.path.join(self.base_path, "data/CSAR/csar_elk.zip")
+        tosca = ToscaTemplate(path, parsed_params={"my_cpus": 4})
+        # the path of the main template is virtual
+        self.assertFalse(os.path.exists(tosca.template_path))
+        self.assertIsNone(tosca.csar.zfile)
+        kibana = [node for node in tosca.nodetemplates
+                  if node.name == 'kibana'][0]
+        create = [op.implementation for op in kibana.interfaces
+                  if op.name == 'create'][0]
+        self.assertEqual('../Scripts/kibana/create.sh', create)
+        member = os.path.relpath(
+            os.path.join(os.path.dirname(tosca.template_path), create), path)
+        script = tosca.csar.extract(member.replace(os.sep, '/'))
+        self.addCleanup(shutil.rmtree, tosca.csar.temp_dir)
+        with open(script, 'rb') as f:
+            self.assertEqual(zipfile.ZipFile(path).read(
+                'Scripts/kibana/create.sh'), f.read())
+        tosca.csar.close()
+
+    def test_template_file_on_disk(self):
+        path = os.path.join(self.base_path, "data/CSAR/csar_elk.zip")
+        tosca = ToscaTemplate(path, parsed_params={"my_cpus": 4})
+        self.assertIsNone(tosca.csar.temp_dir)
+        template = tosca.path
+        self.addCleanup(shutil.rmtree, tosca.csar.temp_dir)
+        self.assertEqual(os.path.join(tosca.csar.temp_dir, 'Definitions',
+                                      'tosca_elk.yaml'), template)
+        self.assertTrue(os.path.isfile(os.path.join(
+            os.path.dirname(tosca.path), '..', 'Scripts', 'kibana',
+            'create.sh')))
+
+    def test_url_template_closed_after_parse(self):
+        server, data = self._serve_csar()
+        tosca = ToscaTemplate(server.url + '/csar.zip', a_file=False)
+        self.assertIsNone(tosca.csar.csar)
+        self.assertEqual(1, len(server.requested('/csar.zip')))
+        # downloaded again to be decompressed
+        template = tosca.path
+        self.addCleanup(shutil.rmtree, tosca.csar.temp_dir)
+        with open(template, 'rb') as f:
+            self.assertEqual(zipfile.ZipFile(io.BytesIO(data)).read(
+                'tosca_helloworld.yaml'), f.read())
+        self.assertEqual(2, len(server.requested('/csar.zip')))
+        tosca.csar.close()
+
+        # the archive changed since it was parsed
+        csar = CSAR(server.url + '/csar.zip', False)
+        self.assertTrue(csar.validate())
+        csar.close()
+        buf = io.BytesIO(data)
+        with zipfile.ZipFile(buf, 'a') as zf:
+            zf.writestr('Artifacts/new.txt', b'new')
+        server.files['/csar.zip'] = buf.getvalue()
+        error = self.assertRaises(IOError, csar.extract,
+                                  'tosca_helloworld.yaml')
+        self.assertEqual(_('The CSAR "%s" has changed.') % csar.path,
+                         str(error))
+
+    def _serve_csar(self, image_size=0):
+        path = os.path.join(self.base_path, "data/CSAR/csar_hello_world.zip")
+        with open(path, 'rb') as f:
+            data = f.read()
+        if image_size:
+            # add a large artifact the validation does not need to read
+            buf = io.BytesIO(data)
+            with zipfile.ZipFile(buf, 'a') as zf:
+                zf.writestr('Artifacts/image.img', os.urandom(image_size))
+            data = buf.getvalue()
+        server = self.useFixture(HTTPServerFixture({'/csar.zip': data}))
+        return server, data
+
+    def test_url_download(self):
+        server, data = self._serve_csar()
+        csar = CSAR(server.url + '/csar.zip', False)
+        self.assertTrue(csar.validate())
+        self.assertEqual(hashlib.sha256(data).hexdigest(), csar.sha256)
+        self.assertEqual(1, len(server.requested('/csar.zip')))
+        csar.close()
+
+    def test_url_range_requests(self):
+        server, data = self._serve_csar(4 * 1024 * 1024)
+        url = server.url + '/csar.zip'
+        csar = CSAR(url, False, max_memory=1024 * 1024)
+        self.assertTrue(csar.validate())
+        self.assertIsInstance(csar.csar, urlfile.RangeFile)
+        self.assertIsNone(csar.sha256)
+        gets = server.requested('/csar.zip')
+        self.assertTrue(all('range' in [h.lower() for h in headers]
+                            for _, _, headers in gets))
+        self.assertLess(csar.csar.fetched, len(data) // 8)
+        self.assertEqual('tosca_helloworld.yaml', csar.get_main_template())
+        csar.close()
+
+        self.patch(urlfile, 'SPOOL_MAX_MEMORY', 1024 * 1024)
+        tosca = ToscaTemplate(url, a_file=False)
+        self.assertEqual(['my_server'],
+                         [node.name for node in tosca.nodetemplates])
+        # the download is closed once parsed and opened again on demand
+        self.assertIsNone(tosca.csar.csar)
+        script = tosca.csar.extract('tosca_helloworld.yaml')
+        self.addCleanup(shutil.rmtree, tosca.csar.temp_dir)
+        self.assertIsInstance(tosca.csar.csar, urlfile.RangeFile)
+        with open(script, 'rb') as f:
+            self.assertEqual(zipfile.ZipFile(io.BytesIO(data)).read(
+                'tosca_helloworld.yaml'), f.read())
+        tosca.csar.close()
+
+    def test_url_changed_while_read(self):
+        server, data = self._serve_csar(4 * 1024 * 1024)
+        csar = CSAR(server.url + '/csar.zip', False, max_memory=1024 * 1024)
+        self.assertTrue(csar.validate())
+        etag = csar.csar.etag
+        self.assertIsNotNone(etag)
+        self.assertEqual([etag], list(set(
+            dict((k.lower(), v) for k, v in headers.items()).get('if-range')
+            for _, _, headers in server.requested('/csar.zip'))))
+        # a new version is uploaded while the archive is read
+        server.files['/csar.zip'] = data + b'\0'
+        error = self.assertRaises(IOError, csar.csar.read)
+        self.assertEqual('The content of "%s" changed while it was read.'
+                         % csar.path, str(error))
+        csar.close()
+
+    def test_url_head_not_allowed(self):
+        server, data = self._serve_csar()
+        server.allow_head = False
+        csar = CSAR(server.url + '/csar.zip', False)
+        self.assertTrue(csar.validate())
+        self.assertEqual(hashlib.sha256(data).hexdigest(), csar.sha256)
+        self.assertEqual(1, len(server.requested('/csar.zip', 'HEAD')))
+        self.assertEqual(1, len(server.requested('/csar.zip')))
+        csar.close()
+
+    def test_url_not_found(self):
+        server, data = self._serve_csar()
+        path = server.url + '/missing.zip'
+        csar = CSAR(path, False)
+        error = self.assertRaises(URLException, csar.validate)
+        self.assertEqual(_('Failed to reach server "%s". Reason is: '
+                           'Not Found.') % path, str(error))
+
+    def test_external_references_checked_concurrently(self):
+        server = self.useFixture(HTTPServerFixture(
+            dict(('/scripts/%d.sh' % i, b'#!/bin/sh\n') for i in range(8)),
+            delay=0.2))
+        self.addCleanup(UrlUtils.clear_checked_urls)
+        artifacts = ''.join(
+            '          script%d: %s/scripts/%d.sh\n' % (i, server.url, i)
+            for i in range(8))
+        main_tpl = (
+            'tosca_definitions_version: tosca_simple_yaml_1_0\n'
+            'topology_template:\n'
+            '  node_templates:\n'
+            '    server:\n'
+            '      type: tosca.nodes.Compute\n'
+            '      artifacts:\n' + artifacts +
+            '          missing: %s/scripts/missing.sh\n'
+            '      interfaces:\n'
+            '        Standard:\n'
+            '          create: %s/scripts/0.sh\n' % (server.url, server.url))
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'csar.zip')
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('TOSCA-Metadata/TOSCA.meta',
+                        'Entry-Definitions: main.yaml\n')
+            zf.writestr('main.yaml', main_tpl)
+
+        error = self.assertRaises(URLException, CSAR(path).validate)
+        self.assertEqual(_('The resource at "%s/scripts/missing.sh" cannot '
+                           'be accessed.') % server.url, str(error))
+        # every URL is checked once with a HEAD request, a few at a time,
+        # and again with a GET request when HEAD fails
+        self.assertEqual([('GET', '/scripts/missing.sh')],
+                         [r[:2] for r in server.requests if r[0] != 'HEAD'])
+        self.assertEqual(10, len(server.requests))
+        self.assertTrue(1 < server.max_active <= 4)
+
+        # the accessible URLs are not checked again
+        self.assertRaises(URLException, CSAR(path).validate)
+        self.assertEqual(12, len(server.requests))
+        self.assertEqual(2, len(server.requested('/scripts/missing.sh')))
+
+    def test_url_check_head_rejected(self):
+        server = self.useFixture(HTTPServerFixture(
+            {'/script.sh': b'#!/bin/sh\n'}, allow_head=False,
+            head_status=403))
+        self.addCleanup(UrlUtils.clear_checked_urls)
+        self.patch(urlutils, 'CHECK_CACHE_SIZE', 2)
+        urls = ['%s/script.sh?%d' % (server.url, i) for i in range(3)]
+        self.assertEqual(dict.fromkeys(urls, True),
+                         UrlUtils.urls_accessible(urls, max_workers=1))
+        self.assertEqual(3, len([r for r in server.requests
+                                 if r[0] == 'GET']))
+        # the least recently checked URL is forgotten
+        self.assertEqual(urls[1:], list(UrlUtils._checked))
@@ -10,6 +10,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
+import dateutil.parser
 from testtools import matchers
 
 from toscaparser.common import exception
@@ -18,6 +21,7 @@ from toscaparser.nodetemplate import NodeTemplate
 from toscaparser.properties import Property
 from toscaparser.tests.base import TestCase
 from toscaparser.utils.gettextutils import _
+from toscaparser.utils import validateutils
 from toscaparser.utils import yamlparser
 
 
@@ -179,6 +183,39 @@ class PropertyTest(TestCase):
         self.assertIsNone(propertyInstance.validate())
         self.assertEqual("2015-04-01", propertyInstance.value)
 
+    def test_timestamp_fast_path(self):
+        # the canonical and ISO 8601 forms are not parsed by dateutil
+        def parse(value):
+            self.fail('"%s" was parsed by dateutil.' % value)
+        self.patch(dateutil.parser, 'parse', parse)
+        test_property_schema = {'type': 'timestamp'}
+        for value in ('2015-04-01T02:59:43.1Z', '2001-12-14t21:59:43.10-05:00',
+                      '2001-12-14 21:59:43.10 -5', '2001-12-15 2:59:43.10',
+                      '2002-12-14', '2012-02-29T23:59:59+05:30'):
+            propertyInstance = Property('test_property', value,
+                                        test_property_schema)
+            self.assertIsNone(propertyInstance.validate())
+
+    def test_timestamp_native(self):
+        # unquoted timestamps are constructed by the YAML loader
+        test_property_schema = {'type': 'timestamp'}
+        tpl = yamlparser.simple_parse('''
+        canonical: 2001-12-15T02:59:43.1Z
+        date: 2002-12-14
+        ''')
+        self.assertIsInstance(tpl['canonical'], datetime.datetime)
+        self.assertIsInstance(tpl['date'], datetime.date)
+        for value in tpl.values():
+            propertyInstance = Property('test_property', value,
+                                        test_property_schema)
+            self.assertIsNone(propertyInstance.validate())
+
+    def test_timestamp_strict_forms(self):
+        for value in ('2015-04-115T02:59:43.1Z', '2015-13-01', '2015-02-29',
+                      '2015-04-01 24:00:00', '2015-04-01T10:00:00+25',
+                      '2015-04-01T10:00:00.', '15-04-01', 'April 1, 2015'):
+            self.assertFalse(validateutils._is_timestamp(value), value)
+
     def test_timestamp_invalid(self):
         test_property_schema = {'type': 'timestamp'}
         # invalid timestamp - day out of range
@@ -0,0 +1,198 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import socket
+import stat
+import threading
+
+import fixtures
+from six.moves import http_client
+
+from toscaparser import model_cache
+from toscaparser import server
+from toscaparser.tests.base import TestCase
+
+
+class ServerTest(TestCase):
+
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'data')
+    valid_tpl = os.path.join(data_dir, 'tosca_helloworld.yaml')
+    invalid_tpl = os.path.join(data_dir,
+                               'test_multiple_validation_errors.yaml')
+    csar = os.path.join(data_dir, 'CSAR/csar_hello_world.zip')
+
+    def setUp(self):
+        super(ServerTest, self).setUp()
+        self.tmp_dir = self.useFixture(fixtures.TempDir()).path
+        # the token of the TCP servers
+        self.useFixture(fixtures.EnvironmentVariable('XDG_RUNTIME_DIR',
+                                                     self.tmp_dir))
+
+    def _start(self, address=None, cache=None):
+        address = address or os.path.join(self.tmp_dir, 'server.sock')
+        validation_server = server.ValidationServer(address, cache)
+        thread = threading.Thread(target=validation_server.serve_forever,
+                                  kwargs={'poll_interval': 0.05})
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(validation_server.server_close)
+        self.addCleanup(validation_server.shutdown)
+        client = server.Client(validation_server.address)
+        self.addCleanup(client.close)
+        return validation_server, client
+
+    def test_parse_address(self):
+        self.assertEqual((socket.AF_INET, ('127.0.0.1', 8080)),
+                         server.parse_address('8080'))
+        self.assertEqual((socket.AF_INET, ('0.0.0.0', 8080)),
+                         server.parse_address('0.0.0.0:8080'))
+        self.assertEqual((socket.AF_UNIX, '/run/tosca.sock'),
+                         server.parse_address('/run/tosca.sock'))
+
+    def test_validate_path(self):
+        validation_server, client = self._start()
+        self.assertEqual(
+            stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR,
+            stat.S_IMODE(os.stat(validation_server.address).st_mode))
+        result = client.validate(self.valid_tpl)
+        self.assertEqual(self.valid_tpl, result['path'])
+        self.assertTrue(result['valid'])
+        result = client.validate(self.invalid_tpl)
+        self.assertFalse(result['valid'])
+        self.assertIn('ImportError: Import "custom_types/not_there.yaml" '
+                      'is not valid.', result['errors'])
+        self.assertEqual(2, client.status()['requests'])
+
+    def test_validate_template(self):
+        _server, client = self._start('127.0.0.1:0')
+        with open(self.valid_tpl) as f:
+            template = f.read()
+        self.assertTrue(client.validate(template=template)['valid'])
+        result = client.validate(
+            template=template.replace('tosca.nodes.Compute',
+                                      'tosca.nodes.Unknown'))
+        self.assertFalse(result['valid'])
+        self.assertIsNone(result['path'])
+
+    def test_tcp_requests(self):
+        validation_server, client = self._start('127.0.0.1:0')
+        self.assertTrue(client.validate(self.valid_tpl)['valid'])
+        token = server.get_token()
+        self.assertEqual(validation_server.token, token)
+        self.assertEqual(stat.S_IRUSR | stat.S_IWUSR, stat.S_IMODE(
+            os.stat(server.token_file()).st_mode))
+        body = json.dumps({'path': self.valid_tpl})
+        json_type = {'Content-Type': 'application/json'}
+
+        def request(method, headers, host='127.0.0.1'):
+            connection = http_client.HTTPConnection(
+                *validation_server.server_address)
+            self.addCleanup(connection.close)
+            connection.putrequest(method, '/validate', skip_host=True)
+            headers = dict(headers, Host='%s:%s' % (
+                host, validation_server.server_address[1]))
+            if method == 'POST':
+                headers['Content-Length'] = str(len(body))
+            for header, value in headers.items():
+                connection.putheader(header, value)
+            connection.endheaders()
+            if method == 'POST':
+                connection.send(body.encode('utf-8'))
+            response = connection.getresponse()
+            response.read()
+            return response.status
+
+        with_token = dict(json_type, **{server.TOKEN_HEADER: token})
+        self.assertEqual(200, request('POST', with_token))
+        self.assertEqual(200, request('POST', with_token, 'localhost'))
+        self.assertEqual(403, request('POST', json_type))
+        self.assertEqual(403, request('GET', {}))
+        self.assertEqual(403, request('POST', with_token, 'attacker.test'))
+        self.assertEqual(415, request('POST', dict(
+            with_token, **{'Content-Type': 'text/plain'})))
+        client = server.Client(validation_server.address, token='invalid')
+        self.addCleanup(client.close)
+        self.assertRaises(ValueError, client.validate, self.valid_tpl)
+
+    def test_validate_csar(self):
+        _server, client = self._start()
+        with open(self.csar, 'rb') as f:
+            result = client.validate(csar=f.read())
+        self.assertTrue(result['valid'])
+        self.assertFalse(client.validate(csar=b'not a zip')['valid'])
+
+    def test_parsed_params(self):
+        _server, client = self._start()
+        tpl = os.path.join(self.data_dir,
+                           'tosca_single_instance_wordpress.yaml')
+        params = {'db_name': 'my_wordpress', 'db_user': 'my_db_user',
+                  'db_root_pwd': '12345678'}
+        self.assertTrue(client.validate(tpl, parsed_params=params)['valid'])
+
+    def test_model_cache(self):
+        cache = model_cache.ModelCache(os.path.join(self.tmp_dir, 'models'))
+        _server, client = self._start(cache=cache)
+        for _ in range(2):
+            self.assertTrue(client.validate(self.valid_tpl)['valid'])
+        self.assertEqual({'hits': 1, 'misses': 1},
+                         client.status()['model_cache'])
+
+    def test_invalid_request(self):
+        _server, client = self._start()
+        error = self.assertRaises(ValueError, client.validate)
+        self.assertEqual('The request has no "path", "template" or "csar".',
+                         str(error))
+        self.assertRaises(ValueError, client.validate, self.valid_tpl,
+                          parsed_params=['db_name'])
+        self.assertTrue(client.validate(self.valid_tpl)['valid'])
+
+    def test_stale_socket(self):
+        address = os.path.join(self.tmp_dir, 'server.sock')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(address)
+        sock.close()
+        _server, client = self._start(address)
+        self.assertTrue(client.validate(self.valid_tpl)['valid'])
+        self.assertRaises(socket.error, server.ValidationServer, address)
+
+    def test_default_address(self):
+        self.useFixture(fixtures.EnvironmentVariable('XDG_RUNTIME_DIR',
+                                                     self.tmp_dir))
+        self.assertEqual(
+            os.path.join(self.tmp_dir, 'tosca-parser', 'server.sock'),
+            server.default_address())
+        validation_server, client = self._start(server.default_address())
+        self.assertTrue(client.validate(self.valid_tpl)['valid'])
+        validation_server.server_close()
+        validation_server = server.ValidationServer()
+        self.addCleanup(validation_server.server_close)
+        self.assertEqual(
+            stat.S_IRWXU, stat.S_IMODE(os.stat(os.path.dirname(
+                validation_server.address)).st_mode))
+
+    def test_socket_of_other_user(self):
+        validation_server, client = self._start()
+        self.assertTrue(client.validate(self.valid_tpl)['valid'])
+        client.close()
+        uid = os.getuid()
+        self.patch(os, 'getuid', lambda: uid + 1)
+        # an impostor listening on the socket before the server
+        self.assertRaises(socket.error, client.validate, self.valid_tpl)
+        self.assertRaises(socket.error, server.ValidationServer,
+                          validation_server.address)
+
+    def test_server_not_running(self):
+        client = server.Client(os.path.join(self.tmp_dir, 'missing.sock'))
+        self.assertRaises(socket.error, client.validate, self.valid_tpl)
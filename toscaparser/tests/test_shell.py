@@ -11,8 +11,11 @@
 #    under the License.
 
 import os
+import threading
 
-from toscaparser.common import exception
+import fixtures
+
+from toscaparser import server
 import toscaparser.shell as shell
 from toscaparser.tests.base import TestCase
 from toscaparser.utils.gettextutils import _
@@ -41,7 +44,9 @@ class ShellTest(TestCase):
 
     def test_template_invalid(self):
         arg = '--template-file=' + self.errornous_template
-        self.assertRaises(exception.ValidationError, shell.main, [arg])
+        # the errors are reported and the shell exits with an error
+        error = self.assertRaises(SystemExit, shell.main, [arg])
+        self.assertEqual(1, error.code)
 
     def test_template_valid(self):
         arg = '--template-file=' + self.tosca_helloworld
@@ -49,3 +54,28 @@ class ShellTest(TestCase):
             shell.main([arg])
         except Exception:
             self.fail(_('The program raised an exception unexpectedly.'))
+
+    def test_batch(self):
+        error = self.assertRaises(
+            SystemExit, shell.main,
+            ['--batch', self.tosca_helloworld, self.errornous_template,
+             '--jobs', '1'])
+        self.assertEqual(1, error.code)
+
+    def test_server(self):
+        address = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                               'server.sock')
+        validation_server = server.ValidationServer(address)
+        thread = threading.Thread(target=validation_server.serve_forever,
+                                  kwargs={'poll_interval': 0.05})
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(validation_server.server_close)
+        self.addCleanup(validation_server.shutdown)
+        for template, code in ((self.tosca_helloworld, 0),
+                               (self.errornous_template, 1)):
+            error = self.assertRaises(
+                SystemExit, shell.main,
+                ['--server=' + address, '--template-file=' + template])
+            self.assertEqual(code, error.code)
+        self.assertEqual(2, validation_server.requests)
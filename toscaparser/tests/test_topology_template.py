@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import os
 
 from toscaparser.common import exception
@@ -168,6 +169,36 @@ class TopologyTemplateTest(TestCase):
                 if props and 'mem_size' in props.keys():
                     self.assertEqual(props['mem_size'].value, '4096 MB')
 
+    def test_lookup_by_name(self):
+        self.assertIs(self.topo.nodetemplates[0],
+                      self.topo.get_node_template(
+                          self.topo.nodetemplates[0].name))
+        self.assertEqual('webserver_group',
+                         self.topo.get_group('webserver_group').name)
+        self.assertEqual('receiver_ip',
+                         self.topo.get_output('receiver_ip').name)
+        self.assertEqual('mq_server_ip',
+                         self.topo.get_input('mq_server_ip').name)
+        self.assertIsNone(self.topo.get_node_template('unknown'))
+        self.assertIsNone(self.topo.get_policy('unknown'))
+
+        # the misses do not build the index again
+        index = self.topo._indexes['nodetemplates']
+        self.assertIsNone(self.topo.get_node_template('unknown'))
+        self.assertIs(index, self.topo._indexes['nodetemplates'])
+
+        # the index follows the lists assigned to the topology template
+        node = self.topo.nodetemplates[-1]
+        self.topo.nodetemplates = self.topo.nodetemplates[:-1]
+        self.assertIsNone(self.topo.get_node_template(node.name))
+        self.topo.nodetemplates = [node]
+        self.assertIs(node, self.topo.get_node_template(node.name))
+        other = copy.copy(node)
+        other.name = 'other'
+        self.topo.nodetemplates = [other]
+        self.assertIsNone(self.topo.get_node_template(node.name))
+        self.assertIs(other, self.topo.get_node_template('other'))
+
     def test_system_template(self):
         tpl_path = os.path.join(
             os.path.dirname(os.path.abspath(__file__)),
@@ -179,6 +210,20 @@ class TopologyTemplateTest(TestCase):
                 nested_tosca_templates_with_topology), 4)
         self.assertTrue(system_tosca_template.has_nested_templates())
 
+    def test_system_template_loads_imports_once(self):
+        tpl_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data/topology_template/system.yaml")
+        system_tosca_template = ToscaTemplate(tpl_path)
+        # the three imported subsystems and the definitions they import
+        self.assertEqual(4, system_tosca_template.import_loads)
+        custom_defs = system_tosca_template.custom_defs
+        self.assertIs(custom_defs,
+                      system_tosca_template.topology_template.custom_defs)
+        for nested in system_tosca_template.\
+                nested_tosca_templates_with_topology:
+            self.assertIs(custom_defs, nested.custom_defs)
+
     def test_invalid_keyname(self):
         tpl_snippet = '''
         substitution_mappings:
@@ -344,3 +344,42 @@ class ToscaDefTest(TestCase):
             sorted(['protocol', 'target', 'target_range', 'source',
                     'source_range']),
             sorted(properties.keys()))
+
+    def test_parent_type_is_memoized(self):
+        node_type = NodeType('tosca.nodes.WebServer')
+        self.assertIs(node_type.parent_type, node_type.parent_type)
+        self.assertEqual('tosca.nodes.SoftwareComponent',
+                         node_type.parent_type.type)
+
+    def test_resolved_definitions_cache(self):
+        EntityType.resolved_defs.clear()
+        first = NodeType('tosca.nodes.WebServer')
+        requirements = first.get_value(first.REQUIREMENTS, parent=True)
+        misses = EntityType.resolved_defs.misses
+        second = NodeType('tosca.nodes.WebServer')
+        self.assertEqual(requirements,
+                         second.get_value(second.REQUIREMENTS, parent=True))
+        self.assertEqual(misses, EntityType.resolved_defs.misses)
+        self.assertTrue(EntityType.resolved_defs.hits > 0)
+
+        # callers get their own copy of the resolved value
+        requirements.append({'extra': {'node': 'tosca.nodes.Root'}})
+        self.assertNotIn({'extra': {'node': 'tosca.nodes.Root'}},
+                         second.get_value(second.REQUIREMENTS, parent=True))
+
+    def test_resolved_definitions_per_custom_def(self):
+        custom_def = {'mycompany.nodes.Server': {
+            'derived_from': 'tosca.nodes.Compute',
+            'attributes': {'location': {'type': 'string'}}}}
+        other_def = {'mycompany.nodes.Server': {
+            'derived_from': 'tosca.nodes.Root'}}
+        server = NodeType('mycompany.nodes.Server', custom_def)
+        other = NodeType('mycompany.nodes.Server', other_def)
+        self.assertIn('location', server.get_value(server.ATTRIBUTES,
+                                                   parent=True))
+        self.assertIn('public_address', server.get_value(server.ATTRIBUTES,
+                                                         parent=True))
+        self.assertNotIn('location', other.get_value(other.ATTRIBUTES,
+                                                     parent=True))
+        self.assertNotIn('public_address',
+                         other.get_value(other.ATTRIBUTES, parent=True))
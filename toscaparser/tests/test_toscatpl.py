@@ -12,6 +12,10 @@
 
 import os
 import six
+import subprocess
+import sys
+import testtools
+
 from toscaparser.common import exception
 import toscaparser.elements.interfaces as ifaces
 from toscaparser.elements.nodetype import NodeType
@@ -241,6 +245,22 @@ class ToscaTemplateTest(TestCase):
                             self.assertEqual(artifact,
                                              interface.implementation)
 
+    def test_relationships_share_node_templates(self):
+        created = NodeTemplate.created
+        template = ToscaTemplate(self.tosca_elk_tpl)
+        self.assertEqual(len(template.nodetemplates),
+                         NodeTemplate.created - created)
+        topology = template.topology_template
+        targets = 0
+        for node_tpl in template.nodetemplates:
+            for target in node_tpl.relationships.values():
+                self.assertIs(topology.get_node_template(target.name),
+                              target)
+                targets += 1
+        self.assertTrue(targets)
+        self.assertEqual(len(template.nodetemplates),
+                         NodeTemplate.created - created)
+
     def test_relationship(self):
         template = ToscaTemplate(self.tosca_elk_tpl)
         for node_tpl in template.nodetemplates:
@@ -524,6 +544,27 @@ class ToscaTemplateTest(TestCase):
                                  'TestRsyslogType']
         self.assertItemsEqual(tosca.topology_template.custom_defs.keys(),
                               expected_custom_types)
+        self.assertEqual(6, tosca.import_loads)
+
+    def test_custom_defs_are_read_only(self):
+        tosca_tpl = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data/test_instance_nested_imports.yaml")
+        custom_defs = ToscaTemplate(tosca_tpl).custom_defs
+        self.assertRaises(TypeError, custom_defs.__setitem__, 'a', {})
+        self.assertRaises(TypeError, custom_defs.update, {'a': {}})
+        self.assertRaises(TypeError, custom_defs.pop,
+                          'Test2ndRsyslogType')
+        self.assertIn('Test2ndRsyslogType', custom_defs)
+
+    def test_imported_relationship_types(self):
+        tosca_tpl = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data/relationship/test_custom_relationship.yaml")
+        tosca = ToscaTemplate(tosca_tpl)
+        self.assertEqual(['tosca.relationships.HA'],
+                         list(tosca.relationship_types.keys()))
+        self.assertEqual(1, tosca.import_loads)
 
     def test_invalid_template_file(self):
         template_file = 'invalid template file'
@@ -911,3 +952,44 @@ class ToscaTemplateTest(TestCase):
             os.path.dirname(os.path.abspath(__file__)),
             "data/test_custom_capabilty.yaml")
         ToscaTemplate(tosca_tpl)
+
+    @testtools.skipIf(six.PY2, 'asyncio is not available')
+    def test_load_async(self):
+        import asyncio
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        tosca_tpls = [self.tosca_tpl, self.tosca_elk_tpl]
+        params = [self.params, None]
+        templates = loop.run_until_complete(asyncio.gather(
+            *[ToscaTemplate.load_async(tpl, param, loop=loop)
+              for tpl, param in zip(tosca_tpls, params)]))
+        self.assertEqual(tosca_tpls,
+                         [tosca.input_path for tosca in templates])
+        self.assertEqual(
+            sorted(node.name for node in self.tosca.nodetemplates),
+            sorted(node.name for node in templates[0].nodetemplates))
+
+    @testtools.skipIf(six.PY2, 'asyncio is not available')
+    def test_load_async_invalid_template(self):
+        import asyncio
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        tosca_tpl = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data/test_multiple_validation_errors.yaml")
+        self.assertRaises(exception.ValidationError,
+                          loop.run_until_complete,
+                          ToscaTemplate.load_async(tosca_tpl, loop=loop))
+
+    def test_optional_modules_not_imported(self):
+        # the CSAR, URL and dateutil support is only loaded on first use
+        modules = ['dateutil', 'requests', 'toscaparser.prereq.csar',
+                   'urllib.request']
+        code = ('import sys; import toscaparser.tosca_template; '
+                'print(" ".join(m for m in %r if m in sys.modules))' % modules)
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=root)
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         env=env)
+        self.assertEqual('', output.decode('utf-8').strip())
@@ -21,6 +21,7 @@ from toscaparser.parameters import Output
 from toscaparser.policy import Policy
 from toscaparser.relationship_template import RelationshipTemplate
 from toscaparser.repositories import Repository
+from toscaparser.tests.base import HTTPServerFixture
 from toscaparser.tests.base import TestCase
 from toscaparser.topology_template import TopologyTemplate
 from toscaparser.tosca_template import ToscaTemplate
@@ -485,6 +486,49 @@ heat-translator/master/translator/tests/data/custom_types/wordpress.yaml
                                 tpl_snippet, path, None)
         self.assertEqual(errormsg, err.__str__())
 
+    def test_imports_fetched_concurrently(self):
+        server = self.useFixture(HTTPServerFixture({
+            '/types/a.yaml': b'''
+node_types:
+  example.nodes.A: {derived_from: tosca.nodes.Root}
+  example.nodes.Shared: {description: a}
+''',
+            '/types/b.yaml': b'''
+node_types:
+  example.nodes.B: {derived_from: tosca.nodes.Root}
+  example.nodes.Shared: {description: b}
+''',
+            '/repo/c.yaml': b'''
+node_types:
+  example.nodes.C: {derived_from: tosca.nodes.Root}
+'''}, delay=0.2))
+        imports = [{'a': server.url + '/types/a.yaml'},
+                   'b.yaml',
+                   {'c': {'file': 'c.yaml', 'repository': 'repo'}}]
+        tpl = {'repositories': {'repo': {'url': server.url + '/repo/'}}}
+        loader = ImportsLoader(imports, server.url + '/types/main.yaml',
+                               'node_types', tpl)
+        custom_defs = loader.get_custom_defs()
+        self.assertEqual(['example.nodes.A', 'example.nodes.B',
+                          'example.nodes.C', 'example.nodes.Shared'],
+                         sorted(custom_defs.keys()))
+        # the imports are still merged in their order of declaration
+        self.assertEqual('b',
+                         custom_defs['example.nodes.Shared']['description'])
+        self.assertEqual(3, len(server.requests))
+        self.assertTrue(server.max_active > 1)
+
+    def test_imports_fetch_error(self):
+        server = self.useFixture(HTTPServerFixture({
+            '/a.yaml': b'node_types: {}\n'}))
+        imports = [server.url + '/a.yaml', server.url + '/missing.yaml']
+        err = self.assertRaises(exception.URLException, ImportsLoader,
+                                imports, server.url + '/main.yaml',
+                                'node_types')
+        self.assertEqual(_('Failed to reach server "%s/missing.yaml". '
+                           'Reason is: Not Found.') % server.url,
+                         err.__str__())
+
     def test_outputs(self):
         tpl_snippet = '''
         outputs:
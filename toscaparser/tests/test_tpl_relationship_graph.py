@@ -0,0 +1,86 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+from toscaparser.common.exception import CyclicDependencyError
+from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
+import toscaparser.utils.yamlparser
+
+
+class ToscaGraphTest(TestCase):
+
+    cyclic_template = '''
+tosca_definitions_version: tosca_simple_yaml_1_0
+topology_template:
+  node_templates:
+    server:
+      type: tosca.nodes.Compute
+    app:
+      type: tosca.nodes.SoftwareComponent
+      requirements:
+        - host: server
+        - dependency: web
+    web:
+      type: tosca.nodes.SoftwareComponent
+      requirements:
+        - host: server
+        - dependency: app
+    db:
+      type: tosca.nodes.SoftwareComponent
+      requirements:
+        - host: server
+'''
+
+    def _names(self, nodes):
+        return [node.name for node in nodes]
+
+    def _graph(self, template):
+        return ToscaTemplate(yaml_dict_tpl=toscaparser.utils.yamlparser.
+                             simple_parse(template)).graph
+
+    def test_deployment_waves(self):
+        tosca_tpl = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data/tosca_elk.yaml")
+        graph = ToscaTemplate(tosca_tpl).graph
+        waves = [sorted(self._names(wave))
+                 for wave in graph.deployment_waves()]
+        self.assertEqual(
+            [['app_server', 'elasticsearch_server', 'kibana_server',
+              'logstash_server', 'mongo_server'],
+             ['elasticsearch', 'mongo_dbms', 'nodejs'],
+             ['kibana', 'logstash', 'mongo_db'],
+             ['app_collectd', 'app_rsyslog', 'paypal_pizzastore']],
+            waves)
+
+        order = self._names(graph.topological_order())
+        self.assertEqual(sorted(graph.vertices), sorted(order))
+        for node in graph:
+            for required in graph.requirements(node.name):
+                self.assertLess(order.index(required.name),
+                                order.index(node.name))
+        self.assertEqual([], graph.cycles())
+
+    def test_cycles(self):
+        graph = self._graph(self.cyclic_template)
+        self.assertEqual(['app', 'db', 'web'], sorted(self._names(
+            graph.dependents('server'))))
+        self.assertEqual([['app', 'web']],
+                         [sorted(self._names(cycle))
+                          for cycle in graph.cycles()])
+        error = self.assertRaises(CyclicDependencyError,
+                                  graph.deployment_waves)
+        self.assertEqual('Node templates "app", "web" require each other.',
+                         str(error))
+        self.assertRaises(CyclicDependencyError, graph.topological_order)
@@ -0,0 +1,112 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from multiprocessing.pool import ThreadPool
+import os
+import warnings
+
+from toscaparser.common.exception import InvalidTypeError
+from toscaparser.common.exception import ValidationError
+from toscaparser.elements import entity_type
+from toscaparser.elements.entity_type import EntityType
+from toscaparser.elements.nodetype import NodeType
+from toscaparser.elements import type_registry
+from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
+from toscaparser.utils import yamlparser
+
+NFV_VERSION = 'tosca_simple_profile_for_nfv_1_0_0'
+MEC_VERSION = 'tosca_simple_profile_for_mec_1_0_0'
+VDU = 'tosca.nodes.nfv.VDU'
+
+PLAIN_TEMPLATE = '''
+tosca_definitions_version: tosca_simple_yaml_1_0
+topology_template:
+  node_templates:
+    server:
+      type: tosca.nodes.Compute
+'''
+
+
+class TypeRegistryTest(TestCase):
+
+    nfv_template = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'extensions', 'nfv', 'tests', 'data', 'tosca_helloworld_nfv.yaml')
+
+    def _plain_template(self, node_type='tosca.nodes.Compute'):
+        return ToscaTemplate(yaml_dict_tpl=yamlparser.simple_parse(
+            PLAIN_TEMPLATE.replace('tosca.nodes.Compute', node_type)))
+
+    def test_registries(self):
+        default = type_registry.get_registry()
+        nfv = type_registry.get_registry(NFV_VERSION)
+        self.assertIs(nfv, type_registry.get_registry(NFV_VERSION))
+        self.assertIs(default, type_registry.get_registry('unknown'))
+        self.assertEqual(type_registry.DEFAULT_VERSION, default.version)
+        self.assertIn(VDU, nfv.definitions)
+        self.assertNotIn(VDU, default.definitions)
+        self.assertNotIn(VDU, type_registry.get_registry(
+            MEC_VERSION).definitions)
+        self.assertRaises(TypeError, nfv.definitions.update, {})
+        self.assertRaises(TypeError, nfv.definitions.__setitem__, VDU, {})
+
+    def test_profile_types_not_leaked(self):
+        tpl = ToscaTemplate(self.nfv_template)
+        self.assertEqual(NFV_VERSION, tpl.type_registry.version)
+        self.assertNotIn(VDU, EntityType.TOSCA_DEF)
+        self.assertRaises(InvalidTypeError, NodeType, VDU)
+        error = self.assertRaises(ValidationError, self._plain_template, VDU)
+        self.assertIn('Type "%s" is not a valid type.' % VDU, str(error))
+
+    def test_types_built_after_parse(self):
+        # the entity types built from a parsed template use its registry
+        tpl = ToscaTemplate(self.nfv_template)
+        vdu = [node for node in tpl.nodetemplates if node.name == 'VDU1'][0]
+        self.assertIs(tpl.type_registry.definitions,
+                      vdu.type_definition.TOSCA_DEF)
+        capabilities = vdu.get_capabilities()
+        self.assertEqual('tosca.capabilities.nfv.VirtualBindable',
+                         capabilities['virtualbinding'].definition.type)
+        self.assertIs(tpl.type_registry.definitions,
+                      capabilities['virtualbinding'].definition.TOSCA_DEF)
+
+    def test_use(self):
+        nfv = type_registry.get_registry(NFV_VERSION)
+        with type_registry.use(nfv):
+            self.assertIs(nfv, type_registry.current())
+            self.assertIsNotNone(NodeType(VDU).defs)
+        self.assertIs(type_registry.get_registry(), type_registry.current())
+
+    def test_update_definitions_deprecated(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            registry = entity_type.update_definitions(NFV_VERSION)
+        self.assertIs(type_registry.get_registry(NFV_VERSION), registry)
+        self.assertEqual([DeprecationWarning],
+                         [warning.category for warning in caught])
+        self.assertNotIn(VDU, EntityType.TOSCA_DEF)
+
+    def test_concurrent_profiles(self):
+        def parse(i):
+            if i % 2:
+                tpl = ToscaTemplate(self.nfv_template)
+            else:
+                tpl = self._plain_template()
+            return tpl.type_registry.version, len(tpl.nodetemplates)
+        pool = ThreadPool(4)
+        try:
+            results = pool.map(parse, range(8))
+        finally:
+            pool.close()
+        self.assertEqual([(type_registry.DEFAULT_VERSION, 1),
+                          (NFV_VERSION, 4)] * 4, results)
@@ -0,0 +1,212 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+
+from toscaparser.common.exception import ExceptionCollector
+from toscaparser.common.exception import ValidationError
+from toscaparser.dependencies import Dependencies
+from toscaparser.nodetemplate import NodeTemplate
+from toscaparser.tests.base import TestCase
+from toscaparser.tosca_template import ToscaTemplate
+from toscaparser.utils import yamlparser
+
+TEMPLATE = '''
+tosca_definitions_version: tosca_simple_yaml_1_0
+topology_template:
+  inputs:
+    cpus:
+      type: integer
+      default: 2
+  node_templates:
+    app:
+      type: tosca.nodes.WebApplication
+      properties:
+        context_root: { get_property: [ web, component_version ] }
+      requirements:
+        - host: web
+    web:
+      type: tosca.nodes.WebServer
+      properties:
+        component_version: 2.4.1
+      requirements:
+        - host: server
+    server:
+      type: tosca.nodes.Compute
+      capabilities:
+        host:
+          properties:
+            num_cpus: { get_input: cpus }
+  groups:
+    webapp_group:
+      type: tosca.groups.Root
+      members: [ app, web ]
+  policies:
+    - placement:
+        type: tosca.policies.Placement
+        targets: [ webapp_group ]
+  outputs:
+    server_ip:
+      value: { get_attribute: [ server, private_address ] }
+'''
+
+
+class UpdateNodesTest(TestCase):
+
+    def setUp(self):
+        super(UpdateNodesTest, self).setUp()
+        self.tpl = yamlparser.simple_parse(TEMPLATE)
+        self.tosca = ToscaTemplate(yaml_dict_tpl=copy.deepcopy(self.tpl))
+
+    def _node_tpls(self):
+        return self.tpl['topology_template']['node_templates']
+
+    def _errors(self, update, *args):
+        try:
+            update(*args)
+        except ValidationError:
+            return sorted(ExceptionCollector.getExceptionsReport(False))
+        return []
+
+    def _model(self, tosca):
+        topology = tosca.topology_template
+        return {
+            'nodes': [(node.name, node.type,
+                       sorted(rel.type for rel in node.relationships),
+                       sorted((rel_tpl.type, rel_tpl.source.name)
+                              for rel_tpl in node.relationship_tpl))
+                      for node in tosca.nodetemplates],
+            'graph': [[node.name for node in wave]
+                      for wave in tosca.graph.deployment_waves()],
+            'groups': [(group.name,
+                        [node.name for node in group.get_member_nodes()])
+                       for group in topology.groups],
+            'policies': [(policy.name, [target.name
+                                        for target in policy.targets_list])
+                         for policy in tosca.policies],
+            'outputs': [(output.name, output.value.node_template_name)
+                        for output in tosca.outputs]}
+
+    def assertParsedAgain(self):
+        # the updated template is the one parsed from the same data
+        tpl = copy.deepcopy(self.tpl)
+        errors = self._errors(ToscaTemplate, None, None, True, tpl)
+        self.assertEqual(errors, sorted(
+            ExceptionCollector.getExceptionsReport(False)))
+        if not errors:
+            self.assertEqual(self._model(ToscaTemplate(yaml_dict_tpl=tpl)),
+                             self._model(self.tosca))
+
+    def test_update_property(self):
+        web = self._node_tpls()['web']
+        web['properties']['component_version'] = '2.4.2'
+        created = NodeTemplate.created
+        self.tosca.update_node('web', copy.deepcopy(web))
+        # the node template and the one reading its properties
+        self.assertEqual(2, NodeTemplate.created - created)
+        self.assertParsedAgain()
+        app = self.tosca.topology_template.get_node_template('app')
+        self.assertEqual(
+            '2.4.2', app.get_property_value('context_root').result())
+        topology = self.tosca.topology_template
+        self.assertIs(topology.get_node_template('web'),
+                      topology.groups[0].get_member_nodes()[1])
+
+    def test_errors_corrected(self):
+        server = self._node_tpls()['server']
+        invalid = copy.deepcopy(server)
+        invalid['capabilities']['host']['properties']['num_cpus'] = 0
+        self.assertEqual(
+            ['ValidationError: The value "0" of property "num_cpus" must be '
+             'greater than or equal to "1".'],
+            self._errors(self.tosca.update_node, 'server', invalid))
+        self.assertEqual(
+            [], self._errors(self.tosca.update_node, 'server',
+                             copy.deepcopy(server)))
+        self.assertParsedAgain()
+
+    def test_remove_node(self):
+        del self._node_tpls()['server']
+        errors = self._errors(self.tosca.update_node, 'server', None)
+        self.assertIn('KeyError: \'Node template "server" was not found in '
+                      '"web".\'', errors)
+        self.assertIn('KeyError: \'Node template "server" was not found.\'',
+                      errors)
+        self.assertParsedAgain()
+
+    def test_add_node(self):
+        self._node_tpls()['db'] = {'type': 'tosca.nodes.DBMS',
+                                   'requirements': [{'host': 'server'}]}
+        self._node_tpls()['web']['requirements'].append({'dependency': 'db'})
+        self.tosca.update_nodes(
+            {'db': copy.deepcopy(self._node_tpls()['db']),
+             'web': copy.deepcopy(self._node_tpls()['web'])})
+        self.assertParsedAgain()
+        self.assertEqual(['app', 'db', 'server', 'web'], sorted(
+            node.name for node in self.tosca.nodetemplates))
+
+    def test_invalid_group_member(self):
+        group = self.tpl['topology_template']['groups']['webapp_group']
+        group['members'] = ['app', 'server']
+        self.tosca.update(copy.deepcopy(self.tpl))
+        self.assertParsedAgain()
+        del self._node_tpls()['app']
+        errors = self._errors(self.tosca.update, copy.deepcopy(self.tpl))
+        self.assertIn('InvalidGroupTargetException: "Target member "app" is '
+                      'not found in node_templates"', errors)
+        self.assertParsedAgain()
+
+    def test_update(self):
+        created = NodeTemplate.created
+        self.tosca.update(copy.deepcopy(self.tpl))
+        self.assertEqual(created, NodeTemplate.created)
+        self._node_tpls()['server']['capabilities']['host']['properties'][
+            'num_cpus'] = 4
+        self.tosca.update(copy.deepcopy(self.tpl))
+        self.assertEqual(created + 1, NodeTemplate.created)
+        self.assertParsedAgain()
+
+        # the whole topology template is built again
+        created = NodeTemplate.created
+        ToscaTemplate(yaml_dict_tpl=copy.deepcopy(self.tpl))
+        parsed = NodeTemplate.created - created
+        self.tpl['topology_template']['inputs']['cpus']['default'] = 8
+        self.tosca.update(copy.deepcopy(self.tpl))
+        self.assertEqual(2 * parsed, NodeTemplate.created - created)
+        self.assertParsedAgain()
+
+        self.tpl['node_types'] = {'tosca.nodes.Other': {
+            'derived_from': 'tosca.nodes.Root'}}
+        self.assertRaises(ValueError, self.tosca.update, self.tpl)
+
+    def test_dependencies(self):
+        dependencies = Dependencies(self.tpl['topology_template'])
+        self.assertEqual(set(['app']), dependencies.readers('node', ['web']))
+        self.assertEqual(set(['web']),
+                         dependencies.readers('requirement', ['server']))
+        self.assertEqual(set(['webapp_group']),
+                         dependencies.readers('group', ['app']))
+        self.assertEqual(set(['placement']),
+                         dependencies.readers('policy', ['webapp_group']))
+        self.assertEqual(set(['server_ip']),
+                         dependencies.readers('output', ['server']))
+
+    def test_host_functions(self):
+        # get_property HOST reads the node templates hosting app
+        app = self._node_tpls()['app']
+        app['properties']['context_root'] = {
+            'get_property': ['HOST', 'component_version']}
+        self.tosca.update_node('app', copy.deepcopy(app))
+        dependencies = self.tosca.topology_template.dependencies
+        self.assertEqual(set(['app']),
+                         dependencies.readers('node', ['server']))
+        self.assertParsedAgain()
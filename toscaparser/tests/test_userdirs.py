@@ -0,0 +1,51 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import stat
+
+import fixtures
+
+from toscaparser.tests.base import TestCase
+from toscaparser.utils import userdirs
+
+
+class UserDirsTest(TestCase):
+
+    def setUp(self):
+        super(UserDirsTest, self).setUp()
+        self.tmp_dir = self.useFixture(fixtures.TempDir()).path
+
+    def test_cache_dir(self):
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     self.tmp_dir))
+        self.assertEqual(os.path.join(self.tmp_dir, 'tosca-parser', 'models'),
+                         userdirs.cache_dir('models'))
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     'relative'))
+        self.useFixture(fixtures.EnvironmentVariable('HOME', self.tmp_dir))
+        self.assertEqual(
+            os.path.join(self.tmp_dir, '.cache', 'tosca-parser', 'models'),
+            userdirs.cache_dir('models'))
+
+    def test_private_dir(self):
+        path = userdirs.private_dir(os.path.join(self.tmp_dir, 'a', 'b'))
+        self.assertEqual(0, os.stat(path).st_mode & (stat.S_IRWXG |
+                                                     stat.S_IRWXO))
+        self.assertEqual(path, userdirs.private_dir(path))
+        os.chmod(path, 0o775)
+        self.assertRaises(OSError, userdirs.private_dir, path)
+
+    def test_other_user(self):
+        uid = os.getuid()
+        self.patch(os, 'getuid', lambda: uid + 1)
+        self.assertRaises(OSError, userdirs.check_private, self.tmp_dir)
@@ -10,6 +10,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import time
+
+import fixtures
+
+from toscaparser.tests.base import HTTPServerFixture
 from toscaparser.tests.base import TestCase
 import toscaparser.utils.urlutils
 import toscaparser.utils.yamlparser
@@ -46,3 +52,80 @@ class UrlUtilsTest(TestCase):
             self.url_utils.join_url("http://github.com/proj1/scripts",
                                     "scripts/b.js"),
             "http://github.com/proj1/scripts/b.js")
+
+
+class YamlCacheTest(TestCase):
+
+    def setUp(self):
+        super(YamlCacheTest, self).setUp()
+        self.cache = toscaparser.utils.yamlparser.YamlCache()
+        self.useFixture(fixtures.MonkeyPatch(
+            'toscaparser.utils.yamlparser.YAML_CACHE', self.cache))
+        self.temp_dir = self.useFixture(fixtures.TempDir()).path
+        self.yaml_file = os.path.join(self.temp_dir, 'types.yaml')
+        self._write('node_types:\n  example.nodes.A: {}\n')
+
+    def _write(self, content):
+        with open(self.yaml_file, 'w') as f:
+            f.write(content)
+
+    def test_load_yaml_file_cached(self):
+        first = YAML_LOADER(self.yaml_file)
+        second = YAML_LOADER(self.yaml_file)
+        self.assertEqual(first, second)
+        stats = self.cache.stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['entries'])
+
+    def test_cached_documents_are_copies(self):
+        first = YAML_LOADER(self.yaml_file)
+        first['node_types']['example.nodes.B'] = {}
+        second = YAML_LOADER(self.yaml_file)
+        self.assertEqual(['example.nodes.A'],
+                         list(second['node_types'].keys()))
+        second['node_types'].clear()
+        self.assertEqual(['example.nodes.A'],
+                         list(YAML_LOADER(self.yaml_file)['node_types']))
+
+    def test_modified_file_reloaded(self):
+        YAML_LOADER(self.yaml_file)
+        self._write('node_types:\n  example.nodes.Changed: {}\n')
+        # make sure the modification time differs on coarse filesystems
+        stat = os.stat(self.yaml_file)
+        os.utime(self.yaml_file, (time.time(), stat.st_mtime + 10))
+        self.assertEqual(['example.nodes.Changed'],
+                         list(YAML_LOADER(self.yaml_file)['node_types']))
+        self.assertEqual(2, self.cache.stats()['misses'])
+
+    def test_eviction(self):
+        other_file = os.path.join(self.temp_dir, 'other.yaml')
+        with open(other_file, 'w') as f:
+            f.write('node_types:\n  example.nodes.B: {}\n')
+        YAML_LOADER(self.yaml_file)
+        self.cache.resize(self.cache.stats()['size'])
+        YAML_LOADER(other_file)
+        stats = self.cache.stats()
+        self.assertEqual(1, stats['entries'])
+        self.assertEqual(1, stats['evictions'])
+        self.assertTrue(stats['size'] <= stats['max_bytes'])
+        YAML_LOADER(other_file)
+        self.assertEqual(1, self.cache.stats()['hits'])
+
+    def test_url_revalidated_with_etag(self):
+        server = self.useFixture(HTTPServerFixture(
+            {'/types.yaml': b'node_types:\n  example.nodes.A: {}\n'}))
+        url = server.url + '/types.yaml'
+        first = YAML_LOADER(url, False)
+        second = YAML_LOADER(url, False)
+        self.assertEqual(first, second)
+        requests = server.requested('/types.yaml')
+        self.assertEqual(2, len(requests))
+        self.assertNotIn('If-None-Match', requests[0][2])
+        self.assertIn('if-none-match',
+                      [h.lower() for h in requests[1][2].keys()])
+        self.assertEqual(1, self.cache.stats()['hits'])
+
+        server.files['/types.yaml'] = b'node_types:\n  example.nodes.B: {}\n'
+        self.assertEqual(['example.nodes.B'],
+                         list(YAML_LOADER(url, False)['node_types']))
@@ -11,10 +11,14 @@
 #    under the License.
 
 
+from collections import OrderedDict
+import contextlib
 import logging
 
 from toscaparser.common import exception
 from toscaparser.dataentity import DataEntity
+from toscaparser import dependencies
+from toscaparser.dependencies import Dependencies
 from toscaparser import functions
 from toscaparser.groups import Group
 from toscaparser.nodetemplate import NodeTemplate
@@ -35,6 +39,10 @@ SECTIONS = (DESCRIPTION, INPUTS, NODE_TEMPLATES,
             'relationship_templates', 'outputs', 'groups',
             'substitution_mappings', 'policies')
 
+# Parts of a topology template whose exceptions are kept apart
+PARTS = (TEMPLATE, GRAPH, SUBSTITUTION) = \
+        ('template', 'graph', 'substitution_mappings')
+
 log = logging.getLogger("tosca.model")
 
 
@@ -46,22 +54,172 @@ class TopologyTemplate(object):
                  sub_mapped_node_template=None):
         self.tpl = template
         self.sub_mapped_node_template = sub_mapped_node_template
+        self._indexes = {}
+        self._dependencies = None
+        # the exceptions of every part of the template, so that only the
+        # parts built again by update_nodes() are validated again
+        self._exceptions = OrderedDict()
         if self.tpl:
             self.custom_defs = custom_defs
             self.rel_types = rel_types
             self.parsed_params = parsed_params
-            self._validate_field()
-            self.description = self._tpl_description()
-            self.inputs = self._inputs()
-            self.relationship_templates = self._relationship_templates()
+            with self._collect((TEMPLATE,)):
+                self._validate_field()
+                self.description = self._tpl_description()
+                self.inputs = self._inputs()
+                self.relationship_templates = self._relationship_templates()
             self.nodetemplates = self._nodetemplates()
             self.outputs = self._outputs()
             if hasattr(self, 'nodetemplates'):
-                self.graph = ToscaGraph(self.nodetemplates)
+                self._relate(self.nodetemplates)
+                self.graph = self._graph()
             self.groups = self._groups()
             self.policies = self._policies()
             self._process_intrinsic_functions()
-            self.substitution_mappings = self._substitution_mappings()
+            with self._collect((SUBSTITUTION,)):
+                self.substitution_mappings = self._substitution_mappings()
+
+    @contextlib.contextmanager
+    def _collect(self, part):
+        with exception.ExceptionCollector.section(
+                self._exceptions.setdefault(part, [])):
+            yield
+
+    def get_exceptions(self):
+        '''Return the exceptions of all the parts of the template.'''
+        exceptions = []
+        messages = set()
+        for part_exceptions in self._exceptions.values():
+            for ex in part_exceptions:
+                if str(ex) not in messages:
+                    messages.add(str(ex))
+                    exceptions.append(ex)
+        return exceptions
+
+    @property
+    def dependencies(self):
+        '''Index of the entities reading the node templates.'''
+        if self._dependencies is None:
+            self._dependencies = Dependencies(self.tpl)
+        return self._dependencies
+
+    def update_nodes(self, node_tpls):
+        '''Replace, add or remove node templates and validate them.
+
+        node_tpls maps the names of the node templates to their new data,
+        or None to remove them. The changed node templates are built
+        again, along with the node templates whose functions read them.
+        The relationships, groups, policies and outputs reading any of them
+        are built again too, the other entities are kept. The exceptions
+        of the whole template are then returned by get_exceptions().
+        '''
+        before = self.dependencies
+        tpls = self.tpl.get(NODE_TEMPLATES)
+        if tpls is None:
+            tpls = self.tpl[NODE_TEMPLATES] = {}
+        for name, node_tpl in node_tpls.items():
+            if node_tpl is None:
+                tpls.pop(name, None)
+            else:
+                tpls[name] = node_tpl
+        self._dependencies = None
+        after = self.dependencies
+
+        def readers(kind, names):
+            return before.readers(kind, names) | \
+                after.readers(kind, names)
+
+        changed = set(node_tpls)
+        rebuilt = (changed | readers(dependencies.NODE, changed)) & set(tpls)
+        for name in rebuilt - changed:
+            # the functions are processed again from their template form
+            tpls[name] = dependencies.plain(tpls[name])
+        touched = changed | rebuilt
+        relinked = (readers(dependencies.REQUIREMENT, touched) | rebuilt) \
+            & set(tpls)
+
+        # detach the relationships of the node templates linked again
+        old_nodes = OrderedDict((node.name, node)
+                                for node in self.nodetemplates)
+        sources = set(old_nodes[name] for name in touched | relinked
+                      if name in old_nodes)
+        for node in self.nodetemplates:
+            node.relationship_tpl = [rel_tpl
+                                     for rel_tpl in node.relationship_tpl
+                                     if rel_tpl.source not in sources]
+            node.related = {}
+        self._forget(dependencies.NODE, touched)
+        self._forget(dependencies.REQUIREMENT, touched | relinked)
+
+        nodes = []
+        for name in tpls:
+            if name in rebuilt:
+                with self._collect((dependencies.NODE, name)):
+                    node = self._nodetemplate(name, tpls)
+            else:
+                node = old_nodes.get(name)
+            if node is not None:
+                nodes.append(node)
+        self.nodetemplates[:] = nodes
+        self._indexes.pop('nodetemplates', None)
+        for node in nodes:
+            if node.name in relinked:
+                node._relationships = {}
+        self._relate([node for node in nodes if node.name in relinked])
+        self._forget(GRAPH)
+        self.graph = self._graph()
+
+        regrouped = readers(dependencies.GROUP, touched)
+        self._update(
+            'groups', self._tpl_groups().items(), dependencies.GROUP,
+            regrouped, self._group)
+        self._update(
+            'policies',
+            [list(policy.items())[0] for policy in self._tpl_policies()],
+            dependencies.POLICY,
+            readers(dependencies.POLICY, touched | regrouped), self._policy)
+
+        for node in nodes:
+            if node.name in rebuilt:
+                with self._collect((dependencies.NODE, node.name)):
+                    self._process_node_functions(node)
+            elif node.name in relinked:
+                with self._collect((dependencies.REQUIREMENT, node.name)):
+                    self._process_relationship_functions(node)
+        outputs = readers(dependencies.OUTPUT, touched)
+        for name in outputs:
+            attrs = self._tpl_outputs()[name]
+            attrs[Output.VALUE] = dependencies.plain(attrs.get(Output.VALUE))
+        self._update(
+            'outputs', self._tpl_outputs().items(), dependencies.OUTPUT,
+            outputs, self._output_with_functions)
+
+        if self._tpl_substitution_mappings():
+            self._forget(SUBSTITUTION)
+            with self._collect((SUBSTITUTION,)):
+                self.substitution_mappings = self._substitution_mappings()
+
+    def _update(self, attr, tpls, kind, names, build):
+        # the entities of names are built again, the others are kept, in
+        # the same list
+        self._forget(kind, names)
+        entities = []
+        for name, tpl in tpls:
+            if name in names:
+                with self._collect((kind, name)):
+                    entity = build(name, tpl)
+            else:
+                entity = self._find(attr, name)
+            if entity is not None:
+                entities.append(entity)
+        getattr(self, attr)[:] = entities
+        self._indexes.pop(attr, None)
+
+    def _forget(self, kind, names=None):
+        if names is None:
+            self._exceptions.pop((kind,), None)
+        for name in names or ():
+            self._exceptions.pop((kind, name), None)
 
     def _inputs(self):
         inputs = []
@@ -87,17 +245,34 @@ class TopologyTemplate(object):
         tpls = self._tpl_nodetemplates()
         if tpls:
             for name in tpls:
-                tpl = NodeTemplate(name, tpls, self.custom_defs,
-                                   self.relationship_templates,
-                                   self.rel_types)
-                if (tpl.type_definition and
-                    (tpl.type in tpl.type_definition.TOSCA_DEF or
-                     (tpl.type not in tpl.type_definition.TOSCA_DEF and
-                      bool(tpl.custom_def)))):
-                    tpl.validate(self)
+                with self._collect((dependencies.NODE, name)):
+                    tpl = self._nodetemplate(name, tpls)
+                if tpl is not None:
                     nodetemplates.append(tpl)
         return nodetemplates
 
+    def _nodetemplate(self, name, tpls):
+        tpl = NodeTemplate(name, tpls, self.custom_defs,
+                           self.relationship_templates,
+                           self.rel_types)
+        tpl.topology_template = self
+        if (tpl.type_definition and
+            (tpl.type in tpl.type_definition.TOSCA_DEF or
+             (tpl.type not in tpl.type_definition.TOSCA_DEF and
+              bool(tpl.custom_def)))):
+            tpl.validate(self)
+            return tpl
+
+    def _relate(self, nodetemplates):
+        # the relationships of every node template, before the graph
+        for node in nodetemplates:
+            with self._collect((dependencies.REQUIREMENT, node.name)):
+                node.relationships
+
+    def _graph(self):
+        with self._collect((GRAPH,)):
+            return ToscaGraph(self.nodetemplates)
+
     def _relationship_templates(self):
         rel_templates = []
         tpls = self._tpl_relationship_templates()
@@ -109,11 +284,20 @@ class TopologyTemplate(object):
     def _outputs(self):
         outputs = []
         for name, attrs in self._tpl_outputs().items():
-            output = Output(name, attrs)
-            output.validate()
-            outputs.append(output)
+            with self._collect((dependencies.OUTPUT, name)):
+                outputs.append(self._output(name, attrs))
         return outputs
 
+    def _output(self, name, attrs):
+        output = Output(name, attrs)
+        output.validate()
+        return output
+
+    def _output_with_functions(self, name, attrs):
+        output = self._output(name, attrs)
+        self._process_output_functions(output)
+        return output
+
     def _substitution_mappings(self):
         tpl_substitution_mapping = self._tpl_substitution_mappings()
         # if tpl_substitution_mapping and self.sub_mapped_node_template:
@@ -129,69 +313,108 @@ class TopologyTemplate(object):
         policies = []
         for policy in self._tpl_policies():
             for policy_name, policy_tpl in policy.items():
-                target_list = policy_tpl.get('targets')
-                target_objects = []
-                targets_type = "groups"
-                if target_list and len(target_list) >= 1:
-                    target_objects = self._get_policy_groups(target_list)
-                    if not target_objects:
-                        targets_type = "node_templates"
-                        target_objects = self._get_group_members(target_list)
-                policyObj = Policy(policy_name, policy_tpl,
-                                   target_objects, targets_type,
-                                   self.custom_defs)
-                policies.append(policyObj)
+                with self._collect((dependencies.POLICY, policy_name)):
+                    policies.append(self._policy(policy_name, policy_tpl))
         return policies
 
+    def _policy(self, policy_name, policy_tpl):
+        target_list = policy_tpl.get('targets')
+        target_objects = []
+        targets_type = "groups"
+        if target_list and len(target_list) >= 1:
+            target_objects = self._get_policy_groups(target_list)
+            if not target_objects:
+                targets_type = "node_templates"
+                target_objects = self._get_group_members(target_list)
+        return Policy(policy_name, policy_tpl,
+                      target_objects, targets_type,
+                      self.custom_defs)
+
     def _groups(self):
         groups = []
-        member_nodes = None
         for group_name, group_tpl in self._tpl_groups().items():
-            member_names = group_tpl.get('members')
-            if member_names is not None:
-                DataEntity.validate_datatype('list', member_names)
-                if len(member_names) < 1 or \
-                        len(member_names) != len(set(member_names)):
-                    exception.ExceptionCollector.appendException(
-                        exception.InvalidGroupTargetException(
-                            message=_('Member nodes "%s" should be >= 1 '
-                                      'and not repeated') % member_names))
-                else:
-                    member_nodes = self._get_group_members(member_names)
-            group = Group(group_name, group_tpl,
-                          member_nodes,
-                          self.custom_defs)
-            groups.append(group)
+            with self._collect((dependencies.GROUP, group_name)):
+                groups.append(self._group(group_name, group_tpl))
         return groups
 
+    def _group(self, group_name, group_tpl):
+        member_nodes = None
+        member_names = group_tpl.get('members')
+        if member_names is not None:
+            DataEntity.validate_datatype('list', member_names)
+            if len(member_names) < 1 or \
+                    len(member_names) != len(set(member_names)):
+                exception.ExceptionCollector.appendException(
+                    exception.InvalidGroupTargetException(
+                        message=_('Member nodes "%s" should be >= 1 '
+                                  'and not repeated') % member_names))
+            else:
+                member_nodes = self._get_group_members(member_names)
+        return Group(group_name, group_tpl,
+                     member_nodes,
+                     self.custom_defs)
+
     def _get_group_members(self, member_names):
         member_nodes = []
         self._validate_group_members(member_names)
         for member in member_names:
-            for node in self.nodetemplates:
-                if node.name == member:
-                    member_nodes.append(node)
+            node = self.get_node_template(member)
+            if node is not None:
+                member_nodes.append(node)
         return member_nodes
 
     def _get_policy_groups(self, member_names):
         member_groups = []
         for member in member_names:
-            for group in self.groups:
-                if group.name == member:
-                    member_groups.append(group)
+            group = self.get_group(member)
+            if group is not None:
+                member_groups.append(group)
         return member_groups
 
     def _validate_group_members(self, members):
-        node_names = []
-        for node in self.nodetemplates:
-            node_names.append(node.name)
         for member in members:
-            if member not in node_names:
+            if self.get_node_template(member) is None:
                 exception.ExceptionCollector.appendException(
                     exception.InvalidGroupTargetException(
                         message=_('Target member "%s" is not found in '
                                   'node_templates') % member))
 
+    def get_node_template(self, name):
+        """Return the node template with the given name or None."""
+        return self._find('nodetemplates', name)
+
+    def get_group(self, name):
+        """Return the group with the given name or None."""
+        return self._find('groups', name)
+
+    def get_input(self, name):
+        """Return the input with the given name or None."""
+        return self._find('inputs', name)
+
+    def get_output(self, name):
+        """Return the output with the given name or None."""
+        return self._find('outputs', name)
+
+    def get_policy(self, name):
+        """Return the policy with the given name or None."""
+        return self._find('policies', name)
+
+    def _find(self, attr, name):
+        # The index maps the names to the entities of the list and is built
+        # again when another list is assigned. update_nodes() drops the
+        # index of the lists it changes in place; other code changing the
+        # entities or their names must assign a new list instead.
+        entities = getattr(self, attr, None)
+        if entities is None:
+            return None
+        index = self._indexes.get(attr)
+        if index is None or index[0] is not entities:
+            names = {}
+            for entity in entities:
+                names.setdefault(entity.name, entity)
+            index = self._indexes[attr] = (entities, names)
+        return index[1].get(name)
+
     # topology template can act like node template
     # it is exposed by substitution_mappings.
     def nodetype(self):
@@ -246,60 +469,76 @@ class TopologyTemplate(object):
         """
         if hasattr(self, 'nodetemplates'):
             for node_template in self.nodetemplates:
-                for prop in node_template.get_properties_objects():
-                    prop.value = functions.get_function(self,
-                                                        node_template,
-                                                        prop.value)
-                for interface in node_template.interfaces:
-                    if interface.inputs:
-                        for name, value in interface.inputs.items():
-                            interface.inputs[name] = functions.get_function(
-                                self,
-                                node_template,
-                                value)
-                if node_template.requirements and \
-                   isinstance(node_template.requirements, list):
-                    for req in node_template.requirements:
-                        rel = req
-                        for req_name, req_item in req.items():
-                            if isinstance(req_item, dict):
-                                rel = req_item.get('relationship')
-                                break
-                        if rel and 'properties' in rel:
-                            for key, value in rel['properties'].items():
-                                rel['properties'][key] = \
-                                    functions.get_function(self,
-                                                           req,
-                                                           value)
-                if node_template.get_capabilities_objects():
-                    for cap in node_template.get_capabilities_objects():
-                        if cap.get_properties_objects():
-                            for prop in cap.get_properties_objects():
-                                propvalue = functions.get_function(
-                                    self,
-                                    node_template,
-                                    prop.value)
-                                if isinstance(propvalue, functions.GetInput):
-                                    propvalue = propvalue.result()
-                                    for p, v in cap._properties.items():
-                                        if p == prop.name:
-                                            cap._properties[p] = propvalue
-                for rel, node in node_template.relationships.items():
-                    rel_tpls = node.relationship_tpl
-                    if rel_tpls:
-                        for rel_tpl in rel_tpls:
-                            for interface in rel_tpl.interfaces:
-                                if interface.inputs:
-                                    for name, value in \
-                                            interface.inputs.items():
-                                        interface.inputs[name] = \
-                                            functions.get_function(self,
-                                                                   rel_tpl,
-                                                                   value)
+                with self._collect((dependencies.NODE, node_template.name)):
+                    self._process_node_functions(node_template)
         for output in self.outputs:
-            func = functions.get_function(self, self.outputs, output.value)
-            if isinstance(func, functions.GetAttribute):
-                output.attrs[output.VALUE] = func
+            with self._collect((dependencies.OUTPUT, output.name)):
+                self._process_output_functions(output)
+
+    def _process_node_functions(self, node_template):
+        for prop in node_template.get_properties_objects():
+            prop.value = functions.get_function(self,
+                                                node_template,
+                                                prop.value)
+        for interface in node_template.interfaces:
+            if interface.inputs:
+                for name, value in interface.inputs.items():
+                    interface.inputs[name] = functions.get_function(
+                        self,
+                        node_template,
+                        value)
+        if node_template.requirements and \
+           isinstance(node_template.requirements, list):
+            for req in node_template.requirements:
+                rel = req
+                for req_name, req_item in req.items():
+                    if isinstance(req_item, dict):
+                        rel = req_item.get('relationship')
+                        break
+                if rel and 'properties' in rel:
+                    for key, value in rel['properties'].items():
+                        rel['properties'][key] = \
+                            functions.get_function(self,
+                                                   req,
+                                                   value)
+        if node_template.get_capabilities_objects():
+            for cap in node_template.get_capabilities_objects():
+                if cap.get_properties_objects():
+                    for prop in cap.get_properties_objects():
+                        propvalue = functions.get_function(
+                            self,
+                            node_template,
+                            prop.value)
+                        if isinstance(propvalue, functions.GetInput):
+                            propvalue = propvalue.result()
+                            for p, v in cap._properties.items():
+                                if p == prop.name:
+                                    cap._properties[p] = propvalue
+        self._process_relationship_functions(node_template)
+
+    def _process_relationship_functions(self, node_template):
+        for rel, node in node_template.relationships.items():
+            # the target node is shared with the other nodes
+            # related to it, only process this node relationships
+            rel_tpls = [rel_tpl for rel_tpl in node.relationship_tpl
+                        if rel_tpl.source is node_template]
+            if rel_tpls:
+                for rel_tpl in rel_tpls:
+                    for interface in rel_tpl.interfaces:
+                        if interface.inputs:
+                            for name, value in \
+                                    interface.inputs.items():
+                                # the relationship may be linked again
+                                # by update_nodes()
+                                interface.inputs[name] = \
+                                    functions.get_function(
+                                        self, rel_tpl,
+                                        dependencies.plain(value))
+
+    def _process_output_functions(self, output):
+        func = functions.get_function(self, self.outputs, output.value)
+        if isinstance(func, functions.GetAttribute):
+            output.attrs[output.VALUE] = func
 
     @classmethod
     def get_sub_mapping_node_type(cls, topology_tpl):
@@ -11,6 +11,7 @@
 #    under the License.
 
 
+import functools
 import logging
 import os
 
@@ -18,15 +19,17 @@ from copy import deepcopy
 from toscaparser.common.exception import ExceptionCollector
 from toscaparser.common.exception import InvalidTemplateVersion
 from toscaparser.common.exception import MissingRequiredFieldError
+from toscaparser.common.exception import TooManyErrors
 from toscaparser.common.exception import UnknownFieldError
 from toscaparser.common.exception import ValidationError
-from toscaparser.elements.entity_type import update_definitions
+from toscaparser.dependencies import plain
+from toscaparser.elements.entity_type import LazyDefinitions
+from toscaparser.elements import type_registry
 from toscaparser.extensions.exttools import ExtTools
 import toscaparser.imports
-from toscaparser.prereq.csar import CSAR
 from toscaparser.repositories import Repository
+from toscaparser.topology_template import NODE_TEMPLATES
 from toscaparser.topology_template import TopologyTemplate
-from toscaparser.tpl_relationship_graph import ToscaGraph
 from toscaparser.utils.gettextutils import _
 import toscaparser.utils.yamlparser
 
@@ -52,69 +55,233 @@ log = logging.getLogger("tosca.model")
 YAML_LOADER = toscaparser.utils.yamlparser.load_yaml
 
 
-class ToscaTemplate(object):
-    exttools = ExtTools()
+def _valid_template_versions():
+    return ['tosca_simple_yaml_1_0'] + ExtTools().get_versions()
+
 
-    VALID_TEMPLATE_VERSIONS = ['tosca_simple_yaml_1_0']
+def _additional_sections():
+    sections = {'tosca_simple_yaml_1_0': SPECIAL_SECTIONS}
+    sections.update(ExtTools().get_sections())
+    return sections
 
-    VALID_TEMPLATE_VERSIONS.extend(exttools.get_versions())
 
-    ADDITIONAL_SECTIONS = {'tosca_simple_yaml_1_0': SPECIAL_SECTIONS}
+class ToscaTemplate(object):
+    exttools = ExtTools()
+
+    # The extensions are discovered on first use rather than on import
+    VALID_TEMPLATE_VERSIONS = LazyDefinitions(_valid_template_versions)
 
-    ADDITIONAL_SECTIONS.update(exttools.get_sections())
+    ADDITIONAL_SECTIONS = LazyDefinitions(_additional_sections)
 
     '''Load the template data.'''
     def __init__(self, path=None, parsed_params=None, a_file=True,
-                 yaml_dict_tpl=None):
+                 yaml_dict_tpl=None, max_errors=None):
 
-        ExceptionCollector.start()
+        ExceptionCollector.start(max_errors)
         self.a_file = a_file
         self.input_path = None
-        self.path = None
+        self.template_path = None
         self.tpl = None
         self.nested_tosca_tpls_with_topology = {}
         self.nested_tosca_templates_with_topology = []
-        if path:
-            self.input_path = path
-            self.path = self._get_path(path)
-            if self.path:
-                self.tpl = YAML_LOADER(self.path, self.a_file)
-            if yaml_dict_tpl:
-                msg = (_('Both path and yaml_dict_tpl arguments were '
-                         'provided. Using path and ignoring yaml_dict_tpl.'))
-                log.info(msg)
-                print(msg)
-        else:
-            if yaml_dict_tpl:
-                self.tpl = yaml_dict_tpl
+        self.custom_defs = None
+        self.type_registry = None
+        self.import_loads = 0
+        self.import_sources = []
+        self._imports_loader = None
+        self.csar = None
+        self.max_errors = max_errors
+        self._template_exceptions = []
+        try:
+            if path:
+                self.input_path = path
+                self.template_path = self._get_path(path)
+                if self.template_path:
+                    self.tpl = YAML_LOADER(self.template_path, self.a_file)
+                if yaml_dict_tpl:
+                    msg = (_('Both path and yaml_dict_tpl arguments were '
+                             'provided. Using path and ignoring '
+                             'yaml_dict_tpl.'))
+                    log.info(msg)
+                    print(msg)
             else:
-                ExceptionCollector.appendException(
-                    ValueError(_('No path or yaml_dict_tpl was provided. '
-                                 'There is nothing to parse.')))
-
-        if self.tpl:
-            self.parsed_params = parsed_params
-            self._validate_field()
-            self.version = self._tpl_version()
-            self.relationship_types = self._tpl_relationship_types()
-            self.description = self._tpl_description()
+                if yaml_dict_tpl:
+                    self.tpl = yaml_dict_tpl
+                else:
+                    ExceptionCollector.appendException(
+                        ValueError(_('No path or yaml_dict_tpl was provided. '
+                                     'There is nothing to parse.')))
+
+            if self.tpl:
+                self.parsed_params = parsed_params
+                self._validate_field()
+                self.version = self._tpl_version()
+                self.type_registry = type_registry.get_registry(
+                    self.version)
+                with type_registry.use(self.type_registry):
+                    self.custom_defs = toscaparser.imports.CustomDefinitions(
+                        self._get_all_custom_defs(), self.type_registry)
+                    self.relationship_types = self._tpl_relationship_types()
+                    self.description = self._tpl_description()
+                    self.repositories = self._tpl_repositories()
+                    self._build_topology()
+        except TooManyErrors as e:
+            # report the errors collected so far and why the parse stopped
+            e.trace = []
+            ExceptionCollector.exceptions.append(e)
+        finally:
+            if self.csar:
+                self.csar.close()
+
+        ExceptionCollector.stop()
+        self.verify_template()
+
+    @property
+    def path(self):
+        '''The path of the template file on disk.
+
+        The templates of a CSAR are parsed from the archive, template_path
+        is the virtual path of the main template below the path of the
+        archive. The CSAR is decompressed the first time path is read, see
+        CSAR.decompress().
+        '''
+        if self.csar is None:
+            return self.template_path
+        return self.csar.get_main_template_file()
+
+    @classmethod
+    def load_async(cls, path=None, parsed_params=None, a_file=True,
+                   yaml_dict_tpl=None, loop=None, executor=None,
+                   max_errors=None):
+        '''Load the template without blocking the asyncio event loop.
+
+        Returns an awaitable of the ToscaTemplate. The files, URLs and CSAR
+        archive are read and the template is validated in the executor,
+        the default executor of the loop if none is given.
+        '''
+        import asyncio
+        loop = loop or asyncio.get_event_loop()
+        return loop.run_in_executor(
+            executor, functools.partial(cls, path, parsed_params, a_file,
+                                        yaml_dict_tpl, max_errors))
+
+    def _build_topology(self):
+        # the exceptions of the rest of the template are kept apart, for
+        # update_nodes()
+        topology_exceptions = []
+        with ExceptionCollector.section(topology_exceptions):
             self.topology_template = self._topology_template()
-            self.repositories = self._tpl_repositories()
             if self.topology_template.tpl:
                 self.inputs = self._inputs()
-                self.relationship_templates = self._relationship_templates()
+                self.relationship_templates = \
+                    self._relationship_templates()
                 self.nodetemplates = self._nodetemplates()
                 self.outputs = self._outputs()
                 self.policies = self._policies()
+                self.nested_tosca_templates_with_topology = []
                 self._handle_nested_tosca_templates_with_topology()
-                self.graph = ToscaGraph(self.nodetemplates)
-
+                self.graph = self.topology_template.graph
+        topology_exceptions = set(id(ex) for ex in topology_exceptions)
+        self._template_exceptions = [
+            ex for ex in ExceptionCollector.exceptions
+            if id(ex) not in topology_exceptions]
+
+    def update_node(self, name, node_tpl):
+        '''Replace the node template name by node_tpl and validate it.
+
+        The node template is added if there is none by this name, and
+        removed if node_tpl is None. See update_nodes().
+        '''
+        self.update_nodes({name: node_tpl})
+
+    def update_nodes(self, node_tpls):
+        '''Replace, add or remove node templates and validate them.
+
+        node_tpls maps the names of the node templates to their new data,
+        or None to remove them. Only the entities of the topology template
+        reading the changed node templates are built again, see
+        TopologyTemplate.update_nodes(), and the imports are not read
+        again. The whole topology template is built again when it has
+        nested topology templates or max_errors was given.
+
+        Raises a ValidationError reporting the exceptions of the whole
+        template. The template is updated anyway, so that it can be
+        corrected by a next update.
+        '''
+        topology_tpl = self._tpl_topology_template()
+        if topology_tpl is None:
+            topology_tpl = self.tpl[TOPOLOGY_TEMPLATE] = {}
+        if self.topology_template.tpl and not self.max_errors and \
+                not self.nested_tosca_tpls_with_topology:
+            self._update(self._update_nodes, node_tpls)
+        else:
+            node_tpls_section = topology_tpl.setdefault(NODE_TEMPLATES, {})
+            for name, node_tpl in node_tpls.items():
+                if node_tpl is None:
+                    node_tpls_section.pop(name, None)
+                else:
+                    node_tpls_section[name] = node_tpl
+            self._update(self._build_topology)
+
+    def update(self, tpl):
+        '''Validate a changed version of the template data.
+
+        Only the node templates changed since the template was parsed,
+        and the entities reading them, are built again as by
+        update_nodes(). The whole topology template is built again when
+        other parts of it changed. Changes to the other sections of the
+        template, such as its imports and types, need a new ToscaTemplate
+        and raise a ValueError.
+        '''
+        for section in set(self.tpl) | set(tpl):
+            if section != TOPOLOGY_TEMPLATE and \
+                    plain(self.tpl.get(section)) != plain(tpl.get(section)):
+                raise ValueError(_('The "%s" section of the template '
+                                   'changed.') % section)
+        old_topology = self._tpl_topology_template() or {}
+        new_topology = tpl.get(TOPOLOGY_TEMPLATE) or {}
+        sections = set(old_topology) | set(new_topology)
+        sections.discard(NODE_TEMPLATES)
+        if not old_topology or any(
+                plain(old_topology.get(section)) !=
+                plain(new_topology.get(section)) for section in sections):
+            self.tpl[TOPOLOGY_TEMPLATE] = new_topology
+            self._update(self._build_topology)
+            return
+        old_nodes = old_topology.get(NODE_TEMPLATES) or {}
+        new_nodes = new_topology.get(NODE_TEMPLATES) or {}
+        node_tpls = dict((name, new_nodes.get(name))
+                         for name in set(old_nodes) | set(new_nodes)
+                         if plain(old_nodes.get(name)) !=
+                         plain(new_nodes.get(name)))
+        if node_tpls:
+            self.update_nodes(node_tpls)
+
+    def _update(self, update, *args):
+        ExceptionCollector.start(self.max_errors)
+        ExceptionCollector.exceptions = list(self._template_exceptions)
+        try:
+            with type_registry.use(self.type_registry):
+                update(*args)
+        except TooManyErrors as e:
+            e.trace = []
+            ExceptionCollector.exceptions.append(e)
         ExceptionCollector.stop()
         self.verify_template()
 
+    def _update_nodes(self, node_tpls):
+        self.topology_template.update_nodes(node_tpls)
+        self.graph = self.topology_template.graph
+        # the exceptions of the parts of the topology template which were
+        # not validated again
+        messages = set(str(ex) for ex in self._template_exceptions)
+        ExceptionCollector.exceptions = self._template_exceptions + [
+            ex for ex in self.topology_template.get_exceptions()
+            if str(ex) not in messages]
+
     def _topology_template(self):
         return TopologyTemplate(self._tpl_topology_template(),
-                                self._get_all_custom_defs(),
+                                self.custom_defs,
                                 self.relationship_types,
                                 self.parsed_params,
                                 None)
@@ -152,7 +319,16 @@ class ToscaTemplate(object):
         return reposit
 
     def _tpl_relationship_types(self):
-        return self._get_custom_types(RELATIONSHIP_TYPES)
+        # The relationship types of the imports were already loaded along
+        # with the other custom types by _get_all_custom_defs()
+        custom_defs = {}
+        if self._imports_loader:
+            custom_defs = self._imports_loader.get_custom_defs(
+                RELATIONSHIP_TYPES)
+            if not custom_defs:
+                return
+        custom_defs.update(self.tpl.get(RELATIONSHIP_TYPES) or {})
+        return custom_defs
 
     def _tpl_relationship_templates(self):
         topology_template = self._tpl_topology_template()
@@ -194,13 +370,18 @@ class ToscaTemplate(object):
         else:
             type_defs = type_definitions
 
-        if not imports:
+        tpl_imports = not imports
+        if tpl_imports:
             imports = self._tpl_imports()
 
         if imports:
             custom_service = toscaparser.imports.\
-                ImportsLoader(imports, self.path,
+                ImportsLoader(imports, self.template_path,
                               type_defs, self.tpl)
+            self.import_loads += custom_service.load_count
+            self.import_sources.extend(custom_service.sources)
+            if tpl_imports:
+                self._imports_loader = custom_service
 
             nested_tosca_tpls = custom_service.get_nested_tosca_tpls()
             self._update_nested_tosca_tpls_with_topology(nested_tosca_tpls)
@@ -234,7 +415,7 @@ class ToscaTemplate(object):
                     topology_tpl = tosca_tpl.get(TOPOLOGY_TEMPLATE)
                     topology_with_sub_mapping = TopologyTemplate(
                         topology_tpl,
-                        self._get_all_custom_defs(),
+                        self.custom_defs,
                         self.relationship_types,
                         parsed_params,
                         nodetemplate)
@@ -268,20 +449,24 @@ class ToscaTemplate(object):
                 InvalidTemplateVersion(
                     what=version,
                     valid_versions='", "'. join(self.VALID_TEMPLATE_VERSIONS)))
-        else:
-            if version != 'tosca_simple_yaml_1_0':
-                update_definitions(version)
 
     def _get_path(self, path):
         if path.lower().endswith('.yaml') or path.lower().endswith('.yml'):
             return path
         elif path.lower().endswith(('.zip', '.csar')):
-            # a CSAR archive
+            # a CSAR archive, the archive and URL support is only loaded
+            # for them
+            from toscaparser.prereq.csar import CSAR
+
             csar = CSAR(path, self.a_file)
             if csar.validate():
-                csar.decompress()
-                self.a_file = True  # the file has been decompressed locally
-                return os.path.join(csar.temp_dir, csar.get_main_template())
+                # the templates are read from the mounted archive, so that
+                # the path of the main template is below the path of the
+                # archive and does not exist on disk
+                csar.mount()
+                self.csar = csar
+                self.a_file = True
+                return csar.get_main_template_path()
         else:
             ExceptionCollector.appendException(
                 ValueError(_('"%(path)s" is not a valid file.')
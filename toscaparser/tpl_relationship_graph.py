@@ -10,23 +10,38 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from toscaparser.common.exception import CyclicDependencyError
+from toscaparser.utils import graphutils
+
 
 class ToscaGraph(object):
-    '''Graph of Tosca Node Templates.'''
+    '''Graph of Tosca Node Templates.
+
+    There is an edge from every node template to the node templates it
+    requires, whatever the type of the relationship (HostedOn, DependsOn,
+    ConnectsTo...), so a node template can only be deployed after all the
+    node templates it has an edge to.
+    '''
     def __init__(self, nodetemplates):
         self.nodetemplates = nodetemplates
         self.vertices = {}
+        self._targets = {}
+        self._sources = {}
         self._create()
 
     def _create_vertex(self, node):
-        if node not in self.vertices:
+        if node.name not in self.vertices:
             self.vertices[node.name] = node
+            self._targets[node.name] = []
+            self._sources[node.name] = []
 
     def _create_edge(self, node1, node2, relationship):
-        if node1 not in self.vertices:
-            self._create_vertex(node1)
+        self._create_vertex(node1)
         self.vertices[node1.name]._add_next(node2,
                                             relationship)
+        if node2.name not in self._targets[node1.name]:
+            self._targets[node1.name].append(node2.name)
+            self._sources[node2.name].append(node1.name)
 
     def vertex(self, node):
         if node in self.vertices:
@@ -36,11 +51,70 @@ class ToscaGraph(object):
         return iter(self.vertices.values())
 
     def _create(self):
+        for node in self.nodetemplates:
+            self._create_vertex(node)
         for node in self.nodetemplates:
             relation = node.relationships
             if relation:
-                for rel, nodetpls in relation.items():
-                    for tpl in self.nodetemplates:
-                        if tpl.name == nodetpls.name:
-                            self._create_edge(node, tpl, rel)
-            self._create_vertex(node)
+                for rel, nodetpl in relation.items():
+                    tpl = self.vertices.get(nodetpl.name)
+                    if tpl is not None:
+                        self._create_edge(node, tpl, rel)
+
+    def requirements(self, name):
+        '''Return the node templates the named node template requires.'''
+        return [self.vertices[target] for target in self._targets[name]]
+
+    def dependents(self, name):
+        '''Return the node templates requiring the named node template.'''
+        return [self.vertices[source] for source in self._sources[name]]
+
+    def deployment_waves(self):
+        '''Return the node templates grouped in waves of deployment.
+
+        The node templates of the first wave require no other node
+        template, those of every next wave only require node templates of
+        the previous waves. The node templates of a wave can therefore be
+        deployed at the same time, once the previous waves are deployed.
+        Raises CyclicDependencyError if node templates require each other.
+        '''
+        names = [node.name for node in self.nodetemplates
+                 if node.name in self.vertices]
+        position = dict((name, i) for i, name in enumerate(names))
+        pending = dict((name, len(self._targets[name])) for name in names)
+        wave = [name for name in names if not pending[name]]
+        waves = []
+        done = 0
+        while wave:
+            waves.append([self.vertices[name] for name in wave])
+            done += len(wave)
+            next_wave = []
+            for name in wave:
+                for source in self._sources[name]:
+                    pending[source] -= 1
+                    if not pending[source]:
+                        next_wave.append(source)
+            # keep the order of the node templates within a wave
+            wave = sorted(next_wave, key=position.get)
+        if done != len(names):
+            raise CyclicDependencyError(
+                nodes='", "'.join(sorted(node.name for cycle in self.cycles()
+                                         for node in cycle)))
+        return waves
+
+    def topological_order(self):
+        '''Return the node templates in an order they can be deployed in.
+
+        Every node template comes after the node templates it requires.
+        Raises CyclicDependencyError if node templates require each other.
+        '''
+        return [node for wave in self.deployment_waves() for node in wave]
+
+    def cycles(self):
+        '''Return the groups of node templates that require each other.
+
+        Every group is a strongly connected component of the graph with
+        more than one node template, or a node template requiring itself.
+        '''
+        return [[self.vertices[name] for name in cycle]
+                for cycle in graphutils.cycles(self.vertices, self._targets)]
@@ -0,0 +1,62 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+def cycles(vertices, targets):
+    '''Return the cycles of a directed graph.
+
+    The graph is given as its vertices and a map of every vertex to the
+    list of vertices it has an edge to. Every cycle is a strongly connected
+    component with more than one vertex, or a vertex with an edge to
+    itself, listed in the order the vertices were reached. It runs in
+    O(V + E) with Tarjan's algorithm, without recursion.
+    '''
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    found = []
+    counter = 0
+    for root in vertices:
+        if root in index:
+            continue
+        work = [(root, 0)]
+        while work:
+            vertex, i = work.pop()
+            if i == 0:
+                index[vertex] = lowlink[vertex] = counter
+                counter += 1
+                stack.append(vertex)
+                on_stack.add(vertex)
+            next_vertices = targets.get(vertex, ())
+            if i < len(next_vertices):
+                work.append((vertex, i + 1))
+                target = next_vertices[i]
+                if target not in index:
+                    work.append((target, 0))
+                elif target in on_stack:
+                    lowlink[vertex] = min(lowlink[vertex], index[target])
+                continue
+            if lowlink[vertex] == index[vertex]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == vertex:
+                        break
+                if len(component) > 1 or vertex in next_vertices:
+                    found.append(component[::-1])
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[vertex])
+    return found
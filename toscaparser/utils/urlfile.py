@@ -0,0 +1,245 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Bounded-memory access to files served over HTTP.
+
+open_url() returns a seekable file object for the content at a URL. When
+the server accepts range requests for a file larger than the memory
+threshold, a RangeFile only fetches the parts that are read, such as the
+central directory and a few members of a zip archive. Its requests are
+conditional on the ETag or Last-Modified date of the content, so that
+parts of different versions are never mixed. Otherwise the
+content is streamed into a temporary file that only spills to disk past
+the memory threshold, and hashed while it is downloaded.
+'''
+
+from collections import OrderedDict
+import hashlib
+import tempfile
+
+from six.moves import urllib
+
+import toscaparser.utils.yamlparser
+
+# Bytes of a download kept in memory before it is written to disk
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+
+# Bytes read from the network at a time
+CHUNK_SIZE = 64 * 1024
+
+# Bytes fetched by a range request at least, and number of such blocks
+# kept in memory by a RangeFile
+BLOCK_SIZE = 64 * 1024
+MAX_BLOCKS = 64
+
+
+def _request(method, url, headers=None, stream=False):
+    import requests
+
+    session = toscaparser.utils.yamlparser.get_session()
+    try:
+        response = session.request(
+            method, url, headers=headers, stream=stream,
+            timeout=toscaparser.utils.yamlparser.URL_TIMEOUT)
+    except requests.RequestException as e:
+        raise urllib.error.URLError(e)
+    if response.status_code >= 400:
+        response.close()
+        raise urllib.error.HTTPError(url, response.status_code,
+                                     response.reason, response.headers, None)
+    return response
+
+
+class SpooledFile(tempfile.SpooledTemporaryFile):
+
+    # zipfile needs seekable(), which SpooledTemporaryFile only has from
+    # Python 3.11
+    def seekable(self):
+        return True
+
+
+def download(url, max_memory=None):
+    '''Download the content at a URL into a spooled temporary file.
+
+    Returns the file, positioned at its start, and the SHA-256 of the
+    content.
+    '''
+    if max_memory is None:
+        max_memory = SPOOL_MAX_MEMORY
+    sha256 = hashlib.sha256()
+    f = SpooledFile(max_size=max_memory)
+    response = _request('GET', url, stream=True)
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            sha256.update(chunk)
+            f.write(chunk)
+    except Exception:
+        f.close()
+        raise
+    finally:
+        response.close()
+    f.seek(0)
+    return f, sha256.hexdigest()
+
+
+class RangeFile(object):
+    '''Read-only file over the content at a URL, fetched by ranges.
+
+    etag and last_modified are the validators of the content, as returned
+    by a HEAD request. An IOError is raised when the content has changed
+    since.
+    '''
+
+    def __init__(self, url, size, block_size=BLOCK_SIZE,
+                 max_blocks=MAX_BLOCKS, etag=None, last_modified=None):
+        self.url = url
+        self.size = size
+        # weak ETags cannot be used in If-Range
+        self.etag = etag if etag and not etag.startswith('W/') else None
+        self.last_modified = last_modified
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.requests = 0
+        self.fetched = 0
+        self.closed = False
+        self._pos = 0
+        self._blocks = OrderedDict()
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.size
+        if offset < 0:
+            raise IOError(22, 'Invalid seek offset %d' % offset)
+        self._pos = offset
+        return self._pos
+
+    def read(self, n=-1):
+        end = self.size if n is None or n < 0 else \
+            min(self._pos + n, self.size)
+        if self._pos >= end:
+            return b''
+        first = self._pos // self.block_size
+        last = (end - 1) // self.block_size
+        if last - first >= self.max_blocks:
+            # too large to be cached, such as a whole member
+            data = self._get(self._pos, end - 1)
+        else:
+            self._fetch(first, last)
+            data = b''.join(self._block(i) for i in range(first, last + 1))
+            start = self._pos - first * self.block_size
+            data = data[start:start + end - self._pos]
+        self._pos = end
+        return data
+
+    def _block(self, i):
+        block = self._blocks.pop(i)
+        self._blocks[i] = block
+        return block
+
+    def _fetch(self, first, last):
+        # keep the cached blocks of the range from being evicted, then fetch
+        # the missing ones with one request per contiguous run
+        for i in range(first, last + 1):
+            if i in self._blocks:
+                self._block(i)
+        i = first
+        while i <= last:
+            if i in self._blocks:
+                i += 1
+                continue
+            j = i
+            while j < last and j + 1 not in self._blocks:
+                j += 1
+            self._fetch_range(i, j)
+            i = j + 1
+
+    def _fetch_range(self, first, last):
+        data = self._get(first * self.block_size,
+                         min((last + 1) * self.block_size, self.size) - 1)
+        for i in range(first, last + 1):
+            offset = (i - first) * self.block_size
+            self._blocks[i] = data[offset:offset + self.block_size]
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+    def _get(self, start, end):
+        headers = {'Range': 'bytes=%d-%d' % (start, end)}
+        if self.etag or self.last_modified:
+            # the whole content is sent instead when it has changed
+            headers['If-Range'] = self.etag or self.last_modified
+        response = _request('GET', self.url, headers=headers, stream=True)
+        try:
+            etag = response.headers.get('ETag')
+            if response.status_code == 200 or \
+                    self.etag and etag and etag != self.etag:
+                raise IOError(_changed_error(self.url))
+            if response.status_code != 206:
+                raise IOError(_range_error(self.url))
+            data = response.content
+        finally:
+            response.close()
+        if len(data) != end - start + 1:
+            raise IOError(_range_error(self.url))
+        self.requests += 1
+        self.fetched += len(data)
+        return data
+
+    def close(self):
+        self.closed = True
+        self._blocks.clear()
+
+
+def _range_error(url):
+    return 'Unexpected response to a range request for "%s".' % url
+
+
+def _changed_error(url):
+    return 'The content of "%s" changed while it was read.' % url
+
+
+def open_url(url, max_memory=None):
+    '''Return a file over the content at a URL and its SHA-256.
+
+    The content is fetched by ranges when it is larger than max_memory and
+    the server accepts range requests. The SHA-256 is then None since the
+    content is not read as a whole. The content is downloaded when the
+    server does not answer HEAD requests, as some object stores only
+    allow GET.
+    '''
+    if max_memory is None:
+        max_memory = SPOOL_MAX_MEMORY
+    try:
+        response = _request('HEAD', url)
+    except urllib.error.HTTPError:
+        return download(url, max_memory)
+    response.close()
+    headers = response.headers
+    try:
+        size = int(headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        size = None
+    if size is not None and size > max_memory and \
+            headers.get('Accept-Ranges', '').lower() == 'bytes':
+        return RangeFile(url, size, etag=headers.get('ETag'),
+                         last_modified=headers.get('Last-Modified')), None
+    return download(url, max_memory)
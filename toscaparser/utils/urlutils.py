@@ -11,17 +11,24 @@
 #    under the License.
 
 
+from collections import OrderedDict
+import threading
+import time
+
 from six.moves.urllib.parse import urljoin
 from six.moves.urllib.parse import urlparse
 from toscaparser.common.exception import ExceptionCollector
 from toscaparser.utils.gettextutils import _
+import toscaparser.utils.yamlparser
+
+# Number of URLs checked at the same time, in total and per host
+MAX_CHECK_WORKERS = 16
+MAX_CHECKS_PER_HOST = 4
 
-try:
-    # Python 3.x
-    import urllib.request as urllib2
-except ImportError:
-    # Python 2.x
-    import urllib2
+# Seconds the URLs found accessible are not checked again, and the number
+# of them remembered
+CHECK_CACHE_TTL = 300
+CHECK_CACHE_SIZE = 1024
 
 
 class UrlUtils(object):
@@ -62,4 +69,93 @@ class UrlUtils(object):
         Returns true if the get call returns a 200 response code.
         Otherwise, returns false.
         """
-        return urllib2.urlopen(url).getcode() == 200
+        from six.moves.urllib.request import urlopen
+
+        return urlopen(url).getcode() == 200
+
+    _checked = OrderedDict()
+    _host_limits = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def urls_accessible(urls, max_workers=None, max_per_host=None):
+        """Check whether URLs are accessible, at the same time.
+
+        Returns a map of every URL to True if it is accessible. HTTP URLs
+        are checked with HEAD requests over the shared session, no more
+        than max_per_host at a time for each host. The URLs found accessible
+        are not checked again for CHECK_CACHE_TTL seconds, the others are
+        checked every time.
+        """
+        urls = list(OrderedDict.fromkeys(urls))
+        results = {}
+        pending = []
+        now = time.time()
+        with UrlUtils._lock:
+            for url in urls:
+                checked = UrlUtils._checked.get(url)
+                if checked is not None and now - checked < CHECK_CACHE_TTL:
+                    results[url] = True
+                else:
+                    pending.append(url)
+        max_per_host = max_per_host or MAX_CHECKS_PER_HOST
+
+        def check(url):
+            with UrlUtils._host_limit(url, max_per_host):
+                return UrlUtils._check_url(url)
+
+        workers = min(max_workers or MAX_CHECK_WORKERS, len(pending))
+        if workers <= 1:
+            accessible = [check(url) for url in pending]
+        else:
+            from multiprocessing.pool import ThreadPool
+
+            pool = ThreadPool(workers)
+            try:
+                accessible = pool.map(check, pending)
+            finally:
+                pool.close()
+                pool.join()
+        now = time.time()
+        with UrlUtils._lock:
+            for url, ok in zip(pending, accessible):
+                results[url] = ok
+                UrlUtils._checked.pop(url, None)
+                if ok:
+                    UrlUtils._checked[url] = now
+            while len(UrlUtils._checked) > CHECK_CACHE_SIZE:
+                UrlUtils._checked.popitem(last=False)
+        return results
+
+    @staticmethod
+    def clear_checked_urls():
+        with UrlUtils._lock:
+            UrlUtils._checked.clear()
+
+    @staticmethod
+    def _host_limit(url, max_per_host):
+        host = urlparse(url).netloc
+        with UrlUtils._lock:
+            limit = UrlUtils._host_limits.get((host, max_per_host))
+            if limit is None:
+                limit = threading.BoundedSemaphore(max_per_host)
+                UrlUtils._host_limits[(host, max_per_host)] = limit
+        return limit
+
+    @staticmethod
+    def _check_url(url):
+        try:
+            if urlparse(url).scheme not in ('http', 'https'):
+                return UrlUtils.url_accessible(url)
+            session = toscaparser.utils.yamlparser.get_session()
+            timeout = toscaparser.utils.yamlparser.URL_TIMEOUT
+            response = session.head(url, allow_redirects=True,
+                                    timeout=timeout)
+            response.close()
+            if not 200 <= response.status_code < 300:
+                # some servers reject HEAD requests, even with a 403 or 404
+                response = session.get(url, stream=True, timeout=timeout)
+                response.close()
+            return 200 <= response.status_code < 300
+        except Exception:
+            return False
@@ -0,0 +1,78 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Directories private to the current user.
+
+The snapshots of the model cache are unpickled, the extracted CSARs are
+trusted as the content of their archives and the clients of the validation
+server send it their templates, so files planted by another user must
+never be used. They are kept in per-user directories, which are only
+used while they are owned by the current user and not writable by others.
+'''
+
+import errno
+import os
+import stat
+import tempfile
+
+from toscaparser.utils.gettextutils import _
+
+APP_NAME = 'tosca-parser'
+
+
+def _uid():
+    return os.getuid() if hasattr(os, 'getuid') else None
+
+
+def check_private(path, st=None):
+    '''Raise an OSError unless path is private to the current user.
+
+    path is private when it is owned by the current user and neither
+    group nor world writable. st is the result of os.stat() on path when
+    it is already known, e.g. from os.fstat() on an opened file.
+    '''
+    uid = _uid()
+    if uid is None:
+        return
+    if st is None:
+        st = os.stat(path)
+    if st.st_uid != uid or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise OSError(errno.EPERM,
+                      _('"%s" is not private to the current user.') % path)
+
+
+def private_dir(path):
+    '''Create the directory path if needed and return it once checked.'''
+    try:
+        os.makedirs(path, 0o700)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    check_private(path)
+    return path
+
+
+def cache_dir(name):
+    '''Return the per-user cache directory called name.'''
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base or not os.path.isabs(base):
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, APP_NAME, name)
+
+
+def runtime_dir():
+    '''Return the per-user directory of the sockets.'''
+    base = os.environ.get('XDG_RUNTIME_DIR')
+    if base and os.path.isabs(base):
+        return os.path.join(base, APP_NAME)
+    return os.path.join(tempfile.gettempdir(),
+                        '%s-%s' % (APP_NAME, _uid() or 0))
@@ -11,7 +11,7 @@
 #    under the License.
 
 import collections
-import dateutil.parser
+import datetime
 import logging
 import numbers
 import re
@@ -27,6 +27,15 @@ log = logging.getLogger('tosca')
 
 RANGE_UNBOUNDED = 'UNBOUNDED'
 
+# Canonical and ISO 8601 forms of the YAML 1.1 timestamp type
+TIMESTAMP_RE = re.compile(
+    r'(?P<year>[0-9]{4})-(?P<month>[0-9]{1,2})-(?P<day>[0-9]{1,2})'
+    r'(?:(?:[Tt]|[ \t]+)'
+    r'(?P<hour>[0-9]{1,2}):(?P<minute>[0-9]{2}):(?P<second>[0-9]{2})'
+    r'(?:\.[0-9]+)?'
+    r'(?:[ \t]*(?:Z|[-+](?P<tz_hour>[0-9]{1,2})'
+    r'(?::(?P<tz_minute>[0-9]{2}))?))?)?\Z')
+
 
 def str_to_num(value):
     '''Convert a string representation of a number into a numeric type.'''
@@ -147,7 +156,33 @@ def validate_boolean(value):
         ValueError(_('"%s" is not a boolean.') % value))
 
 
+def _is_timestamp(value):
+    '''Return whether a string is a valid YAML 1.1 timestamp.'''
+    match = TIMESTAMP_RE.match(value)
+    if not match:
+        return False
+    fields = match.groupdict()
+    if int(fields['tz_hour'] or 0) > 23 or int(fields['tz_minute'] or 0) > 59:
+        return False
+    try:
+        datetime.datetime(int(fields['year']), int(fields['month']),
+                          int(fields['day']), int(fields['hour'] or 0),
+                          int(fields['minute'] or 0),
+                          int(fields['second'] or 0))
+    except ValueError:
+        return False
+    return True
+
+
 def validate_timestamp(value):
+    if isinstance(value, datetime.date):
+        # the YAML loader already constructed the timestamp
+        return
+    # dateutil's parser is only used for the other forms it accepts
+    if isinstance(value, six.string_types) and _is_timestamp(value):
+        return
+    import dateutil.parser
+
     try:
         # Note: we must return our own exception message
         # as dateutil's parser returns different types / values on
@@ -12,13 +12,17 @@
 
 import codecs
 from collections import OrderedDict
+import os
+import threading
 
+from six.moves import cPickle as pickle
 from six.moves import urllib
 import yaml
 
 from toscaparser.common.exception import ExceptionCollector
 from toscaparser.common.exception import URLException
 from toscaparser.utils.gettextutils import _
+from toscaparser.utils import zipfs
 
 
 if hasattr(yaml, 'CSafeLoader'):
@@ -26,28 +30,249 @@ if hasattr(yaml, 'CSafeLoader'):
 else:
     yaml_loader = yaml.SafeLoader
 
+# Seconds to wait for a server to accept a connection or send data
+URL_TIMEOUT = 30
+
+# Number of URLs fetched at the same time, and connections kept alive
+# per host
+MAX_FETCH_WORKERS = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class YamlCache(object):
+    '''LRU cache of parsed YAML documents.
+
+    Local files are keyed on their absolute path, modification time, size
+    and inode, URLs on the URL and validated with the ETag returned by the
+    server. Documents are kept pickled: the size of the pickle is charged
+    against max_bytes and every hit returns a new copy, so callers are free
+    to modify what they get.
+    '''
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, validator=None):
+        '''Return a copy of the cached document or None.'''
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] != validator:
+                if entry is not None:
+                    self.size -= len(entry[1])
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            data = entry[1]
+        return pickle.loads(data)
+
+    def get_validator(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def put(self, key, tpl, validator=None):
+        data = pickle.dumps(tpl, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= len(entry[1])
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = (validator, data)
+            self.size += len(data)
+            self._evict()
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._entries:
+            data = self._entries.popitem(last=False)[1][1]
+            self.size -= len(data)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'size': self.size,
+                    'max_bytes': self.max_bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+
+YAML_CACHE = YamlCache()
+
 
 def load_yaml(path, a_file=True):
-    f = None
+    if a_file:
+        return _load_yaml_file(path)
+    return _load_yaml_url(path)
+
+
+def _load_yaml_file(path):
+    fs = zipfs.find(path)
+    if fs is not None:
+        return _load_yaml_member(fs, path)
+    key = os.path.abspath(path)
     try:
-        f = codecs.open(path, encoding='utf-8', errors='strict') if a_file \
-            else urllib.request.urlopen(path)
-    except urllib.error.URLError as e:
-        if hasattr(e, 'reason'):
-            msg = (_('Failed to reach server "%(path)s". Reason is: '
-                     '%(reason)s.')
-                   % {'path': path, 'reason': e.reason})
-            ExceptionCollector.appendException(URLException(what=msg))
-            return
-        elif hasattr(e, 'code'):
-            msg = (_('The server "%(path)s" couldn\'t fulfill the request. '
-                     'Error code: "%(code)s".')
-                   % {'path': path, 'code': e.code})
-            ExceptionCollector.appendException(URLException(what=msg))
-            return
+        stat = os.stat(path)
+    except OSError:
+        stat = None
+    validator = (stat.st_mtime, stat.st_size, stat.st_ino) if stat else None
+    tpl = YAML_CACHE.get(key, validator) if stat else None
+    if tpl is None:
+        with codecs.open(path, encoding='utf-8', errors='strict') as f:
+            tpl = yaml.load(f.read(), Loader=yaml_loader)
+        if stat:
+            YAML_CACHE.put(key, tpl, validator)
+    return tpl
+
+
+def _load_yaml_member(fs, path):
+    key = os.path.abspath(path)
+    info = fs.getinfo(path)
+    validator = (info.CRC, info.file_size, info.date_time) if info else None
+    tpl = YAML_CACHE.get(key, validator) if info else None
+    if tpl is None:
+        tpl = yaml.load(fs.read(path).decode('utf-8'), Loader=yaml_loader)
+        YAML_CACHE.put(key, tpl, validator)
+    return tpl
+
+
+def _load_yaml_url(path):
+    return load_fetched_yaml(path, fetch_yaml_url(path))
+
+
+def get_session():
+    '''Return the HTTP session shared by all the URL loads.
+
+    The session keeps the connections to every host alive and pools up to
+    MAX_FETCH_WORKERS of them per host.
+    '''
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            adapter = requests.adapters.HTTPAdapter(
+                pool_maxsize=MAX_FETCH_WORKERS)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def fetch_yaml_url(path):
+    '''Fetch and parse the YAML document at a URL.
+
+    Returns a (document, error) tuple. The error is not reported to the
+    ExceptionCollector, so this can be called from any thread; the result
+    is handed to load_fetched_yaml() by the parsing thread.
+    '''
+    try:
+        if urllib.parse.urlparse(path).scheme in ('http', 'https'):
+            return _fetch_http(path), None
+        return _fetch_urllib(path), None
     except Exception as e:
-        raise
-    return yaml.load(f.read(), Loader=yaml_loader)
+        return None, e
+
+
+def _fetch_http(path):
+    import requests
+
+    etag = YAML_CACHE.get_validator(path)
+    headers = {'If-None-Match': etag} if etag else {}
+    try:
+        response = get_session().get(path, headers=headers,
+                                     timeout=URL_TIMEOUT)
+    except requests.RequestException as e:
+        raise urllib.error.URLError(e)
+    try:
+        if response.status_code == 304 and etag:
+            tpl = YAML_CACHE.get(path, etag)
+            if tpl is not None:
+                return tpl
+            return _fetch_http(path)
+        if response.status_code >= 400:
+            raise urllib.error.HTTPError(path, response.status_code,
+                                         response.reason, response.headers,
+                                         None)
+        tpl = yaml.load(response.content, Loader=yaml_loader)
+        etag = response.headers.get('ETag')
+    finally:
+        response.close()
+    if etag:
+        YAML_CACHE.put(path, tpl, etag)
+    return tpl
+
+
+def _fetch_urllib(path):
+    f = urllib.request.urlopen(path, timeout=URL_TIMEOUT)
+    try:
+        return yaml.load(f.read(), Loader=yaml_loader)
+    finally:
+        f.close()
+
+
+def fetch_yaml_urls(paths, max_workers=None):
+    '''Fetch the YAML documents at several URLs concurrently.
+
+    Returns a map of every URL to its fetch_yaml_url() result.
+    '''
+    from multiprocessing.pool import ThreadPool
+
+    paths = list(OrderedDict.fromkeys(paths))
+    workers = min(max_workers or MAX_FETCH_WORKERS, len(paths))
+    if workers <= 1:
+        return dict((path, fetch_yaml_url(path)) for path in paths)
+    pool = ThreadPool(workers)
+    try:
+        return dict(zip(paths, pool.map(fetch_yaml_url, paths)))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def load_fetched_yaml(path, result):
+    '''Return the document fetched from a URL and report its error.'''
+    tpl, error = result
+    if error is None:
+        return tpl
+    if isinstance(error, urllib.error.URLError):
+        return report_url_error(path, error)
+    raise error
+
+
+def report_url_error(path, e):
+    if hasattr(e, 'reason'):
+        msg = (_('Failed to reach server "%(path)s". Reason is: '
+                 '%(reason)s.')
+               % {'path': path, 'reason': e.reason})
+        ExceptionCollector.appendException(URLException(what=msg))
+        return
+    elif hasattr(e, 'code'):
+        msg = (_('The server "%(path)s" couldn\'t fulfill the request. '
+                 'Error code: "%(code)s".')
+               % {'path': path, 'code': e.code})
+        ExceptionCollector.appendException(URLException(what=msg))
+        return
 
 
 def simple_parse(tmpl_str):
@@ -0,0 +1,133 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''Read-only file system over the members of zip archives.
+
+A ZipFileSystem is mounted on a directory that does not exist on disk,
+usually the path of the archive itself. While it is mounted, the paths
+below that directory name the members of the archive: isfile() and read()
+look them up in the index of the archive and read them in place, so that
+templates can be parsed from a CSAR without extracting it. All the other
+paths are looked up on disk.
+'''
+
+import os
+import posixpath
+import shutil
+import threading
+
+_mounts = {}
+_lock = threading.Lock()
+
+
+class ZipFileSystem(object):
+    '''Members of a zip archive under a virtual directory.'''
+
+    def __init__(self, zfile, root):
+        self.zfile = zfile
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.members = {}
+        for info in zfile.infolist():
+            name = posixpath.normpath(info.filename)
+            if not info.filename.endswith('/'):
+                self.members[name] = info
+        # the file object of a ZipFile is shared by all its reads
+        self._lock = threading.Lock()
+
+    def member(self, path):
+        '''Return the name of the member at a path, or None.'''
+        path = os.path.normpath(os.path.abspath(path))
+        if not path.startswith(self.root + os.sep):
+            return None
+        name = path[len(self.root) + 1:].replace(os.sep, '/')
+        if name in self.members:
+            return name
+
+    def path(self, name):
+        '''Return the path of a member.'''
+        return os.path.join(self.root, *name.split('/'))
+
+    def isfile(self, path):
+        return self.member(path) is not None
+
+    def getinfo(self, path):
+        name = self.member(path)
+        return self.members[name] if name else None
+
+    def read(self, path):
+        name = self.member(path)
+        if name is None:
+            raise IOError(2, os.strerror(2), path)
+        with self._lock:
+            return self.zfile.read(self.members[name])
+
+    def extract(self, name, target_dir):
+        '''Extract a member to a directory and return its path there.'''
+        name = posixpath.normpath(name)
+        if name not in self.members or name.startswith('../') or \
+                posixpath.isabs(name):
+            raise IOError(2, os.strerror(2), self.path(name))
+        target = os.path.join(target_dir, *name.split('/'))
+        if not os.path.isdir(os.path.dirname(target)):
+            os.makedirs(os.path.dirname(target))
+        with self._lock:
+            with self.zfile.open(self.members[name]) as source:
+                with open(target, 'wb') as f:
+                    shutil.copyfileobj(source, f)
+        return target
+
+
+def mount(fs):
+    with _lock:
+        _mounts.setdefault(fs.root, []).append(fs)
+
+
+def unmount(fs):
+    with _lock:
+        mounted = _mounts.get(fs.root, [])
+        if fs in mounted:
+            mounted.remove(fs)
+        if not mounted:
+            _mounts.pop(fs.root, None)
+
+
+def find(path):
+    '''Return the mounted ZipFileSystem holding a path, or None.'''
+    if not _mounts:
+        return None
+    path = os.path.normpath(os.path.abspath(path))
+    with _lock:
+        while True:
+            mounted = _mounts.get(path)
+            if mounted:
+                return mounted[-1]
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+def isfile(path):
+    '''Return whether a path names a file on disk or a mounted member.'''
+    fs = find(path)
+    if fs is not None:
+        return fs.isfile(path)
+    return os.path.isfile(path)
+
+
+def read(path):
+    '''Return the content of a file on disk or of a mounted member.'''
+    fs = find(path)
+    if fs is not None:
+        return fs.read(path)
+    with open(path, 'rb') as f:
+        return f.read()